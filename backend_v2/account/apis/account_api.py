@@ -1,20 +1,24 @@
 import datetime
 import logging
-import requests
 
 from uuid import uuid4
-from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from ninja import Router, Form, UploadedFile
-from oauth2_provider.models import Application, RefreshToken, AccessToken
+from oauth2_provider.models import RefreshToken, AccessToken
 
 from account.models import Member, CertificateCode
+from account.oauth import issue_token
+from account.outbox import enqueue_message
 from account.schemas import LoginSchema, SignupSchema, TokenResponse, ProfileResponse, \
     SignupSuccessResponse, FindIdSchema, FindPwSchema, CertificateSchema, ProfileNameSchema, \
     PasswordChangeSchema, UsernameCheckResponse, CertificateKeyResponse, ResetPwSchema
+from room.cache import invalidate_member_rooms
 from settings.auth import AuthBearer, auth_check
 from utils.base import base_api
-from utils.gmail import send_message
+from utils.db_router import read_only
+from utils.gmail import PASSWORD_RESET_TEMPLATE
+from utils.query_budget import query_budget
 from utils.response import ErrorResponseSchema, SuccessResponse
 from utils.error import server_error_return, auth_error_return, error_codes, exist_error_return, CtudyException, \
     not_found_error_return, param_error_return
@@ -24,6 +28,8 @@ logger = logging.getLogger('account')
 
 
 @router.post("/signin/", response={200: TokenResponse, error_codes: ErrorResponseSchema})
+# DOT password grant 가 회원을 다시 조회한다
+@query_budget(9, n_plus_one=3)
 @base_api(logger)
 def login(request, payload: LoginSchema):
     payload_data = payload.dict()
@@ -35,33 +41,11 @@ def login(request, payload: LoginSchema):
     if not user.check_password(password) or not user.is_active:
         raise CtudyException(code=401, message=auth_error_return)
 
-    app_objects = Application.objects.filter(name=settings.APP_NAME)
-    if not app_objects.exists():
-        app = Application.objects.create(authorization_grant_type='password',
-                                         client_type='confidential',
-                                         name=settings.APP_NAME)
-    else:
-        app = app_objects[0]
-
-    url_data = {
-        'client_id': app.client_id,
-        'client_secret': app.client_secret,
-        'grant_type': app.authorization_grant_type,
-        'username': username,
-        'password': password
-    }
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-    try:
-        response = requests.post(url=settings.TOKEN_URL, data=url_data, headers=headers)
-    except Exception as e:
-        raise CtudyException(500, e.__str__())
-    if response.status_code != 200:
-        raise CtudyException(401, auth_error_return)
-
-    return response.json()
+    return issue_token(username, password)
 
 
 @router.get("/signup/", response={200: SuccessResponse, error_codes: ErrorResponseSchema})
+@query_budget(2)
 @base_api(logger)
 def username_email_check(request, username: str = None, email: str = None):
     if username is None and email is None:
@@ -79,6 +63,7 @@ def username_email_check(request, username: str = None, email: str = None):
 
 
 @router.post("/signup/", response={200: SignupSuccessResponse, error_codes: ErrorResponseSchema})
+@query_budget(4)
 @base_api(logger)
 def signup(request, payload: SignupSchema = Form(...), file: UploadedFile = None):
     payload_data = payload.dict()
@@ -96,6 +81,7 @@ def signup(request, payload: SignupSchema = Form(...), file: UploadedFile = None
 
 
 @router.get("/logout/", response={200: SuccessResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(5)
 @base_api(logger)
 @auth_check
 def logout(request):
@@ -105,16 +91,20 @@ def logout(request):
 
 
 @router.delete("/withdraw/", response={200: SuccessResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(17)
 @base_api(logger)
 @auth_check
 def withdraw(request):
+    invalidate_member_rooms(request.user.id)
     request.user.delete()
     return {'success': True}
 
 
 @router.get("/profile/", response={200: ProfileResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(1)
 @base_api(logger)
 @auth_check
+@read_only
 def profile(request):
     try:
         return request.user
@@ -128,6 +118,7 @@ def profile(request):
 
 
 @router.put("/profile/", response={200: SuccessResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(4)
 @base_api(logger)
 @auth_check
 def update_profile(request, payload: ProfileNameSchema):
@@ -135,21 +126,25 @@ def update_profile(request, payload: ProfileNameSchema):
         if value is not None:
             setattr(request.user, attr, value)
             request.user.save()
+    invalidate_member_rooms(request.user.id)
 
     return {'success': True}
 
 
 @router.post("/profile/", response={200: SuccessResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(4)
 @base_api(logger)
 @auth_check
 def update_profile_image(request, file: UploadedFile = None):
     request.user.image = file
     request.user.save()
+    invalidate_member_rooms(request.user.id)
 
     return {'success': True}
 
 
 @router.put("/password/", response={200: SuccessResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(4)
 @base_api(logger)
 @auth_check
 def update_password(request, payload: PasswordChangeSchema):
@@ -164,6 +159,7 @@ def update_password(request, payload: PasswordChangeSchema):
 
 
 @router.post("/findid/", response={200: UsernameCheckResponse, error_codes: ErrorResponseSchema})
+@query_budget(1)
 @base_api(logger)
 def find_id(request, payload: FindIdSchema):
     payload_data = payload.dict()
@@ -174,6 +170,7 @@ def find_id(request, payload: FindIdSchema):
 
 
 @router.post("/findpw/", response={200: SuccessResponse, error_codes: ErrorResponseSchema})
+@query_budget(6)
 @base_api(logger)
 def find_pw(request, payload: FindPwSchema):
     payload_data = payload.dict()
@@ -185,16 +182,19 @@ def find_pw(request, payload: FindPwSchema):
     certificate_code = certificate[:6]
     certificate_key = certificate[6:12]
     expire = datetime.datetime.now() + datetime.timedelta(minutes=3)
-    CertificateCode.objects.filter(member=member).update(is_checked=True)
-    CertificateCode.objects.create(member=member, code=certificate_code, key=certificate_key, expire=expire)
+    with transaction.atomic():
+        CertificateCode.objects.filter(member=member).update(is_checked=True)
+        CertificateCode.objects.create(member=member, code=certificate_code, key=certificate_key, expire=expire)
 
-    # 메일 발송
-    send_message(to=payload_data['email'], subject='[Ctudy] 비밀번호 재설정 인증', code=certificate_code)
+        # 메일 발송 (send_outbox 명령이 발송)
+        enqueue_message(to=payload_data['email'], subject='[Ctudy] 비밀번호 재설정 인증',
+                        template=PASSWORD_RESET_TEMPLATE, context={'certificate_code': certificate_code})
 
     return {'success': True}
 
 
 @router.post("/findpw/certificate/", response={200: CertificateKeyResponse, error_codes: ErrorResponseSchema})
+@query_budget(3)
 @base_api(logger)
 def check_certificate_code(request, payload: CertificateSchema):
     payload_data = payload.dict()
@@ -217,6 +217,7 @@ def check_certificate_code(request, payload: CertificateSchema):
 
 
 @router.post("/findpw/reset/", response={200: SuccessResponse, error_codes: ErrorResponseSchema})
+@query_budget(6)
 @base_api(logger)
 def reset_pw(request, payload: ResetPwSchema):
     payload_data = payload.dict()
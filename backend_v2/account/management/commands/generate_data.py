@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from account.models import Member
+from account.search import get_member_search
+from benchmarks.synthetic import create_members, create_rooms, create_coupons, create_tokens
+
+
+class Command(BaseCommand):
+    help = '부하 테스트용 회원, 스터디룸, 쿠폰, access token 을 bulk_create 로 생성한다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=100000)
+        parser.add_argument('--rooms', type=int, default=10000)
+        parser.add_argument('--coupons', type=int, default=5000000)
+        parser.add_argument('--tokens', type=int, default=1000, help='access token 을 발급할 회원 수')
+        parser.add_argument('--room-size', type=int, default=10, help='스터디룸 평균 인원 (방장 제외)')
+        parser.add_argument('--max-room-size', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--force', action='store_true', help='DEV 가 아닌 환경에서도 생성한다')
+
+    def step(self, title, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stdout.write(f'{title} in {time.perf_counter() - start:.1f}s')
+        return result
+
+    def handle(self, *args, **options):
+        if settings.ENV != 'DEV' and not options['force']:
+            raise CommandError(f'{settings.ENV} 환경의 DB 에 데이터를 생성하려면 --force 를 사용하세요')
+        if options['members'] < 2:
+            raise CommandError('--members 는 2 이상이어야 합니다')
+
+        batch_size = options['batch_size']
+        seed = options['seed']
+        last_id = Member.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+        self.step(f"{options['members']} members", create_members, options['members'],
+                  batch_size=batch_size, seed=seed, prefix='generated', start=last_id)
+        member_ids = list(Member.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True))
+        self.step('member search index', get_member_search().rebuild)
+
+        rooms = self.step(f"{options['rooms']} rooms", create_rooms, member_ids, options['rooms'],
+                          mean_size=options['room_size'], max_size=options['max_room_size'],
+                          batch_size=batch_size, seed=seed)
+        self.step(f"{options['coupons']} coupons", create_coupons, rooms, options['coupons'],
+                  batch_size=batch_size, seed=seed)
+        token_member_ids = member_ids[:options['tokens']]
+        self.step(f'{len(token_member_ids)} access tokens', create_tokens, token_member_ids, batch_size=batch_size)
+
+        if token_member_ids:
+            self.stdout.write(f'access token: bench-token-{token_member_ids[0]} ~ bench-token-{token_member_ids[-1]}')
+        self.stdout.write("password: 'ctudy'")
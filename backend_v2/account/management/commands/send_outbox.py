@@ -0,0 +1,40 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from account.outbox import send_outbox
+
+logger = logging.getLogger('account')
+
+
+class Command(BaseCommand):
+    help = 'email outbox 의 발송 대기 메일을 발송한다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='대기 메일을 한 번 발송하고 종료한다')
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+                            help='대기 메일이 없을 때 다시 조회할 때까지 기다리는 시간(초)')
+
+    def handle(self, *args, **options):
+        # SMTP 연결은 처음 발송할 때 열고 종료할 때까지 유지한다
+        connection = get_connection()
+        try:
+            while True:
+                try:
+                    sent = send_outbox(batch_size=options['batch_size'], connection=connection)
+                except Exception as e:
+                    # SMTP 서버에 연결할 수 없는 경우 가져간 메일은 lease 가 끝난 뒤 다시 발송한다
+                    logger.error(f'email outbox worker failed: {e}')
+                    connection.close()
+                    sent = 0
+                if sent:
+                    self.stdout.write(f'sent {sent} email(s)')
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+        finally:
+            connection.close()
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# migration 이 나중에 바뀌는 account.search 에 의존하지 않도록 그대로 옮겨 둔다
+FTS_TABLE = 'account_member_fts'
+
+
+def fts_supported(connection):
+    # SQLite FTS5 trigram tokenizer 는 3.34.0 부터 지원된다
+    return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 34, 0)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute('CREATE INDEX IF NOT EXISTS account_member_name_trgm '
+                              'ON account_member USING gin (UPPER(name) gin_trgm_ops)')
+        schema_editor.execute('CREATE INDEX IF NOT EXISTS account_member_username_trgm '
+                              'ON account_member USING gin (UPPER(username) gin_trgm_ops)')
+    elif fts_supported(connection):
+        schema_editor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                              f"USING fts5(name, username, tokenize='trigram')")
+        schema_editor.execute(f'INSERT INTO {FTS_TABLE} (rowid, name, username) '
+                              f'SELECT id, name, username FROM account_member')
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS account_member_name_trgm')
+        schema_editor.execute('DROP INDEX IF EXISTS account_member_username_trgm')
+    elif fts_supported(connection):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_certificatecode_is_checked'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
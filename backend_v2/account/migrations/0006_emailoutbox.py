@@ -0,0 +1,33 @@
+# Generated by Django 4.0.7 on 2026-10-18 18:45
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_member_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('to', models.EmailField(max_length=254)),
+                ('subject', models.CharField(max_length=200)),
+                ('template', models.CharField(max_length=200)),
+                ('context', models.JSONField(default=dict)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_time', models.DateTimeField(default=datetime.datetime.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('sent_time', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='emailoutbox',
+            index=models.Index(condition=models.Q(('sent_time__isnull', True)), fields=['next_attempt_time'], name='email_outbox_pending_idx'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+import datetime
 import os
 from uuid import uuid4
 
@@ -26,3 +27,25 @@ class CertificateCode(models.Model):
     key = models.CharField(max_length=6)
     is_checked = models.BooleanField(default=False)
     expire = models.DateTimeField()
+
+
+class EmailOutbox(models.Model):
+    """
+    발송 대기 메일. 요청 트랜잭션 안에서 저장하고 send_outbox 명령이 발송한다.
+    """
+    to = models.EmailField()
+    subject = models.CharField(max_length=200)
+    template = models.CharField(max_length=200)
+    context = models.JSONField(default=dict)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_time = models.DateTimeField(default=datetime.datetime.now)
+    last_error = models.TextField(blank=True, default='')
+    created_time = models.DateTimeField(auto_now_add=True)
+    sent_time = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            # 발송 대기 메일 조회
+            models.Index(fields=['next_attempt_time'], name='email_outbox_pending_idx',
+                         condition=models.Q(sent_time__isnull=True)),
+        ]
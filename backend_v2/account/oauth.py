@@ -0,0 +1,41 @@
+import json
+
+from django.conf import settings
+from oauth2_provider.models import Application
+from oauth2_provider.oauth2_backends import get_oauthlib_core
+from oauthlib.common import urlencode
+
+from utils.error import CtudyException, auth_error_return
+
+oauthlib_core = get_oauthlib_core()
+
+
+def get_application():
+    app = Application.objects.filter(name=settings.APP_NAME).first()
+    if app is None:
+        app = Application.objects.create(authorization_grant_type='password',
+                                         client_type='confidential',
+                                         name=settings.APP_NAME)
+    return app
+
+
+def issue_token(username, password):
+    """
+    password grant 토큰 발급
+    TOKEN_URL 로 HTTP 요청을 보내지 않고 oauthlib 토큰 서버를 프로세스 내부에서 직접 호출한다.
+    """
+    app = get_application()
+
+    body = urlencode([
+        ('client_id', app.client_id),
+        ('client_secret', app.client_secret),
+        ('grant_type', app.authorization_grant_type),
+        ('username', username),
+        ('password', password)
+    ])
+    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+    _headers, body, status = oauthlib_core.server.create_token_response(settings.TOKEN_URL, 'POST', body, headers)
+    if status != 200:
+        raise CtudyException(401, auth_error_return)
+
+    return json.loads(body)
@@ -0,0 +1,109 @@
+import datetime
+import logging
+import smtplib
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction, connection as db_connection
+
+from account.models import EmailOutbox
+from utils.gmail import build_message
+
+logger = logging.getLogger('account')
+
+
+def enqueue_message(to, subject, template, context):
+    """
+    메일을 outbox 에 저장한다. 호출하는 쪽의 트랜잭션이 commit 되어야 발송된다.
+    """
+    return EmailOutbox.objects.create(to=to, subject=subject, template=template, context=context)
+
+
+def retry_delay(attempts):
+    """
+    재시도 간격 (지수 backoff, 최대 EMAIL_OUTBOX_MAX_RETRY_DELAY 초)
+    """
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return datetime.timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+
+def claim_batch(batch_size):
+    """
+    발송할 메일을 가져오고 lease 시간만큼 next_attempt_time 을 미뤄 다른 worker 가 가져가지 않게 한다.
+    """
+    now = datetime.datetime.now()
+    with transaction.atomic():
+        queryset = EmailOutbox.objects.filter(sent_time__isnull=True,
+                                              attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+                                              next_attempt_time__lte=now).order_by('next_attempt_time', 'id')
+        if db_connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        batch = list(queryset[:batch_size])
+        EmailOutbox.objects.filter(id__in=[email.id for email in batch]).update(
+            next_attempt_time=now + datetime.timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        )
+    return batch
+
+
+def send_batch(batch, connection):
+    """
+    하나의 SMTP 연결로 메일을 차례로 발송하고 결과를 기록한다.
+    """
+    sent = 0
+    for email in batch:
+        try:
+            build_message(email.to, email.subject, email.template, email.context, connection=connection).send()
+        except Exception as e:
+            logger.error(f'email outbox {email.id} send failed: {e}')
+            email.attempts += 1
+            email.next_attempt_time = datetime.datetime.now() + retry_delay(email.attempts)
+            email.last_error = str(e)
+            email.save(update_fields=['attempts', 'next_attempt_time', 'last_error'])
+            # 연결이 끊어졌을 수 있으므로 다음 메일 전에 다시 연결한다
+            connection.close()
+            connection.open()
+        else:
+            email.attempts += 1
+            email.sent_time = datetime.datetime.now()
+            email.save(update_fields=['attempts', 'sent_time'])
+            sent += 1
+    return sent
+
+
+def reopen_if_closed(connection):
+    """
+    열어둔 SMTP 연결을 서버가 끊었으면 다시 연결한다. (이미 열려 있으면 open() 은 아무것도 하지 않는다)
+    """
+    smtp = getattr(connection, 'connection', None)
+    if smtp is not None:
+        try:
+            smtp.noop()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+    connection.open()
+
+
+def send_outbox(batch_size=None, connection=None):
+    """
+    발송 대기 메일이 없을 때까지 batch 단위로 발송하고 발송한 메일 수를 반환한다.
+    모든 batch 가 같은 SMTP 연결을 사용한다. connection 을 주면 닫지 않고 다음 호출에서도 사용하며,
+    주지 않으면 대기 메일이 있을 때만 연결을 열고 발송 후 닫는다.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0
+
+    if connection is None:
+        with get_connection() as connection:
+            return drain(batch, batch_size, connection)
+    reopen_if_closed(connection)
+    return drain(batch, batch_size, connection)
+
+
+def drain(batch, batch_size, connection):
+    sent = 0
+    while batch:
+        sent += send_batch(batch, connection)
+        batch = claim_batch(batch_size)
+    return sent
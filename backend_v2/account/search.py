@@ -0,0 +1,94 @@
+from django.db import connection
+from django.db.models import Q, FloatField
+from django.db.models.expressions import RawSQL
+
+from account.models import Member
+
+FTS_TABLE = 'account_member_fts'
+
+
+def fts_supported(conn):
+    """
+    SQLite FTS5 trigram tokenizer 는 3.34.0 부터 지원된다.
+    """
+    return conn.vendor == 'sqlite' and conn.Database.sqlite_version_info >= (3, 34, 0)
+
+
+class MemberSearch:
+    """
+    회원 검색 기본 백엔드 (name, username LIKE 검색)
+    """
+    def search(self, keyword, queryset=None):
+        if queryset is None:
+            queryset = Member.objects.all()
+        return queryset.filter(Q(name__icontains=keyword) | Q(username__icontains=keyword)).order_by('id')
+
+    def index(self, member):
+        pass
+
+    def remove(self, member_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class TrigramMemberSearch(MemberSearch):
+    """
+    PostgreSQL pg_trgm 검색
+    icontains 가 생성하는 UPPER(column) LIKE 조건은 migration 으로 만든
+    UPPER(name), UPPER(username) GIN 인덱스를 사용하며, 결과는 trigram 유사도 순으로 정렬한다.
+    """
+    def search(self, keyword, queryset=None):
+        from django.contrib.postgres.search import TrigramSimilarity
+        from django.db.models.functions import Greatest
+
+        return super().search(keyword, queryset).annotate(
+            rank=Greatest(TrigramSimilarity('name', keyword), TrigramSimilarity('username', keyword))
+        ).order_by('-rank', 'id')
+
+
+class FTSMemberSearch(MemberSearch):
+    """
+    SQLite FTS5 검색
+    account_member_fts 는 Member 저장/삭제 signal 로 동기화되며, 결과는 bm25 순으로 정렬한다.
+    trigram 으로 찾을 수 없는 3글자 미만 검색어는 LIKE 검색을 사용한다.
+    """
+    def search(self, keyword, queryset=None):
+        if len(keyword) < 3:
+            return super().search(keyword, queryset)
+        if queryset is None:
+            queryset = Member.objects.all()
+
+        # FTS5 의 rank 컬럼(bm25)을 쓰기 위해 가상 테이블을 join 한다
+        # rank 를 annotation 으로 두어 cursor 페이지네이션의 정렬 키로도 쓸 수 있다
+        match = '"{}"'.format(keyword.replace('"', '""'))
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {Member._meta.db_table}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[match]
+        ).annotate(rank=RawSQL(f'{FTS_TABLE}.rank', (), output_field=FloatField())).order_by('rank', 'id')
+
+    def index(self, member):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [member.id])
+            cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, name, username) VALUES (%s, %s, %s)',
+                           [member.id, member.name, member.username])
+
+    def remove(self, member_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [member_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, name, username) '
+                           f'SELECT id, name, username FROM {Member._meta.db_table}')
+
+
+def get_member_search():
+    if connection.vendor == 'postgresql':
+        return TrigramMemberSearch()
+    if fts_supported(connection):
+        return FTSMemberSearch()
+    return MemberSearch()
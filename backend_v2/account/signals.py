@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from oauth2_provider.models import AccessToken
+
+from account.models import Member
+from account.search import get_member_search
+from settings.auth import token_cache
+
+
+@receiver(post_save, sender=AccessToken)
+@receiver(post_delete, sender=AccessToken)
+def evict_access_token(sender, instance, **kwargs):
+    token_cache.evict(instance.token)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def evict_member_tokens(sender, instance, **kwargs):
+    token_cache.evict_user(instance.id)
+
+
+@receiver(post_save, sender=Member)
+def index_member(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'name', 'username'} & set(update_fields):
+        return
+    get_member_search().index(instance)
+
+
+@receiver(post_delete, sender=Member)
+def remove_member_index(sender, instance, **kwargs):
+    get_member_search().remove(instance.id)
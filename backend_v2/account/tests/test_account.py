@@ -2,10 +2,11 @@ from time import sleep
 
 from test_plus.test import TestCase
 from account.models import Member
+from utils.testing import QueryBudgetMixin
 
 
 # noinspection SpellCheckingInspection
-class ContractListViewTestCase(TestCase):
+class ContractListViewTestCase(QueryBudgetMixin, TestCase):
     def setUp(self) -> None:
         super().setUp()
         # Member
@@ -0,0 +1,54 @@
+import datetime
+
+from oauth2_provider.models import AccessToken
+from test_plus.test import TestCase
+
+from account.models import Member
+from settings.auth import token_cache
+from utils.testing import QueryBudgetMixin, auth_headers
+
+
+# noinspection SpellCheckingInspection
+class AuthBearerTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        token_cache.clear()
+        self.일반사용자 = Member.objects.create_user(username='일반사용자', email='test@test', password='test')
+        self.headers = auth_headers(self.일반사용자)
+        self.access_token = AccessToken.objects.get(user=self.일반사용자)
+
+    def test_캐시된_토큰은_인증_쿼리를_실행하지_않는다(self):
+        res = self.client.get(path='/api/v2/coupon/', data={'room_id': 1}, **self.headers)
+        self.assertEqual(res.status_code, 200)
+
+        # list_coupon 조회 쿼리 1개만 실행된다
+        with self.assertNumQueries(1):
+            res = self.client.get(path='/api/v2/coupon/', data={'room_id': 1}, **self.headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(token_cache.info()['hits'], 1)
+        self.assertEqual(token_cache.info()['misses'], 1)
+
+    def test_로그아웃하면_캐시에서_제거된다(self):
+        res = self.client.get(path='/api/v2/account/logout/', **self.headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(token_cache.info()['size'], 0)
+
+        res = self.client.get(path='/api/v2/account/profile/', **self.headers)
+        self.assertEqual(res.status_code, 401)
+
+    def test_만료된_토큰은_캐시하지_않는다(self):
+        self.access_token.expires = datetime.datetime.now() - datetime.timedelta(minutes=1)
+        self.access_token.save()
+
+        res = self.client.get(path='/api/v2/account/profile/', **self.headers)
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(token_cache.info()['size'], 0)
+
+    def test_profile_은_캐시된_토큰이면_쿼리를_실행하지_않는다(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(path='/api/v2/account/profile/', **self.headers)
+        self.assertEqual(res.status_code, 200)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(path='/api/v2/account/profile/', **self.headers)
+        self.assertEqual(res.json()['response']['username'], '일반사용자')
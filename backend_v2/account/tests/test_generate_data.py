@@ -0,0 +1,40 @@
+from io import StringIO
+
+from django.core.management import call_command
+from oauth2_provider.models import AccessToken
+from test_plus.test import TestCase
+
+from account.models import Member
+from coupon.models import Coupon
+from room.models import Room, RoomConfig
+
+
+# noinspection SpellCheckingInspection
+class GenerateDataTestCase(TestCase):
+    def generate(self, **options):
+        call_command('generate_data', batch_size=50, stdout=StringIO(), **options)
+
+    def test_회원_스터디룸_쿠폰_토큰을_생성한다(self):
+        self.generate(members=200, rooms=30, coupons=500, tokens=10, room_size=5, max_room_size=20)
+
+        self.assertEqual(Member.objects.count(), 200)
+        self.assertEqual(Room.objects.count(), 30)
+        self.assertEqual(RoomConfig.objects.count(), 30)
+        self.assertEqual(Coupon.objects.count(), 500)
+        self.assertEqual(AccessToken.objects.count(), 10)
+        self.assertLessEqual(max(room.members.count() for room in Room.objects.all()), 20)
+
+        # 쿠폰을 주고받는 회원은 모두 스터디룸 멤버(방장 포함)이다
+        room_members = {(room_id, member_id) for room_id, member_id in
+                        Room.members.through.objects.values_list('room_id', 'member_id')}
+        room_members |= set(RoomConfig.objects.values_list('room_id', 'master_id'))
+        for coupon in Coupon.objects.all():
+            self.assertIn((coupon.room_id, coupon.sender_id), room_members)
+            self.assertIn((coupon.room_id, coupon.receiver_id), room_members)
+            self.assertNotEqual(coupon.sender_id, coupon.receiver_id)
+            self.assertLessEqual(coupon.start_date, coupon.end_date)
+
+    def test_다시_실행해도_회원이_중복되지_않는다(self):
+        self.generate(members=20, rooms=2, coupons=0, tokens=0)
+        self.generate(members=20, rooms=2, coupons=0, tokens=0)
+        self.assertEqual(Member.objects.count(), 40)
@@ -0,0 +1,106 @@
+import datetime
+from smtplib import SMTPRecipientsRefused
+
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import override_settings
+from test_plus.test import TestCase
+
+from account.models import Member, CertificateCode, EmailOutbox
+from account.outbox import enqueue_message, send_outbox
+from utils.gmail import PASSWORD_RESET_TEMPLATE
+
+
+class CountingBackend(locmem.EmailBackend):
+    """
+    SMTP 대신 사용하는 backend. 연결 횟수를 세고 fail@test 로 보내는 메일은 실패시킨다.
+    """
+    opened = 0
+    is_open = False
+
+    def open(self):
+        if self.is_open:
+            return False
+        self.is_open = True
+        CountingBackend.opened += 1
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        for message in messages:
+            if 'fail@test' in message.to:
+                raise SMTPRecipientsRefused({'fail@test': (550, b'rejected')})
+        return super().send_messages(messages)
+
+
+# noinspection SpellCheckingInspection
+@override_settings(EMAIL_BACKEND='account.tests.test_outbox.CountingBackend')
+class EmailOutboxTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        CountingBackend.opened = 0
+        self.일반사용자 = Member.objects.create_user(username='일반사용자', email='test@test', password='test')
+
+    def test_비밀번호_찾기는_메일을_outbox_에_저장한다(self):
+        res = self.client.post(
+            path='/api/v2/account/findpw/',
+            data={'username': '일반사용자', 'email': 'test@test'},
+            content_type='application/json'
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+
+        email = EmailOutbox.objects.get()
+        certificate = CertificateCode.objects.get(member=self.일반사용자)
+        self.assertEqual(email.context, {'certificate_code': certificate.code})
+
+        call_command('send_outbox', '--once')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['test@test'])
+        self.assertIn(certificate.code, mail.outbox[0].body)
+        self.assertIsNotNone(EmailOutbox.objects.get().sent_time)
+
+    def test_하나의_연결로_batch_단위로_발송한다(self):
+        for i in range(25):
+            enqueue_message(f'{i}@test', '제목', PASSWORD_RESET_TEMPLATE, {'certificate_code': i})
+
+        self.assertEqual(send_outbox(batch_size=10), 25)
+        self.assertEqual(len(mail.outbox), 25)
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(send_outbox(batch_size=10), 0)
+        self.assertEqual(CountingBackend.opened, 1)
+
+    def test_worker_는_연결을_열어둔_채로_다음_발송에_다시_사용한다(self):
+        connection = get_connection()
+        for i in range(3):
+            enqueue_message(f'{i}@test', '제목', PASSWORD_RESET_TEMPLATE, {'certificate_code': i})
+            self.assertEqual(send_outbox(batch_size=2, connection=connection), 1)
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertTrue(connection.is_open)
+
+    def test_발송에_실패하면_backoff_후_다시_발송한다(self):
+        enqueue_message('fail@test', '제목', PASSWORD_RESET_TEMPLATE, {'certificate_code': 'A'})
+        enqueue_message('test@test', '제목', PASSWORD_RESET_TEMPLATE, {'certificate_code': 'B'})
+
+        self.assertEqual(send_outbox(), 1)
+        failed = EmailOutbox.objects.get(to='fail@test')
+        self.assertEqual(failed.attempts, 1)
+        self.assertIsNone(failed.sent_time)
+        self.assertIn('rejected', failed.last_error)
+        self.assertGreater(failed.next_attempt_time, datetime.datetime.now())
+
+        # backoff 시간이 지나기 전에는 다시 발송하지 않는다
+        self.assertEqual(send_outbox(), 0)
+        self.assertEqual(EmailOutbox.objects.get(to='fail@test').attempts, 1)
+
+        with override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2):
+            EmailOutbox.objects.filter(to='fail@test').update(next_attempt_time=datetime.datetime.now())
+            send_outbox()
+            EmailOutbox.objects.filter(to='fail@test').update(next_attempt_time=datetime.datetime.now())
+            send_outbox()
+        # 최대 시도 횟수를 넘으면 더 이상 발송하지 않는다
+        self.assertEqual(EmailOutbox.objects.get(to='fail@test').attempts, 2)
@@ -0,0 +1,31 @@
+from test_plus.test import TestCase
+
+from account.models import Member
+from account.search import get_member_search
+
+
+# noinspection SpellCheckingInspection
+class MemberSearchTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.search = get_member_search()
+        self.김철수 = Member.objects.create_user(username='chulsoo@ctudy.com', email='a@test', password='test', name='김철수')
+        self.이영희 = Member.objects.create_user(username='younghee@ctudy.com', email='b@test', password='test', name='이영희')
+
+    def search_ids(self, keyword):
+        return list(self.search.search(keyword).values_list('id', flat=True))
+
+    def test_이름과_아이디로_검색한다(self):
+        self.assertEqual(self.search_ids('CHULSOO'), [self.김철수.id])
+        self.assertEqual(self.search_ids('영희'), [self.이영희.id])
+        self.assertEqual(self.search_ids('ctudy.com'), [self.김철수.id, self.이영희.id])
+        self.assertEqual(self.search_ids('없는회원'), [])
+
+    def test_회원_정보_변경이_검색에_반영된다(self):
+        self.김철수.name = '박민수'
+        self.김철수.save()
+        self.assertEqual(self.search_ids('김철수'), [])
+        self.assertEqual(self.search_ids('박민수'), [self.김철수.id])
+
+        self.김철수.delete()
+        self.assertEqual(self.search_ids('박민수'), [])
@@ -0,0 +1,67 @@
+"""
+Ctudy 성능 측정 스크립트
+
+backend_v2 디렉터리에서 모듈로 실행한다.
+    python -m benchmarks.login --help
+
+측정은 실행 시 새로 만드는 테스트 DB 에서 진행되며 종료 시 삭제된다.
+"""
+import contextlib
+import math
+import os
+import statistics
+
+import django
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.settings')
+    django.setup()
+
+
+@contextlib.contextmanager
+def bench_database(name='bench.sqlite3'):
+    """
+    측정용 DB 를 생성하고 종료 시 삭제한다.
+    SQLite 는 여러 스레드에서 접근할 수 있도록 메모리 DB 대신 파일 DB 를 사용한다.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    if connection.vendor == 'sqlite':
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = name
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    index = max(0, math.ceil(len(ordered) * p / 100) - 1)
+    return ordered[index]
+
+
+def summarize(samples, elapsed):
+    """
+    :param samples: 요청별 소요 시간 (초)
+    :param elapsed: 전체 측정 시간 (초)
+    """
+    return {
+        'count': len(samples),
+        'throughput': round(len(samples) / elapsed, 2) if elapsed else 0,
+        'mean_ms': round(statistics.mean(samples) * 1000, 3),
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3)
+    }
+
+
+def print_summary(title, summary):
+    print(f"{title:<32} n={summary['count']:<6} {summary['throughput']:>9} req/s  "
+          f"mean={summary['mean_ms']}ms  p50={summary['p50_ms']}ms  "
+          f"p95={summary['p95_ms']}ms  p99={summary['p99_ms']}ms")
@@ -0,0 +1,386 @@
+"""
+/api/v2/ 전체 route 벤치마크
+
+    python -m benchmarks.api --requests 200 --concurrency 16 --output before.json
+    python -m benchmarks.api --requests 200 --concurrency 16 --compare before.json
+
+측정용 DB 에 합성 데이터를 만든 뒤 ASGI application 을 프로세스 내부에서 직접 호출해
+route 별 처리량과 p50/p95/p99 를 측정한다. (네트워크, 서버 프로세스 비용은 제외된다)
+결과는 JSON 으로 저장하며 --compare 로 이전 결과와 비교할 수 있다.
+비밀번호 해시 비용이 다른 비용을 가리지 않도록 MD5 hasher 로 측정한다.
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import platform
+import re
+import subprocess
+import time
+
+import orjson
+
+from benchmarks import setup, bench_database, summarize, print_summary
+
+setup()
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test.client import encode_multipart, BOUNDARY, MULTIPART_CONTENT  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from oauth2_provider.models import AccessToken  # noqa: E402
+
+from account.models import Member, CertificateCode  # noqa: E402
+from account.search import get_member_search  # noqa: E402
+from benchmarks.synthetic import create_members, create_rooms, create_coupons, create_tokens  # noqa: E402
+from coupon.models import Coupon  # noqa: E402
+from room.models import Room, RoomConfig  # noqa: E402
+from settings.api import api  # noqa: E402
+
+USERNAME = 'bench@ctudy.com'
+PASSWORD = 'bench-password'
+TOKEN = 'bench-access-token'
+CERTIFICATE_KEY = 'BENCH0'
+
+
+def api_routes():
+    """
+    ninja 에 등록된 (method, route) 목록
+    """
+    return sorted(
+        (method, re.sub('/+', '/', f'/api/v2/{prefix}{path}'))
+        for prefix, router in api._routers
+        for path, path_view in router.path_operations.items()
+        for operation in path_view.operations
+        for method in operation.methods
+    )
+
+
+class Endpoint:
+    """
+    :param request: 요청 번호를 받아 path, query, json/form, token 을 돌려주는 함수
+    :param write: 데이터를 변경하는 API 인지 여부 (기본값은 GET 이 아닌 API)
+    """
+    def __init__(self, method, route, request, write=None):
+        self.method = method
+        self.route = route
+        self.request = request
+        self.write = method != 'GET' if write is None else write
+
+    @property
+    def name(self):
+        return f'{self.method} {self.route}'
+
+
+def create_data(args, pool_size):
+    """
+    합성 데이터와 벤치마크 사용자를 만들고 Endpoint 가 사용할 id 를 돌려준다.
+    pool_size 는 한 번만 호출할 수 있는 API(logout, withdraw, 인증번호 확인) 용 데이터 수
+    """
+    create_members(args.members, password=PASSWORD)
+    member_ids = list(Member.objects.order_by('id').values_list('id', flat=True))
+    rooms = create_rooms(member_ids, args.rooms)
+    create_coupons(rooms, args.coupons)
+
+    user = Member.objects.create_user(username=USERNAME, email=USERNAME, password=PASSWORD, name='bench')
+    AccessToken.objects.create(user=user, token=TOKEN, scope='read write',
+                               expires=datetime.datetime.now() + datetime.timedelta(days=1))
+
+    # 방장인 스터디룸 (조회, 수정, 멤버 초대/삭제, 쿠폰)
+    room_member_ids = member_ids[:args.room_members]
+    master_room = Room.objects.create(name='벤치마크 스터디')
+    RoomConfig.objects.create(room=master_room, master=user)
+    master_room.members.add(*room_member_ids)
+    create_coupons([(master_room.id, [user.id, *room_member_ids])], args.room_members * 5, seed=1)
+    deleted_room = Room.objects.create(name='삭제할 스터디')
+    RoomConfig.objects.create(room=deleted_room, master=user)
+
+    # 멤버로 참여한 스터디룸 (목록, 나가기)
+    for room_id, _ in rooms[:args.joined_rooms]:
+        Room.objects.get(id=room_id).members.add(user)
+    joined_room_id = rooms[0][0]
+
+    # 한 번만 호출할 수 있는 API 용 회원과 인증번호
+    last_id = member_ids[-1]
+    create_members(pool_size * 2, prefix='disposable', start=last_id, password=PASSWORD)
+    disposable_ids = list(Member.objects.filter(email__startswith='disposable').order_by('id')
+                          .values_list('id', flat=True))
+    create_tokens(disposable_ids, prefix='bench-disposable')
+    get_member_search().rebuild()
+
+    expire = datetime.datetime.now() + datetime.timedelta(hours=1)
+    CertificateCode.objects.bulk_create(
+        [CertificateCode(member=user, code=f'{i:06d}', key=f'K{i:05d}', expire=expire) for i in range(pool_size)] +
+        [CertificateCode(member=user, code='CHECKD', key=CERTIFICATE_KEY, expire=expire, is_checked=True)]
+    )
+
+    return {
+        'user': user,
+        'member_ids': room_member_ids,
+        'master_room_id': master_room.id,
+        'deleted_room_id': deleted_room.id,
+        'joined_room_id': joined_room_id,
+        'logout_ids': disposable_ids[:pool_size],
+        'withdraw_ids': disposable_ids[pool_size:],
+        # 멤버 삭제 API 가 삭제하는 쿠폰은 제외한다
+        'coupon_ids': list(Coupon.objects.filter(room_id=master_room.id).exclude(receiver_id=room_member_ids[-1])
+                           .values_list('id', flat=True)),
+    }
+
+
+def endpoints(data):
+    user = data['user']
+    room_id = data['master_room_id']
+    member_ids = data['member_ids']
+    coupon_ids = data['coupon_ids']
+    today = str(datetime.date.today())
+
+    def coupon_payload(i):
+        return {'name': '쿠폰', 'room_id': room_id, 'start_date': today, 'end_date': today,
+                'receiver_id': member_ids[i % len(member_ids)]}
+
+    return [
+        Endpoint('GET', '/api/v2/health/', lambda i: {'path': '/api/v2/health/', 'token': None}),
+
+        # Account
+        Endpoint('POST', '/api/v2/account/signin/', lambda i: {
+            'path': '/api/v2/account/signin/', 'json': {'username': USERNAME, 'password': PASSWORD}, 'token': None}),
+        Endpoint('GET', '/api/v2/account/signup/', lambda i: {
+            'path': '/api/v2/account/signup/', 'query': {'username': f'new{i}@ctudy.com'}, 'token': None}),
+        Endpoint('POST', '/api/v2/account/signup/', lambda i: {
+            'path': '/api/v2/account/signup/', 'token': None,
+            'form': {'username': f'signup{i}@ctudy.com', 'email': f'signup{i}@ctudy.com',
+                     'password': PASSWORD, 'name': '가입'}}),
+        Endpoint('GET', '/api/v2/account/logout/', lambda i: {
+            'path': '/api/v2/account/logout/', 'token': f"bench-disposable-{data['logout_ids'][i]}"}, write=True),
+        Endpoint('DELETE', '/api/v2/account/withdraw/', lambda i: {
+            'path': '/api/v2/account/withdraw/', 'token': f"bench-disposable-{data['withdraw_ids'][i]}"}),
+        Endpoint('GET', '/api/v2/account/profile/', lambda i: {'path': '/api/v2/account/profile/'}),
+        Endpoint('PUT', '/api/v2/account/profile/', lambda i: {
+            'path': '/api/v2/account/profile/', 'json': {'name': f'bench{i}'}}),
+        Endpoint('POST', '/api/v2/account/profile/', lambda i: {'path': '/api/v2/account/profile/', 'form': {}}),
+        Endpoint('PUT', '/api/v2/account/password/', lambda i: {
+            'path': '/api/v2/account/password/', 'json': {'password': PASSWORD, 'new_password': PASSWORD}}),
+        Endpoint('POST', '/api/v2/account/findid/', lambda i: {
+            'path': '/api/v2/account/findid/', 'json': {'email': user.email}, 'token': None}),
+        # findpw 는 발급된 인증번호를 모두 사용 처리하므로 인증번호 확인을 먼저 측정한다
+        Endpoint('POST', '/api/v2/account/findpw/certificate/', lambda i: {
+            'path': '/api/v2/account/findpw/certificate/', 'token': None,
+            'json': {'username': USERNAME, 'email': user.email, 'code': f'{i:06d}'}}),
+        Endpoint('POST', '/api/v2/account/findpw/', lambda i: {
+            'path': '/api/v2/account/findpw/', 'json': {'username': USERNAME, 'email': user.email}, 'token': None}),
+        Endpoint('POST', '/api/v2/account/findpw/reset/', lambda i: {
+            'path': '/api/v2/account/findpw/reset/', 'token': None,
+            'json': {'username': USERNAME, 'email': user.email, 'key': CERTIFICATE_KEY, 'new_password': PASSWORD}}),
+
+        # Room
+        Endpoint('GET', '/api/v2/study/room/', lambda i: {'path': '/api/v2/study/room/'}),
+        Endpoint('POST', '/api/v2/study/room/', lambda i: {
+            'path': '/api/v2/study/room/',
+            'form': {'payload': orjson.dumps({'name': f'스터디 {i}', 'member_list': member_ids[:5]}).decode()}}),
+        Endpoint('GET', '/api/v2/study/room/{room_id}', lambda i: {'path': f'/api/v2/study/room/{room_id}'}),
+        Endpoint('PUT', '/api/v2/study/room/{room_id}', lambda i: {
+            'path': f'/api/v2/study/room/{room_id}', 'json': {'name': f'벤치마크 스터디 {i}'}}),
+        Endpoint('DELETE', '/api/v2/study/room/{room_id}', lambda i: {
+            'path': f"/api/v2/study/room/{data['deleted_room_id']}"}),
+        Endpoint('DELETE', '/api/v2/study/room/{room_id}/member/{member_id}', lambda i: {
+            'path': f"/api/v2/study/room/{data['joined_room_id']}/member/{user.id}"}),
+        Endpoint('POST', '/api/v2/study/room/banner/{room_id}', lambda i: {
+            'path': f'/api/v2/study/room/banner/{room_id}', 'form': {}}),
+
+        # Member
+        Endpoint('GET', '/api/v2/study/room/member/', lambda i: {
+            'path': '/api/v2/study/room/member/', 'query': {'search': 'ctudy', 'room_id': room_id}}),
+        Endpoint('POST', '/api/v2/study/room/member/{room_id}', lambda i: {
+            'path': f'/api/v2/study/room/member/{room_id}', 'json': {'member_list': member_ids[-5:]}}),
+        Endpoint('DELETE', '/api/v2/study/room/member/{room_id}', lambda i: {
+            'path': f'/api/v2/study/room/member/{room_id}', 'json': {'member_list': [member_ids[-1]]}}),
+
+        # Coupon
+        Endpoint('GET', '/api/v2/coupon/', lambda i: {'path': '/api/v2/coupon/', 'query': {'room_id': room_id}}),
+        Endpoint('POST', '/api/v2/coupon/', lambda i: {
+            'path': '/api/v2/coupon/', 'form': {'payload': orjson.dumps(coupon_payload(i)).decode()}}),
+        Endpoint('POST', '/api/v2/coupon/bulk', lambda i: {
+            'path': '/api/v2/coupon/bulk',
+            'form': {'name': '쿠폰', 'room_id': room_id, 'start_date': today, 'end_date': today,
+                     'receiver_list': member_ids[:10]}}),
+        Endpoint('DELETE', '/api/v2/coupon/{coupon_id}', lambda i: {
+            'path': f'/api/v2/coupon/{coupon_ids[i % len(coupon_ids)]}'}),
+    ]
+
+
+def build_scope(request):
+    """
+    ASGI http scope 와 요청 body
+    """
+    headers = []
+    token = request.get('token', TOKEN)
+    if token is not None:
+        headers.append((b'authorization', f'Bearer {token}'.encode()))
+    body = b''
+    if 'json' in request:
+        body = orjson.dumps(request['json'])
+        headers.append((b'content-type', b'application/json'))
+    elif 'form' in request:
+        body = encode_multipart(BOUNDARY, request['form'])
+        headers.append((b'content-type', MULTIPART_CONTENT.encode()))
+    headers.append((b'content-length', str(len(body)).encode()))
+
+    query = request.get('query', {})
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': request['method'],
+        'scheme': 'http',
+        'path': request['path'],
+        'raw_path': request['path'].encode(),
+        'query_string': '&'.join(f'{key}={value}' for key, value in query.items()).encode(),
+        'root_path': '',
+        'headers': headers,
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    return scope, body
+
+
+async def call(app, scope, body):
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    status = 0
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(app, endpoint, indexes, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+    errors = {}
+
+    async def run(i):
+        scope, body = build_scope({'method': endpoint.method, **endpoint.request(i)})
+        async with semaphore:
+            start = time.perf_counter()
+            status = await call(app, scope, body)
+            elapsed = time.perf_counter() - start
+        if status >= 400:
+            errors[status] = errors.get(status, 0) + 1
+        else:
+            samples.append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(i) for i in indexes))
+    return samples, errors, time.perf_counter() - start
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, path):
+    with open(path, 'rb') as f:
+        before = orjson.loads(f.read())['results']
+    print(f'\ncompared with {path}')
+    for name, summary in results.items():
+        if not summary.get('count') or not before.get(name, {}).get('count'):
+            continue
+        old = before[name]
+        print(f"{name:<56} " + '  '.join(
+            f"{key}={summary[key] - old[key]:+.3f}ms ({(summary[key] / old[key] - 1) * 100 if old[key] else 0:+.1f}%)"
+            for key in ('p50_ms', 'p95_ms', 'p99_ms')
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='route 별 요청 수')
+    parser.add_argument('--warmup', type=int, default=20, help='route 별 측정 전 요청 수')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--members', type=int, default=5000)
+    parser.add_argument('--rooms', type=int, default=500)
+    parser.add_argument('--coupons', type=int, default=50000)
+    parser.add_argument('--room-members', type=int, default=30, help='벤치마크 사용자가 방장인 스터디룸 인원')
+    parser.add_argument('--joined-rooms', type=int, default=20, help='벤치마크 사용자가 참여한 스터디룸 수')
+    parser.add_argument('--only', type=str, default=None, help='측정할 route 정규식 (예: "GET .*/room/")')
+    parser.add_argument('--output', type=str, default=None, help='결과 JSON 경로')
+    parser.add_argument('--compare', type=str, default=None, help='비교할 이전 결과 JSON 경로')
+    args = parser.parse_args()
+
+    pool_size = args.warmup + args.requests
+    hashers = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    with override_settings(PASSWORD_HASHERS=hashers, DEBUG=False), bench_database():
+        start = time.perf_counter()
+        data = create_data(args, pool_size)
+        print(f'data generated in {time.perf_counter() - start:.1f}s')
+        connections.close_all()
+
+        endpoint_list = endpoints(data)
+        missing = set(api_routes()) - {(endpoint.method, endpoint.route) for endpoint in endpoint_list}
+        for method, route in sorted(missing):
+            print(f'warning: {method} {route} is not benchmarked')
+        if args.only:
+            endpoint_list = [endpoint for endpoint in endpoint_list if re.search(args.only, endpoint.name)]
+
+        # SQLite 는 동시에 하나의 connection 만 쓸 수 있어 변경 API 를 동시에 호출하면 database is locked 가 발생한다
+        write_concurrency = 1 if connection.vendor == 'sqlite' else args.concurrency
+        if write_concurrency != args.concurrency:
+            print('sqlite: 변경 API 는 concurrency=1 로 측정한다')
+
+        app = get_asgi_application()
+        loop = asyncio.new_event_loop()
+        results = {}
+        try:
+            for endpoint in endpoint_list:
+                concurrency = write_concurrency if endpoint.write else args.concurrency
+                loop.run_until_complete(measure(app, endpoint, range(args.warmup), concurrency))
+                samples, errors, elapsed = loop.run_until_complete(
+                    measure(app, endpoint, range(args.warmup, pool_size), concurrency)
+                )
+                summary = summarize(samples, elapsed) if samples else {'count': 0}
+                summary['concurrency'] = concurrency
+                summary['errors'] = {str(status): count for status, count in errors.items()}
+                results[endpoint.name] = summary
+                if samples:
+                    print_summary(endpoint.name, summary)
+                if errors:
+                    print(f'  {sum(errors.values())} request(s) failed: {errors}')
+        finally:
+            loop.close()
+            connections.close_all()
+
+    output = {
+        'meta': {
+            'time': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'cpu_count': os.cpu_count(),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'wb') as f:
+            f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+        print(f'results saved to {args.output}')
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+"""
+벤치마크 서버용 ASGI application
+
+settings.asgi 와 같지만 BENCH_DATABASE 로 지정한 측정용 SQLite DB 를 사용한다.
+    BENCH_DATABASE=bench.sqlite3 gunicorn benchmarks.asgi:application -k uvicorn.workers.UvicornWorker -w 8
+"""
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.settings')
+
+from django.conf import settings  # noqa: E402
+
+settings.DATABASES['default']['NAME'] = os.environ['BENCH_DATABASE']
+settings.DEBUG = False
+
+from django.core.asgi import get_asgi_application  # noqa: E402
+
+application = get_asgi_application()
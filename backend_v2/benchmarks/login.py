@@ -0,0 +1,86 @@
+"""
+로그인 토큰 발급 벤치마크: 프로세스 내부 발급 vs TOKEN_URL HTTP loopback
+
+    python -m benchmarks.login --requests 200 --concurrency 8
+
+loopback 경로는 LiveServerThread 로 띄운 서버의 /api/v2/o/token/ 을 호출한다.
+비밀번호 해시 비용이 전송 비용을 가리지 않도록 MD5 hasher 로 측정한다.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import setup, bench_database, summarize, print_summary
+
+setup()
+
+import requests  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test.testcases import LiveServerThread, _StaticFilesHandler  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from account.models import Member  # noqa: E402
+from account.oauth import get_application, issue_token  # noqa: E402
+
+USERNAME = 'bench@ctudy.com'
+PASSWORD = 'bench-password'
+
+
+def measure(func, total, concurrency):
+    def call(_):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+    def close_connection(_):
+        connections.close_all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(call, range(total)))
+        list(executor.map(close_connection, range(concurrency)))
+    return summarize(samples, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']), bench_database():
+        Member.objects.create_user(username=USERNAME, email=USERNAME, password=PASSWORD, name='bench')
+        app = get_application()
+
+        server = LiveServerThread('localhost', _StaticFilesHandler)
+        server.daemon = True
+        server.start()
+        server.is_ready.wait()
+        if server.error:
+            raise server.error
+        token_url = f'http://localhost:{server.port}/api/v2/o/token/'
+        session = requests.Session()
+
+        def loopback():
+            response = session.post(url=token_url, data={
+                'client_id': app.client_id,
+                'client_secret': app.client_secret,
+                'grant_type': app.authorization_grant_type,
+                'username': USERNAME,
+                'password': PASSWORD
+            })
+            response.raise_for_status()
+
+        def in_process():
+            issue_token(USERNAME, PASSWORD)
+
+        try:
+            print_summary('loopback (HTTP TOKEN_URL)', measure(loopback, args.requests, args.concurrency))
+            print_summary('in-process (OAuthLibCore)', measure(in_process, args.requests, args.concurrency))
+        finally:
+            server.terminate()
+            connections.close_all()
+
+
+if __name__ == '__main__':
+    main()
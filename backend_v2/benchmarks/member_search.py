@@ -0,0 +1,106 @@
+"""
+회원 검색 (list_member) 벤치마크
+
+    python -m benchmarks.member_search --members 1000000 --searches 200
+    python -m benchmarks.member_search --members 100000 --room-sizes 0,100,1000,10000
+
+합성 회원을 생성한 뒤 DB 에 맞는 검색 백엔드(pg_trgm / FTS5)와
+기존 LIKE 검색으로 list_member 첫 페이지(COUNT + 20건)를 조회한다.
+--room-sizes 를 주면 해당 인원의 스터디 룸을 만들고 room_id 를 넘겨
+/api/v2/study/room/member/ 를 호출해 룸 인원에 따른 검색 시간을 비교한다.
+"""
+import argparse
+import datetime
+import random
+import time
+
+from benchmarks import setup, bench_database, summarize, print_summary
+
+setup()
+
+from django.core.paginator import Paginator  # noqa: E402
+from django.test import Client  # noqa: E402
+from oauth2_provider.models import AccessToken  # noqa: E402
+
+from account.models import Member  # noqa: E402
+from account.search import MemberSearch, get_member_search  # noqa: E402
+from benchmarks.synthetic import create_members  # noqa: E402
+from room.models import Room, RoomConfig  # noqa: E402
+
+PAGE_SIZE = 20
+
+
+def keywords(count, seed=1):
+    rng = random.Random(seed)
+    names = list(Member.objects.order_by('?').values_list('name', 'username')[:count])
+    result = []
+    for name, username in names:
+        if rng.random() < 0.5:
+            result.append(name[rng.randint(0, 1):])
+        else:
+            local = username.split('@')[0]
+            start = rng.randint(0, len(local) - 4)
+            result.append(local[start:start + 4])
+    return result
+
+
+def measure(backend, search_keywords):
+    samples = []
+    start = time.perf_counter()
+    for keyword in search_keywords:
+        begin = time.perf_counter()
+        page = Paginator(backend.search(keyword, Member.objects.all()), PAGE_SIZE).page(1)
+        page.paginator.count
+        list(page)
+        samples.append(time.perf_counter() - begin)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def measure_room_exclusion(room_size, search_keywords):
+    master = Member.objects.order_by('-id').first()
+    room = Room.objects.create(name=f'bench {room_size}')
+    RoomConfig.objects.create(room=room, master=master)
+    member_ids = Member.objects.exclude(id=master.id).order_by('?').values_list('id', flat=True)[:room_size]
+    Room.members.through.objects.bulk_create(
+        [Room.members.through(room_id=room.id, member_id=member_id) for member_id in member_ids],
+        batch_size=10000
+    )
+    token = AccessToken.objects.create(user=master, token=f'bench-{room.id}', scope='read write',
+                                       expires=datetime.datetime.now() + datetime.timedelta(hours=1))
+
+    client = Client(HTTP_AUTHORIZATION=f'Bearer {token.token}')
+    samples = []
+    start = time.perf_counter()
+    for keyword in search_keywords:
+        begin = time.perf_counter()
+        response = client.get('/api/v2/study/room/member/', {'search': keyword, 'room_id': room.id})
+        samples.append(time.perf_counter() - begin)
+        assert response.status_code == 200, response.content
+    return summarize(samples, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--members', type=int, default=1000000)
+    parser.add_argument('--searches', type=int, default=200)
+    parser.add_argument('--room-sizes', type=str, default=None, help='쉼표로 구분한 룸 인원 수 (예: 0,100,1000)')
+    args = parser.parse_args()
+
+    with bench_database():
+        start = time.perf_counter()
+        create_members(args.members)
+        backend = get_member_search()
+        backend.rebuild()
+        print(f'{args.members} members generated in {time.perf_counter() - start:.1f}s')
+
+        search_keywords = keywords(args.searches)
+        print_summary(f'{type(backend).__name__}', measure(backend, search_keywords))
+        print_summary('MemberSearch (LIKE)', measure(MemberSearch(), search_keywords))
+
+        if args.room_sizes:
+            for room_size in [int(size) for size in args.room_sizes.split(',')]:
+                print_summary(f'list_member room_size={room_size}', measure_room_exclusion(room_size, search_keywords))
+
+
+if __name__ == '__main__':
+    main()
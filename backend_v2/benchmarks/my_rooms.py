@@ -0,0 +1,98 @@
+"""
+내 스터디룸 id 조회 (list_room 의 load_room_ids) 벤치마크
+
+    python -m benchmarks.my_rooms --members 100000 --rooms 50000 --lookups 2000
+
+합성 회원, 스터디룸을 생성한 뒤 기존 OR + DISTINCT 조회, room.membership.member_room_ids 의 UNION 조회와
+list_room 이 사용하는 UserRoom 조회를 같은 회원들로 측정하고 실행 계획을 출력한다.
+--without-indexes 를 주면 0004_room_indexes 의 인덱스를 지운 뒤 측정한다.
+"""
+import argparse
+import random
+import time
+
+from benchmarks import setup, bench_database, summarize, print_summary
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Q  # noqa: E402
+
+from account.models import Member  # noqa: E402
+from benchmarks.synthetic import create_members, create_rooms  # noqa: E402
+from room.membership import member_room_ids  # noqa: E402
+from room.models import Room, UserRoom  # noqa: E402
+
+INDEXES = ('roomconfig_master_room_idx', 'room_members_member_room_idx')
+
+
+def or_distinct(member_id):
+    return Room.objects.filter(Q(members=member_id) | Q(roomconfig__master_id=member_id), is_deleted=False) \
+        .values_list('id', flat=True).distinct()
+
+
+def union(member_id):
+    return Room.objects.filter(id__in=member_room_ids(member_id), is_deleted=False).values_list('id', flat=True)
+
+
+def user_room(member_id):
+    return UserRoom.objects.filter(user_id=member_id).values_list('room_id', flat=True)
+
+
+def explain(queryset):
+    with connection.cursor() as cursor:
+        sql, params = queryset.query.sql_with_params()
+        prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+        cursor.execute(f'{prefix} {sql}', params)
+        return '\n'.join(f'    {row[-1]}' for row in cursor.fetchall())
+
+
+def measure(query, member_ids):
+    samples = []
+    start = time.perf_counter()
+    for member_id in member_ids:
+        begin = time.perf_counter()
+        sorted(query(member_id))
+        samples.append(time.perf_counter() - begin)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--members', type=int, default=100000)
+    parser.add_argument('--rooms', type=int, default=50000)
+    parser.add_argument('--deleted-ratio', type=float, default=0.3, help='삭제된 스터디룸 비율')
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--without-indexes', action='store_true')
+    args = parser.parse_args()
+
+    with bench_database():
+        start = time.perf_counter()
+        create_members(args.members)
+        member_ids = list(Member.objects.values_list('id', flat=True))
+        rooms = create_rooms(member_ids, args.rooms)
+        rng = random.Random(0)
+        deleted = [room_id for room_id, _ in rooms if rng.random() < args.deleted_ratio]
+        for offset in range(0, len(deleted), 500):
+            Room.objects.filter(id__in=deleted[offset:offset + 500]).update(is_deleted=True)
+            UserRoom.objects.filter(room_id__in=deleted[offset:offset + 500]).delete()
+        if args.without_indexes:
+            with connection.cursor() as cursor:
+                for index in INDEXES:
+                    cursor.execute(f'DROP INDEX IF EXISTS {index}')
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        print(f'{args.members} members, {args.rooms} rooms generated in {time.perf_counter() - start:.1f}s')
+
+        lookups = rng.choices(member_ids, k=args.lookups)
+        for member_id in lookups[:100]:
+            assert sorted(or_distinct(member_id)) == sorted(union(member_id)) == sorted(user_room(member_id))
+
+        for title, query in (('OR + DISTINCT', or_distinct), ('UNION', union), ('UserRoom', user_room)):
+            print(f'{title} plan:\n{explain(query(lookups[0]))}')
+            print_summary(title, measure(query, lookups))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+조회 API 부하 측정: gunicorn + UvicornWorker (server.sh 와 같은 구성)
+
+    python -m benchmarks.read_views --workers 8 --requests 1000 --concurrency 32
+
+측정용 DB 에 스터디룸, 멤버, 쿠폰을 만든 뒤 조회 API 를 동시에 호출한다.
+다른 구현과 비교하려면 비교할 커밋에서 같은 명령을 실행한다.
+"""
+import argparse
+import datetime
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import setup, bench_database, summarize, print_summary
+
+setup()
+
+import requests  # noqa: E402
+from django.db import connection  # noqa: E402
+from oauth2_provider.models import AccessToken  # noqa: E402
+
+from account.models import Member  # noqa: E402
+from benchmarks.synthetic import create_members  # noqa: E402
+from coupon.counters import add_coupons  # noqa: E402
+from coupon.models import Coupon  # noqa: E402
+from room.models import Room, RoomConfig, UserRoom  # noqa: E402
+
+TOKEN = 'bench-access-token'
+
+
+def create_data(rooms, members_per_room, coupons_per_member):
+    create_members(rooms * members_per_room)
+    user = Member.objects.create_user(username='bench@ctudy.com', email='bench@ctudy.com', password='bench', name='bench')
+    AccessToken.objects.create(user=user, token=TOKEN, scope='read write',
+                               expires=datetime.datetime.now() + datetime.timedelta(days=1))
+
+    member_ids = list(Member.objects.exclude(id=user.id).values_list('id', flat=True))
+    room_list = Room.objects.bulk_create([Room(name=f'스터디 {i}') for i in range(rooms)])
+    RoomConfig.objects.bulk_create([RoomConfig(room=room, master=user) for room in room_list])
+    UserRoom.objects.bulk_create([UserRoom(room=room, user=user, role=UserRoom.MASTER) for room in room_list])
+    today = datetime.date.today()
+    for index, room in enumerate(room_list):
+        room_members = member_ids[index * members_per_room:(index + 1) * members_per_room]
+        room.members.add(*room_members)
+        add_coupons(Coupon.objects.bulk_create([
+            Coupon(name='쿠폰', room=room, sender=user, receiver_id=member_id, start_date=today, end_date=today)
+            for member_id in room_members for _ in range(coupons_per_member)
+        ]))
+    return room_list[0].id
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database, workers):
+    port = free_port()
+    env = {**os.environ, 'BENCH_DATABASE': str(database)}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'benchmarks.asgi:application', '-k', 'uvicorn.workers.UvicornWorker',
+         '-w', str(workers), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'],
+        env=env
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            requests.get(f'{base_url}/api/v2/account/signup/', params={'username': 'ready'}, timeout=1)
+            return server, base_url
+        except requests.RequestException:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError('benchmark server did not start')
+
+
+def measure(url, total, concurrency):
+    local = threading.local()
+
+    def call(_):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+            local.session.headers['Authorization'] = f'Bearer {TOKEN}'
+        start = time.perf_counter()
+        try:
+            local.session.get(url).raise_for_status()
+        except requests.RequestException:
+            return None
+        return time.perf_counter() - start
+
+    # 워커별 token cache, DB 연결을 채운다
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(concurrency * 2)))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(call, range(total)))
+    elapsed = time.perf_counter() - start
+    errors = samples.count(None)
+    return summarize([sample for sample in samples if sample is not None], elapsed), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--rooms', type=int, default=20)
+    parser.add_argument('--room-members', type=int, default=30)
+    parser.add_argument('--coupons', type=int, default=5, help='멤버별 쿠폰 수')
+    args = parser.parse_args()
+
+    with bench_database():
+        room_id = create_data(args.rooms, args.room_members, args.coupons)
+        database = connection.settings_dict['NAME']
+        connection.close()
+
+        server, base_url = start_server(database, args.workers)
+        try:
+            print(f'workers={args.workers} concurrency={args.concurrency}')
+            for title, path in (
+                ('account profile', '/api/v2/account/profile/'),
+                ('room list', '/api/v2/study/room/'),
+                ('room detail', f'/api/v2/study/room/{room_id}'),
+                ('coupon list', f'/api/v2/coupon/?room_id={room_id}&max_page=20'),
+                ('member search', f'/api/v2/study/room/member/?search=ctudy&room_id={room_id}&max_page=20'),
+            ):
+                summary, errors = measure(base_url + path, args.requests, args.concurrency)
+                print_summary(title, summary)
+                if errors:
+                    print(f'  {errors} request(s) failed')
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+벤치마크용 합성 데이터 생성
+"""
+import datetime
+import itertools
+import math
+import random
+
+from django.contrib.auth.hashers import make_password
+
+SURNAMES = '김이박최정강조윤장임한오서신권황안송류전홍고문양손배백허유남심노하곽성차주우구민진나지엄채원천방공현함변염여추도소석선설마길연위표명기반왕금옥육인맹제모탁국어은편용'
+SYLLABLES = '가나다라마바사아자차카타파하민서준지현우윤수영진경호성은혜주연상동재희태정훈석철명광용기한유나리비'
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def korean_name(rng):
+    return rng.choice(SURNAMES) + rng.choice(SYLLABLES) + rng.choice(SYLLABLES)
+
+
+def create_members(count, batch_size=10000, seed=0, prefix='member', start=0, password='ctudy'):
+    """
+    bulk_create 로 회원을 생성한다. 비밀번호 해시는 한 번만 계산해 모든 회원이 공유한다.
+    signal 이 발생하지 않으므로 검색 인덱스는 호출하는 쪽에서 다시 만든다.
+    start 는 username, email 에 붙는 번호의 시작값이다.
+    """
+    from account.models import Member
+
+    rng = random.Random(seed)
+    password = make_password(password)
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        Member.objects.bulk_create([
+            Member(username='{}{}@ctudy.com'.format(''.join(rng.choices(LETTERS, k=8)), start + created + i),
+                   email='{}{}@ctudy.com'.format(prefix, start + created + i),
+                   name=korean_name(rng),
+                   password=password)
+            for i in range(size)
+        ], batch_size=size)
+        created += size
+    return created
+
+
+def room_sizes(count, mean=10, max_size=200, seed=0):
+    """
+    스터디룸 인원(방장 제외). 대부분 소규모이고 일부만 큰 로그정규분포를 따른다.
+    """
+    rng = random.Random(seed)
+    sigma = 1.0
+    mu = math.log(mean) - sigma ** 2 / 2
+    return [min(max_size, max(1, round(rng.lognormvariate(mu, sigma)))) for _ in range(count)]
+
+
+def create_rooms(member_ids, count, mean_size=10, max_size=200, batch_size=10000, seed=0):
+    """
+    스터디룸, RoomConfig(방장), 스터디룸 멤버와 UserRoom 을 생성한다.
+    :return: [(room_id, [방장 id, 멤버 id...]), ...]
+    """
+    from room.models import Room, RoomConfig, UserRoom
+
+    rng = random.Random(seed)
+    through = Room.members.through
+    rooms = []
+    sizes = room_sizes(count, mean_size, min(max_size, len(member_ids) - 1), seed)
+    for offset in range(0, count, batch_size):
+        batch_sizes = sizes[offset:offset + batch_size]
+        room_list = Room.objects.bulk_create([Room(name=f'스터디 {offset + i}', member_count=size)
+                                              for i, size in enumerate(batch_sizes)], batch_size=batch_size)
+        configs, memberships, user_rooms = [], [], []
+        for room, size in zip(room_list, batch_sizes):
+            master_id, *room_member_ids = rng.sample(member_ids, size + 1)
+            configs.append(RoomConfig(room_id=room.id, master_id=master_id))
+            memberships.extend(through(room_id=room.id, member_id=member_id) for member_id in room_member_ids)
+            user_rooms.append(UserRoom(user_id=master_id, room_id=room.id, role=UserRoom.MASTER))
+            user_rooms.extend(UserRoom(user_id=member_id, room_id=room.id, role=UserRoom.MEMBER)
+                              for member_id in room_member_ids)
+            rooms.append((room.id, [master_id, *room_member_ids]))
+        RoomConfig.objects.bulk_create(configs, batch_size=batch_size)
+        through.objects.bulk_create(memberships, batch_size=batch_size)
+        UserRoom.objects.bulk_create(user_rooms, batch_size=batch_size)
+    return rooms
+
+
+def create_coupons(rooms, count, days=365, used_ratio=0.3, batch_size=10000, seed=0):
+    """
+    스터디룸 인원에 비례해 쿠폰을 나눠 생성한다.
+    시작일은 최근 days 일 안에서, 기간은 0~60일로 정하며 used_ratio 만큼은 사용한 쿠폰으로 만든다.
+    created_date 는 auto_now_add 이므로 생성한 날짜가 된다.
+    """
+    from coupon.models import Coupon
+
+    rng = random.Random(seed)
+    cum_weights = list(itertools.accumulate(len(room_member_ids) for _, room_member_ids in rooms))
+    today = datetime.date.today()
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        coupons = []
+        for room_id, room_member_ids in rng.choices(rooms, cum_weights=cum_weights, k=size):
+            sender_id, receiver_id = rng.sample(room_member_ids, 2)
+            start_date = today - datetime.timedelta(days=rng.randrange(days))
+            end_date = start_date + datetime.timedelta(days=rng.randrange(61))
+            is_use = rng.random() < used_ratio
+            used_date = None
+            if is_use:
+                used_date = start_date + datetime.timedelta(days=rng.randrange((min(end_date, today) - start_date).days + 1))
+            coupons.append(Coupon(name='쿠폰', room_id=room_id, sender_id=sender_id, receiver_id=receiver_id,
+                                  start_date=start_date, end_date=end_date, is_use=is_use, used_date=used_date))
+        Coupon.objects.bulk_create(coupons, batch_size=size)
+        created += size
+    return created
+
+
+def create_tokens(member_ids, prefix='bench-token', expires_days=30, batch_size=10000):
+    """
+    회원별 access token 을 생성한다. token 은 '<prefix>-<member id>' 이다.
+    """
+    from oauth2_provider.models import AccessToken
+
+    expires = datetime.datetime.now() + datetime.timedelta(days=expires_days)
+    AccessToken.objects.bulk_create([
+        AccessToken(user_id=member_id, token=f'{prefix}-{member_id}', expires=expires, scope='read write')
+        for member_id in member_ids
+    ], batch_size=batch_size)
+    return len(member_ids)
@@ -1,47 +1,58 @@
 import datetime
 import logging
+from typing import List
 
+from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
-from ninja import Router, UploadedFile
+from ninja import Router, Form, UploadedFile
+from ninja.pagination import paginate
 
+from account.models import Member
+from coupon.counters import add_coupons, remove_coupon
 from coupon.models import Coupon
-from coupon.schemas import CouponListResponse, CouponCreateIn
+from coupon.schemas import CouponSchema, CouponCreateIn, CouponBulkCreateIn
+from room.cache import invalidate_room_coupons
 
 from settings.auth import AuthBearer, auth_check
 from utils.base import base_api
-from utils.error import error_codes, CtudyException, not_found_error_return
+from utils.db_router import read_only
+from utils.error import error_codes, CtudyException, not_found_error_return, param_error_return
+from utils.pagination import PageNumberPaginationExtra
+from utils.query_budget import query_budget
 from utils.response import ErrorResponseSchema, SuccessResponse
 
 router = Router(tags=['Coupon'])
 logger = logging.getLogger('coupon')
 
 
-@router.get("/", response={200: CouponListResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
-@base_api(logger)
+@router.get("/", response={200: List[CouponSchema], error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(2)
+@base_api(logger, envelope=False)
 @auth_check
+@read_only
+@paginate(PageNumberPaginationExtra, cursor=True, ordering=('-created_date', '-id'))
 def list_coupon(request, room_id: int, mode: str = 'a'):
+    coupon_list = Coupon.objects.select_related('sender', 'receiver').filter(room_id=room_id, is_use=False)
     if mode == 'a':
-        coupon_list = Coupon.objects.filter(Q(sender=request.user) | Q(receiver=request.user),
-                                            room_id=room_id, is_use=False).order_by('-created_date')
+        coupon_list = coupon_list.filter(Q(sender=request.user) | Q(receiver=request.user))
     elif mode == 'r':
         now = datetime.datetime.now().date()
-        coupon_list = Coupon.objects.filter(receiver=request.user,
-                                            start_date__lte=now,
-                                            end_date__gte=now,
-                                            room_id=room_id, is_use=False).order_by('-created_date')
+        coupon_list = coupon_list.filter(receiver=request.user,
+                                         start_date__lte=now,
+                                         end_date__gte=now)
     elif mode == 'rd':
         now = datetime.datetime.now()
-        coupon_list = Coupon.objects.filter(receiver=request.user,
-                                            end_date__lt=now.date(),
-                                            room_id=room_id, is_use=False).order_by('-created_date')
+        coupon_list = coupon_list.filter(receiver=request.user,
+                                         end_date__lt=now.date())
     else:
         raise CtudyException(404, not_found_error_return)
 
-    return list(coupon_list)
+    return 200, coupon_list
 
 
 @router.post("/", response={200: SuccessResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(7)
 @base_api(logger)
 @auth_check
 def create_coupon(request, payload: CouponCreateIn, file: UploadedFile = None):
@@ -50,17 +61,64 @@ def create_coupon(request, payload: CouponCreateIn, file: UploadedFile = None):
         payload_data['image'] = file
     payload_data['sender'] = request.user
 
-    Coupon.objects.create(**payload_data)
+    with transaction.atomic():
+        coupon = Coupon.objects.create(**payload_data)
+        add_coupons([coupon])
+    invalidate_room_coupons(coupon.room_id)
+    return {'success': True}
+
+
+@router.post("/bulk", response={200: SuccessResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(7)
+@base_api(logger)
+@auth_check
+def create_bulk_coupon(request, payload: CouponBulkCreateIn = Form(...), file: UploadedFile = None):
+    payload_data = payload.dict()
+    room_id = payload_data.pop('room_id')
+    receiver_ids = set(payload_data.pop('receiver_list'))
+    if not receiver_ids:
+        raise CtudyException(400, param_error_return)
+
+    # 보내는 사람과 받는 사람이 모두 스터디룸 멤버(방장 포함)인지 한 번에 확인
+    member_ids = set(Member.objects.filter(Q(room__id=room_id, room__is_deleted=False) |
+                                           Q(roomconfig__room_id=room_id, roomconfig__room__is_deleted=False),
+                                           id__in=receiver_ids | {request.user.id})
+                     .values_list('id', flat=True))
+    if member_ids != receiver_ids | {request.user.id}:
+        raise CtudyException(400, param_error_return)
+
+    coupons = [Coupon(**payload_data, room_id=room_id, sender=request.user, receiver_id=receiver_id)
+               for receiver_id in sorted(receiver_ids)]
+    if file is not None:
+        # 이미지는 한 번만 저장하고 모든 쿠폰이 같은 파일을 참조한다
+        coupons[0].image.save(file.name, file, save=False)
+        for coupon in coupons[1:]:
+            coupon.image = coupons[0].image.name
+
+    try:
+        with transaction.atomic():
+            Coupon.objects.bulk_create(coupons)
+            add_coupons(coupons)
+    except Exception:
+        # 쿠폰을 만들지 못하면 먼저 저장한 이미지도 지운다
+        if file is not None:
+            coupons[0].image.delete(save=False)
+        raise
+    invalidate_room_coupons(room_id)
     return {'success': True}
 
 
 @router.delete("/{coupon_id}", response={200: SuccessResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(7)
 @base_api(logger)
 @auth_check
 def use_coupon(request, coupon_id: str):
     coupon = get_object_or_404(Coupon, id=coupon_id)
-    coupon.is_use = True
-    coupon.used_time = datetime.datetime.now()
-    coupon.save()
+    with transaction.atomic():
+        remove_coupon(coupon)
+        coupon.is_use = True
+        coupon.used_time = datetime.datetime.now()
+        coupon.save()
+    invalidate_room_coupons(coupon.room_id)
 
     return {'success': True}
@@ -0,0 +1,139 @@
+"""
+스터디룸 멤버별 사용 가능한 쿠폰 수 (RoomCouponCounter)
+
+사용 가능한 쿠폰(사용하지 않았고 오늘이 기간 안)은 날짜가 바뀌면 달라지므로 카운터는 receiver 별로
+쿠폰 기간(start_date, end_date)마다 나눠 센다. 쿠폰을 발급, 사용, 삭제하면 기간이 끝나지 않은 쿠폰의
+카운터만 F() 로 더하고 빼며, 조회는 오늘이 기간 안인 카운터를 더하기만 하므로 날짜가 바뀌어도 다시
+집계하지 않는다. 기간이 끝난 카운터는 reconcile_counters 가 rebuild 로 정리한다.
+다시 집계하는 동안 더하거나 뺀 값이 사라지거나 두 번 더해지지 않도록 카운터를 바꾸는 쪽은 모두
+같은 트랜잭션 안에서 스터디룸 행을 먼저 잠근다. (lock_rooms)
+"""
+import collections
+import datetime
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from coupon.models import Coupon, RoomCouponCounter
+from room.models import Room
+
+_start_date = Coupon._meta.get_field('start_date')
+_end_date = Coupon._meta.get_field('end_date')
+
+
+def counter_key(coupon):
+    # API 로 생성한 쿠폰은 날짜가 문자열로 남아 있다
+    return (coupon.room_id, coupon.receiver_id,
+            _start_date.to_python(coupon.start_date), _end_date.to_python(coupon.end_date))
+
+
+def is_counted(coupon, today):
+    """
+    카운터에 들어 있는 쿠폰 (사용하지 않았고 기간이 끝나지 않았다)
+    """
+    return not coupon.is_use and _end_date.to_python(coupon.end_date) >= today
+
+
+def lock_rooms(room_ids):
+    """
+    스터디룸 행을 잠근다 (트랜잭션 안에서 호출한다)
+    """
+    list(Room.objects.select_for_update().filter(id__in=room_ids).order_by('id').values_list('id', flat=True))
+
+
+def add_counts(counts):
+    """
+    {(room_id, receiver_id, start_date, end_date): count} 를 카운터에 더한다 (음수면 뺀다)
+    """
+    counts = {key: count for key, count in counts.items() if count}
+    if not counts:
+        return
+    lock_rooms({room_id for room_id, *_ in counts})
+    RoomCouponCounter.objects.bulk_create([
+        RoomCouponCounter(room_id=room_id, receiver_id=receiver_id, start_date=start_date, end_date=end_date)
+        for room_id, receiver_id, start_date, end_date in counts], ignore_conflicts=True)
+    # 더할 수와 기간이 같은 receiver 는 한 번에 갱신한다
+    groups = collections.defaultdict(list)
+    for (room_id, receiver_id, start_date, end_date), count in counts.items():
+        groups[room_id, start_date, end_date, count].append(receiver_id)
+    for (room_id, start_date, end_date, count), receiver_ids in groups.items():
+        RoomCouponCounter.objects.filter(room_id=room_id, receiver_id__in=receiver_ids,
+                                         start_date=start_date, end_date=end_date) \
+            .update(count=F('count') + count)
+
+
+def add_coupons(coupons, today=None):
+    """
+    발급한 쿠폰 중 기간이 끝나지 않은 쿠폰을 receiver 카운터에 더한다 (쿠폰 생성과 같은 트랜잭션에서 호출한다)
+    """
+    today = today or datetime.date.today()
+    add_counts(collections.Counter(counter_key(coupon) for coupon in coupons if is_counted(coupon, today)))
+
+
+def remove_coupon(coupon, today=None):
+    """
+    사용하거나 삭제할 쿠폰을 카운터에서 뺀다 (사용 처리와 같은 트랜잭션에서 먼저 호출한다)
+    """
+    today = today or datetime.date.today()
+    if is_counted(coupon, today):
+        room_id, receiver_id, start_date, end_date = counter_key(coupon)
+        lock_rooms([room_id])
+        RoomCouponCounter.objects.filter(room_id=room_id, receiver_id=receiver_id, start_date=start_date,
+                                         end_date=end_date, count__gt=0) \
+            .update(count=F('count') - 1)
+
+
+def remove_sent_coupons(sender_id, today=None):
+    """
+    회원 탈퇴로 cascade 삭제될, sender 가 보낸 쿠폰을 카운터에서 뺀다
+    """
+    today = today or datetime.date.today()
+    rows = (Coupon.objects.filter(sender_id=sender_id, is_use=False, end_date__gte=today)
+            .values('room_id', 'receiver_id', 'start_date', 'end_date').annotate(count=Count('id')).order_by()
+            .values_list('room_id', 'receiver_id', 'start_date', 'end_date', 'count'))
+    add_counts({(room_id, receiver_id, start_date, end_date): -count
+                for room_id, receiver_id, start_date, end_date, count in rows})
+
+
+def remove_receivers(room_id, receiver_ids):
+    """
+    receiver 들이 받은 스터디룸 쿠폰을 모두 삭제할 때 카운터도 삭제한다 (쿠폰 삭제와 같은 트랜잭션에서 호출한다)
+    """
+    lock_rooms([room_id])
+    RoomCouponCounter.objects.filter(room_id=room_id, receiver_id__in=receiver_ids).delete()
+
+
+def rebuild(room_ids, today=None):
+    """
+    스터디룸들의 카운터를 쿠폰에서 다시 집계하고 기간이 끝난 카운터를 지운다
+    :return: {room_id: {(receiver_id, start_date, end_date): count}}
+    """
+    today = today or datetime.date.today()
+    with transaction.atomic():
+        lock_rooms(room_ids)
+        counts = {room_id: {} for room_id in room_ids}
+        rows = (Coupon.objects.filter(room_id__in=room_ids, is_use=False, end_date__gte=today)
+                .values('room_id', 'receiver_id', 'start_date', 'end_date').annotate(count=Count('id')).order_by()
+                .values_list('room_id', 'receiver_id', 'start_date', 'end_date', 'count'))
+        for room_id, receiver_id, start_date, end_date, count in rows:
+            counts[room_id][receiver_id, start_date, end_date] = count
+
+        RoomCouponCounter.objects.filter(room_id__in=room_ids).delete()
+        RoomCouponCounter.objects.bulk_create([
+            RoomCouponCounter(room_id=room_id, receiver_id=receiver_id, start_date=start_date, end_date=end_date,
+                              count=count)
+            for room_id, buckets in counts.items()
+            for (receiver_id, start_date, end_date), count in buckets.items()
+        ])
+        return counts
+
+
+def room_coupon_counts(room, today=None):
+    """
+    스터디룸 멤버별 사용 가능한 쿠폰 수 {receiver_id: count}
+    """
+    today = today or datetime.date.today()
+    return dict(RoomCouponCounter.objects
+                .filter(room_id=room.id, start_date__lte=today, end_date__gte=today, count__gt=0)
+                .values('receiver_id').annotate(total=Sum('count')).order_by()
+                .values_list('receiver_id', 'total'))
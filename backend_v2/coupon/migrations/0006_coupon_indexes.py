@@ -0,0 +1,25 @@
+# Generated by Django 4.0.7 on 2026-10-18 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coupon', '0005_alter_coupon_created_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coupon',
+            index=models.Index(fields=['room', 'receiver', '-created_date'], name='coupon_room_receiver_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coupon',
+            index=models.Index(condition=models.Q(('is_use', False)), fields=['room', 'receiver', 'end_date', 'start_date'], name='coupon_unused_receiver_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coupon',
+            index=models.Index(condition=models.Q(('is_use', False)), fields=['room', 'sender', '-created_date'], name='coupon_unused_sender_idx'),
+        ),
+    ]
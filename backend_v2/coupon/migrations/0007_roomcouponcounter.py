@@ -0,0 +1,49 @@
+# Generated by Django 4.0.7 on 2026-10-18 19:36
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Coupon = apps.get_model('coupon', 'Coupon')
+    RoomCouponCounter = apps.get_model('coupon', 'RoomCouponCounter')
+    rows = (Coupon.objects.filter(is_use=False, end_date__gte=datetime.date.today())
+            .values('room_id', 'receiver_id', 'start_date', 'end_date').annotate(count=Count('id')).order_by()
+            .values_list('room_id', 'receiver_id', 'start_date', 'end_date', 'count'))
+    RoomCouponCounter.objects.bulk_create([
+        RoomCouponCounter(room_id=room_id, receiver_id=receiver_id, start_date=start_date, end_date=end_date,
+                          count=count)
+        for room_id, receiver_id, start_date, end_date, count in rows.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0003_room_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('coupon', '0006_coupon_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomCouponCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('receiver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='room.room')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='roomcouponcounter',
+            constraint=models.UniqueConstraint(fields=('room', 'receiver', 'start_date', 'end_date'), name='coupon_counter_room_receiver_uniq'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -8,7 +8,7 @@ from room.models import Room
 
 
 def path_and_rename(instance, filename):
-    upload_to = f'public/coupon/{instance.room.id}/'
+    upload_to = f'public/coupon/{instance.room_id}/'
     ext = filename.split('.')[-1]
     # ext = 'png'
     filename = '{}.{}'.format(uuid4().hex, ext)
@@ -26,3 +26,32 @@ class Coupon(models.Model):
     is_use = models.BooleanField(default=False)
     used_date = models.DateField(null=True)
     created_date = models.DateField(auto_created=True, auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # 스터디룸 탈퇴/멤버 삭제 시 (room, receiver) 쿠폰 삭제
+            models.Index(fields=['room', 'receiver', '-created_date'], name='coupon_room_receiver_idx'),
+            # 받은 쿠폰 목록(mode r, rd), 스터디룸 멤버별 사용 가능 쿠폰 수
+            models.Index(fields=['room', 'receiver', 'end_date', 'start_date'], name='coupon_unused_receiver_idx',
+                         condition=models.Q(is_use=False)),
+            # 보낸 쿠폰 목록(mode a)
+            models.Index(fields=['room', 'sender', '-created_date'], name='coupon_unused_sender_idx',
+                         condition=models.Q(is_use=False)),
+        ]
+
+
+class RoomCouponCounter(models.Model):
+    """
+    스터디룸 멤버(receiver)별, 쿠폰 기간별 사용하지 않은 쿠폰 수 (coupon.counters 참고)
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    receiver = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='+')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'receiver', 'start_date', 'end_date'],
+                                    name='coupon_counter_room_receiver_uniq'),
+        ]
@@ -4,7 +4,6 @@ from ninja import Schema, ModelSchema
 
 from account.schemas import MemberSchema
 from coupon.models import Coupon
-from utils.response import ResponseSchema
 
 
 # Core Schema
@@ -32,6 +31,9 @@ class CouponCreateIn(Schema):
     end_date: str
 
 
-# Out Schema
-class CouponListResponse(ResponseSchema):
-    response: List[CouponSchema]
+class CouponBulkCreateIn(Schema):
+    name: str
+    room_id: int
+    receiver_list: List[int]
+    start_date: str
+    end_date: str
@@ -0,0 +1,129 @@
+import datetime
+import os
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from test_plus.test import TestCase
+
+from account.models import Member
+from coupon.models import Coupon, RoomCouponCounter
+from room.models import Room, RoomConfig
+from utils.error import server_error_return
+from utils.testing import QueryBudgetMixin, auth_headers
+
+
+# noinspection SpellCheckingInspection
+class CouponApiTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.사용자 = Member.objects.create_user(username='user@ctudy.com', email='user@test', password='test')
+        self.멤버 = Member.objects.create_user(username='member@ctudy.com', email='member@test', password='test')
+        self.headers = auth_headers(self.사용자)
+        self.room = Room.objects.create(name='스터디')
+        self.today = datetime.date.today()
+
+    def create_coupons(self, count, **kwargs):
+        data = {'name': '쿠폰', 'room': self.room, 'sender': self.멤버, 'receiver': self.사용자,
+                'start_date': self.today, 'end_date': self.today, **kwargs}
+        return Coupon.objects.bulk_create([Coupon(**data) for _ in range(count)])
+
+    def list_coupon(self, **params):
+        res = self.client.get(path='/api/v2/coupon/', data={'room_id': self.room.id, **params}, **self.headers)
+        self.assertEqual(res.status_code, 200)
+        return res.json()['response']
+
+    def test_cursor_로_쿠폰_목록을_조회한다(self):
+        coupons = self.create_coupons(25)
+        self.create_coupons(5, sender=self.사용자, receiver=self.멤버)
+        self.create_coupons(3, is_use=True)
+
+        ids, cursor = [], None
+        while True:
+            result = self.list_coupon(max_page=10, **({'cursor': cursor} if cursor else {}))
+            ids.extend(coupon['id'] for coupon in result['items'])
+            cursor = result['next']
+            if cursor is None:
+                break
+
+        self.assertEqual(len(ids), 30)
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertIn(coupons[0].id, ids)
+
+    def test_쿠폰_목록_mode_별로_조회한다(self):
+        self.create_coupons(2)
+        self.create_coupons(1, sender=self.사용자, receiver=self.멤버)
+        self.create_coupons(1, start_date=self.today - datetime.timedelta(days=2),
+                            end_date=self.today - datetime.timedelta(days=1))
+
+        self.assertEqual(len(self.list_coupon(mode='a')['items']), 4)
+        self.assertEqual(len(self.list_coupon(mode='r')['items']), 2)
+        self.assertEqual(len(self.list_coupon(mode='rd')['items']), 1)
+        res = self.client.get(path='/api/v2/coupon/', data={'room_id': self.room.id, 'mode': 'x'}, **self.headers)
+        self.assertEqual(res.status_code, 404)
+
+    def test_쿠폰_목록_조회_오류는_로그를_남기고_500_을_응답한다(self):
+        with mock.patch('coupon.apis.coupon_api.Coupon.objects.select_related', side_effect=RuntimeError('db')), \
+                self.assertLogs('coupon', level='ERROR') as logs:
+            res = self.client.get(path='/api/v2/coupon/', data={'room_id': self.room.id}, **self.headers)
+        self.assertEqual(res.status_code, 500)
+        self.assertEqual(res.json(), server_error_return)
+        self.assertIn('db', logs.output[0])
+
+    def test_쿠폰_수와_무관하게_쿼리_수가_일정하다(self):
+        self.create_coupons(50)
+        self.list_coupon()
+
+        # sender, receiver 를 join 한 페이지 조회
+        with self.assertNumQueries(1):
+            result = self.list_coupon(max_page=50)
+        self.assertEqual(len(result['items']), 50)
+        self.assertEqual(result['items'][0]['sender']['username'], 'member@ctudy.com')
+
+    def test_여러_멤버에게_쿠폰을_한번에_발급한다(self):
+        RoomConfig.objects.create(room=self.room, master=self.사용자)
+        멤버들 = Member.objects.bulk_create([Member(username=f'member{i}', email=f'member{i}@test') for i in range(10)])
+        self.room.members.add(self.멤버, *멤버들)
+        data = {'name': '쿠폰', 'room_id': self.room.id, 'start_date': self.today, 'end_date': self.today,
+                'receiver_list': [self.멤버.id, *[멤버.id for 멤버 in 멤버들]]}
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            data['file'] = SimpleUploadedFile('coupon.png', b'image', content_type='image/png')
+            self.list_coupon()
+            # 멤버 확인 + bulk insert (SAVEPOINT, INSERT, 스터디룸 잠금, 쿠폰 카운터 INSERT, UPDATE, RELEASE)
+            with self.assertNumQueries(7):
+                res = self.client.post(path='/api/v2/coupon/bulk', data=data, **self.headers)
+            self.assertEqual(res.status_code, 200)
+
+        coupons = Coupon.objects.filter(room=self.room, sender=self.사용자)
+        self.assertEqual(coupons.count(), 11)
+        self.assertEqual(len({coupon.image.name for coupon in coupons}), 1)
+        self.assertTrue(coupons[0].image.name.startswith(f'public/coupon/{self.room.id}/'))
+        self.assertEqual(set(RoomCouponCounter.objects.filter(room=self.room).values_list('count', flat=True)), {1})
+
+    def test_쿠폰을_만들지_못하면_저장한_이미지를_지운다(self):
+        RoomConfig.objects.create(room=self.room, master=self.사용자)
+        self.room.members.add(self.멤버)
+        data = {'name': '쿠폰', 'room_id': self.room.id, 'start_date': self.today, 'end_date': self.today,
+                'receiver_list': [self.멤버.id]}
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root), \
+                mock.patch('coupon.apis.coupon_api.add_coupons', side_effect=RuntimeError('db')), \
+                self.assertLogs('coupon', level='ERROR'):
+            data['file'] = SimpleUploadedFile('coupon.png', b'image', content_type='image/png')
+            res = self.client.post(path='/api/v2/coupon/bulk', data=data, **self.headers)
+            self.assertEqual(res.status_code, 500)
+            self.assertEqual(os.listdir(os.path.join(media_root, 'public', 'coupon', str(self.room.id))), [])
+        self.assertFalse(Coupon.objects.exists())
+
+    def test_스터디룸_멤버가_아니면_쿠폰을_발급할_수_없다(self):
+        RoomConfig.objects.create(room=self.room, master=self.사용자)
+        self.room.members.add(self.멤버)
+        외부인 = Member.objects.create_user(username='guest@ctudy.com', email='guest@test', password='test')
+        data = {'name': '쿠폰', 'room_id': self.room.id, 'start_date': self.today, 'end_date': self.today,
+                'receiver_list': [self.멤버.id, 외부인.id]}
+
+        res = self.client.post(path='/api/v2/coupon/bulk', data=data, **self.headers)
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(Coupon.objects.exists())
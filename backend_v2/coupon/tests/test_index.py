@@ -0,0 +1,69 @@
+import datetime
+
+from django.db import connection
+from django.db.models import Q, Count
+from test_plus.test import TestCase
+
+from account.models import Member
+from coupon.models import Coupon
+from room.models import Room
+
+
+# noinspection SpellCheckingInspection
+class CouponIndexTestCase(TestCase):
+    """
+    쿠폰 조회 쿼리가 coupon Meta.indexes 의 인덱스를 사용하는지 EXPLAIN 으로 확인
+    """
+    def setUp(self) -> None:
+        super().setUp()
+        self.보낸사람 = Member.objects.create_user(username='sender', email='sender@test', password='test')
+        self.받는사람 = Member.objects.create_user(username='receiver', email='receiver@test', password='test')
+        self.room = Room.objects.create(name='스터디')
+        self.today = datetime.date.today()
+        # planner 통계를 위해 여러 스터디룸에 사용한/사용하지 않은 쿠폰을 만든다
+        rooms = Room.objects.bulk_create([Room(name=f'스터디 {i}') for i in range(20)])
+        Coupon.objects.bulk_create([
+            Coupon(name='쿠폰', room=rooms[i % 20], sender=self.보낸사람, receiver=self.받는사람,
+                   start_date=self.today, end_date=self.today, is_use=i % 3 == 0)
+            for i in range(200)
+        ])
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # 테스트 데이터가 적어 seq scan 이 선택되지 않도록 한다
+                cursor.execute('SET enable_seqscan = off')
+            else:
+                cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, *index_names):
+        plan = queryset.explain()
+        self.assertTrue(any(index_name in plan for index_name in index_names), plan)
+
+    def test_받은_쿠폰_목록은_인덱스를_사용한다(self):
+        coupons = Coupon.objects.filter(receiver=self.받는사람, start_date__lte=self.today, end_date__gte=self.today,
+                                        room_id=self.room.id, is_use=False).order_by('-created_date')
+        self.assertUsesIndex(coupons, 'coupon_unused_receiver_idx')
+
+        coupons = Coupon.objects.filter(receiver=self.받는사람, end_date__lt=self.today,
+                                        room_id=self.room.id, is_use=False).order_by('-created_date')
+        self.assertUsesIndex(coupons, 'coupon_unused_receiver_idx')
+
+    def test_전체_쿠폰_목록은_인덱스를_사용한다(self):
+        coupons = Coupon.objects.filter(Q(sender=self.보낸사람) | Q(receiver=self.보낸사람),
+                                        room_id=self.room.id, is_use=False).order_by('-created_date')
+        # PostgreSQL 은 두 인덱스를 BitmapOr 로, SQLite 는 room_id 로 부분 인덱스 하나를 사용한다
+        self.assertUsesIndex(coupons, 'coupon_unused_sender_idx', 'coupon_unused_receiver_idx')
+
+    def test_스터디룸_쿠폰_수_집계는_인덱스를_사용한다(self):
+        coupons = (Coupon.objects.filter(room_id=self.room.id, start_date__lte=self.today,
+                                         end_date__gte=self.today, is_use=False)
+                   .values('receiver_id')
+                   .annotate(count=Count('id'))
+                   .values_list('receiver_id', 'count'))
+        self.assertUsesIndex(coupons, 'coupon_unused_receiver_idx')
+
+    def test_스터디룸_쿠폰_삭제는_인덱스를_사용한다(self):
+        coupons = Coupon.objects.filter(receiver=self.받는사람, room=self.room)
+        self.assertUsesIndex(coupons, 'coupon_room_receiver_idx')
+
+        coupons = Coupon.objects.filter(Q(receiver=self.보낸사람) | Q(receiver=self.받는사람), room=self.room)
+        self.assertUsesIndex(coupons, 'coupon_room_receiver_idx')
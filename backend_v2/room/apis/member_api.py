@@ -1,19 +1,22 @@
 import logging
 from typing import List
 
-from django.db.models import Q
-from django.shortcuts import get_object_or_404
+from django.db.models import Exists, OuterRef
 from ninja import Router
 from ninja.pagination import paginate
 
 from account.models import Member
 from account.schemas import MemberSchema
-from coupon.models import Coupon
+from account.search import get_member_search
+from room.cache import invalidate_rooms, invalidate_room_coupons, invalidate_user_rooms
+from room.membership import add_members, remove_members
 from room.models import Room
 from room.schemas import MemberIn
-from settings.auth import AuthBearer, auth_check, master_check
+from settings.auth import AuthBearer, auth_check, room_access
 from utils.base import base_api
+from utils.db_router import read_only
 from utils.pagination import PageNumberPaginationExtra
+from utils.query_budget import query_budget
 from utils.response import ErrorResponseSchema, SuccessResponse
 from utils.error import error_codes, server_error_return, CtudyException, not_found_error_return
 
@@ -22,25 +25,20 @@ logger = logging.getLogger('member')
 
 
 @router.get("/", response={200: List[MemberSchema], error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(3)
 @auth_check
+@read_only
 @paginate(PageNumberPaginationExtra)
 def list_member(request, search: str, room_id: str = None):
     try:
-        q = Q()
-        q.add(Q(name__icontains=search), Q.OR)
-        q.add(Q(username__icontains=search), Q.OR)
-
-        exclude_q = Q()
-        exclude_q.add(~Q(id=request.user.id), Q.AND)
+        member_list = get_member_search().search(search, Member.objects.exclude(id=request.user.id))
 
         if room_id is not None:
-            room = get_object_or_404(Room, id=room_id)
-            room_q = Q()
-            [room_q.add(~Q(id=member.id), Q.OR) for member in room.members.all()]
+            # room_members (room_id, member_id) unique 인덱스를 후보 회원마다 조회하는 NOT EXISTS
+            room_members = Room.members.through.objects.filter(room_id=room_id, member_id=OuterRef('pk'))
+            member_list = member_list.filter(~Exists(room_members))
 
-            return 200, Member.objects.filter(q, room_q, exclude_q)
-        else:
-            return 200, Member.objects.filter(q, exclude_q)
+        return 200, member_list
 
     except Exception as e:
         logger.error(e.__str__())
@@ -48,45 +46,37 @@ def list_member(request, search: str, room_id: str = None):
 
 
 @router.post("/{room_id}", response={200: SuccessResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(8)
 @base_api(logger)
 @auth_check
-@master_check
+@room_access('master')
 def join_member(request, room_id: str, payload: MemberIn):
-    payload_data = payload.dict()
-    room = get_object_or_404(Room, id=room_id)
-    q = Q()
-    [q.add(Q(id=member_id), Q.OR) for member_id in payload_data['member_list'] if member_id != request.user.id]
-
-    if len(q) <= 0:
+    room = request.room
+    member_ids = {member_id for member_id in payload.member_list if member_id != request.user.id}
+    if not member_ids:
         raise CtudyException(401, not_found_error_return)
 
-    member_list = Member.objects.filter(q)
-    room.members.add(*member_list)
-    room.save()
+    added = add_members(room.id, member_ids)
+    invalidate_rooms(room.id)
+    invalidate_user_rooms(*added)
 
     return {'success': True}
 
 
 @router.delete("/{room_id}", response={200: SuccessResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(9)
 @base_api(logger)
 @auth_check
-@master_check
+@room_access('master')
 def delete_member(request, room_id: str, payload: MemberIn):
-    payload_data = payload.dict()
-    room = get_object_or_404(Room, id=room_id)
-    q = Q()
-    [q.add(Q(id=member_id), Q.OR) for member_id in payload_data['member_list'] if member_id != request.user.id]
-
-    if len(q) <= 0:
+    room = request.room
+    member_ids = {member_id for member_id in payload.member_list if member_id != request.user.id}
+    if not member_ids:
         raise CtudyException(401, not_found_error_return)
 
-    member_list = Member.objects.filter(q)
-
-    coupon_q = Q()
-    [coupon_q.add(Q(receiver=member), Q.OR) for member in member_list]
-    Coupon.objects.filter(coupon_q, room=room).delete()
-
-    room.members.remove(*member_list)
-    room.save()
+    remove_members(room.id, member_ids)
+    invalidate_rooms(room.id)
+    invalidate_room_coupons(room.id)
+    invalidate_user_rooms(*member_ids)
 
     return {'success': True}
@@ -1,17 +1,25 @@
 import datetime
 import logging
 
-from django.db.models import Q
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
 from django.shortcuts import get_object_or_404
 from ninja import Router, UploadedFile
 
-from account.models import Member
-from coupon.models import Coupon
-from room.models import Room, RoomConfig
+from account.schemas import RoomMemberSchema
+from coupon.counters import room_coupon_counts
+from room.cache import (room_namespace, coupon_namespace, user_namespace, invalidate_rooms, invalidate_room_coupons,
+                        invalidate_user_rooms)
+from room.membership import add_members, remove_members, transfer_master
+from room.models import Room, RoomConfig, UserRoom
 from room.schemas import RoomSchema, RoomCreateIn, RoomUpdateIn, RoomIdResponse, RoomListResponse, RoomDetailResponse
-from settings.auth import AuthBearer, auth_check, master_check
+from settings.auth import AuthBearer, auth_check, room_access
 from utils.base import base_api
+from utils.cache import versioned_cache
+from utils.db_router import read_only, use_default
 from utils.error import error_codes, CtudyException, param_error_return, not_found_error_return
+from utils.query_budget import query_budget
 from utils.response import ErrorResponseSchema, SuccessResponse
 
 router = Router(tags=['Study - Room'])
@@ -19,26 +27,51 @@ logger = logging.getLogger('room')
 
 
 @router.get("/", response={200: RoomListResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(5)
 @base_api(logger)
 @auth_check
+@read_only
 def list_room(request):
-    room_list = Room.objects.filter(
-        Q(members=request.user) | Q(roomconfig__master=request.user),
-        is_deleted=False
-    ).distinct()
-    result = list()
-    for room in room_list:
-        result.append({
-            **RoomSchema.validate(room).dict(),
-            'member_count': room.members.count() + 1,
-            'master_name': room.roomconfig.master.name,
-            'master_username': room.roomconfig.master.username
-        })
-
-    return result
+    room_list = get_room_list(request.user.id)
+
+    return [{**room, 'banner': default_storage.url(room['banner']) if room['banner'] else None} for room in room_list]
+
+
+def get_room_list(user_id):
+    """
+    회원의 스터디룸 id 목록(user_rooms)과 스터디룸별 요약(room)을 따로 cache 한다
+    """
+    room_ids = get_room_ids(user_id)
+    rooms = versioned_cache.get_many_or_load('room_summary', room_ids, room_namespace, load_room_summaries)
+    # 정리(purge)되어 없어진 스터디룸은 건너뛴다
+    return [rooms[room_id] for room_id in room_ids if room_id in rooms and not rooms[room_id]['is_deleted']]
+
+
+def get_room_ids(user_id):
+    return versioned_cache.get_or_load(f'room_ids:{user_id}', [user_namespace(user_id)], lambda: load_room_ids(user_id))
+
+
+def load_room_ids(user_id):
+    # UserRoom 에는 삭제되지 않은 스터디룸만 있다
+    return list(UserRoom.objects.filter(user_id=user_id).order_by('room_id').values_list('room_id', flat=True))
+
+
+def load_room_summaries(room_ids):
+    room_list = Room.objects.filter(id__in=room_ids).values(
+        'id',
+        'name',
+        'banner',
+        'is_deleted',
+        'member_count',
+        master_name=F('roomconfig__master__name'),
+        master_username=F('roomconfig__master__username')
+    )
+    # member_count 는 방장을 제외한 멤버 수
+    return {room['id']: {**room, 'member_count': room['member_count'] + 1} for room in room_list}
 
 
 @router.post("/", response={200: RoomIdResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(13)
 @base_api(logger)
 @auth_check
 def create_room(request, payload: RoomCreateIn, file: UploadedFile = None):
@@ -49,113 +82,136 @@ def create_room(request, payload: RoomCreateIn, file: UploadedFile = None):
 
     member_list = payload_data.pop('member_list')
 
-    room = Room.objects.create(**payload_data)
-    if len(member_list) > 0:
-        q = Q()
-        [q.add(Q(id=member_id), Q.OR) for member_id in member_list if member_id != request.user.id]
-        if len(q) > 0:
-            member_list = Member.objects.filter(q)
-            room.members.add(*member_list)
-            room.save()
-
-    RoomConfig.objects.create(room=room, master=request.user)
+    with transaction.atomic():
+        room = Room.objects.create(**payload_data)
+        added = add_members(room.id, {member_id for member_id in member_list if member_id != request.user.id})
+        RoomConfig.objects.create(room=room, master=request.user)
+    invalidate_user_rooms(request.user.id, *added)
 
     return {'id': room.id}
 
 
-@router.get("/{room_id}", response={200: RoomDetailResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@router.get("/{room_id}", response={200: RoomDetailResponse, error_codes: ErrorResponseSchema},
+            auth=AuthBearer())
+@query_budget(5)
 @base_api(logger)
 @auth_check
+@read_only
 def get_room(request, room_id: str):
-    room = get_object_or_404(Room, id=room_id, is_deleted=False)
-    if not room.members.filter(id=request.user.id).exists() and room.roomconfig.master != request.user:
+    return get_room_detail(request.user, room_id)
+
+
+def get_room_detail(user, room_id):
+    """
+    스터디룸 상세는 room, room_coupons 버전과 날짜(사용 가능한 쿠폰 기준)가 같은 동안 cache 한다
+    접근 권한은 cache 하지 않고 요청마다 UserRoom 에서 확인한다
+    """
+    try:
+        room_id = int(room_id)
+    except ValueError:
         raise CtudyException(404, not_found_error_return)
-    members = list()
 
-    now = datetime.datetime.now().date()
-    for member in room.members.all():
-        member.coupon = Coupon.objects.filter(receiver=request.user,
-                                              start_date__lte=now,
-                                              end_date__gte=now,
-                                              room_id=room_id,
-                                              is_use=False).count()
-        members.append(member)
+    # 방금 초대되거나 내보내진 멤버도 바로 반영되도록 권한은 default 에서 확인한다
+    with use_default():
+        if not UserRoom.objects.filter(user_id=user.id, room_id=room_id).exists():
+            raise CtudyException(404, not_found_error_return)
+
+    today = datetime.date.today()
+    room = versioned_cache.get_or_load(f'room_detail:{room_id}:{today.isoformat()}',
+                                       [room_namespace(room_id), coupon_namespace(room_id)],
+                                       lambda: load_room_detail(room_id, today))
+    return room
 
+
+def load_room_detail(room_id, today):
+    """
+    스터디룸과 멤버, 멤버별 사용 가능한 쿠폰 수를 조회한다
+    """
+    room = get_object_or_404(Room.objects.select_related('roomconfig__master'), id=room_id, is_deleted=False)
+    members = list(room.members.all())
     master = room.roomconfig.master
-    master.coupon = Coupon.objects.filter(room=room, receiver=master).count()
 
-    result = {
-        **RoomSchema.validate(room).dict(),
-        'members': members,
-        'master': master
-    }
+    coupon_counts = room_coupon_counts(room, today)
 
-    return result
+    for member in members:
+        member.coupon = coupon_counts.get(member.id, 0)
+    master.coupon = coupon_counts.get(master.id, 0)
+
+    return {
+        **RoomSchema.from_orm(room).dict(),
+        'members': [RoomMemberSchema.from_orm(member).dict() for member in members],
+        'master': RoomMemberSchema.from_orm(master).dict()
+    }
 
 
 @router.delete("/{room_id}/member/{member_id}",
                response={200: SuccessResponse, error_codes: ErrorResponseSchema},
                auth=AuthBearer())
+@query_budget(10)
 @base_api(logger)
 @auth_check
+@room_access('member')
 def out_room(request, room_id: int, member_id: int):
-    room = get_object_or_404(Room, id=room_id, is_deleted=False)
-    if request.user.id != member_id or room.roomconfig.master == request.user:
+    room = request.room
+    if request.user.id != member_id or room.is_master:
         raise CtudyException(400, param_error_return)
 
-    Coupon.objects.filter(receiver=request.user, room=room).delete()
-    room.members.remove(request.user)
+    remove_members(room.id, [request.user.id])
+    invalidate_rooms(room.id)
+    invalidate_room_coupons(room.id)
+    invalidate_user_rooms(request.user.id)
 
     return {'success': True}
 
 
 @router.put("/{room_id}", response={200: RoomIdResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(11)
 @base_api(logger)
 @auth_check
-@master_check
+@room_access('master')
 def update_room(request, room_id: str, payload: RoomUpdateIn):
-    room = get_object_or_404(Room, id=room_id)
+    room = request.room
     payload_data = payload.dict()
 
     for attr, value in payload_data.items():
         if value is not None:
             if attr == 'master':
-                member = room.members.filter(id=value)
-                if member.exists():
-                    member = member[0]
-                    room.members.remove(member)
-                    room.members.add(request.user)
-                    room.save()
-                    room.roomconfig.master = member
-                    room.roomconfig.save()
+                transfer_master(room, value)
             else:
                 setattr(room, attr, value)
-                room.save()
+                room.save(update_fields=[attr])
+    invalidate_rooms(room.id)
 
     return {'id': room.id}
 
 
 @router.post("/banner/{room_id}", response={200: RoomIdResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(3)
 @base_api(logger)
 @auth_check
-@master_check
+@room_access('master')
 def update_banner_room(request, room_id: str, file: UploadedFile = None):
-    room = get_object_or_404(Room, id=room_id)
+    room = request.room
     room.banner = file
-    room.save()
+    room.save(update_fields=['banner'])
+    invalidate_rooms(room.id)
 
     return {'id': room.id}
 
 
 @router.delete("/{room_id}", response={200: SuccessResponse, error_codes: ErrorResponseSchema}, auth=AuthBearer())
+@query_budget(6)
 @base_api(logger)
 @auth_check
-@master_check
+@room_access('master')
 def delete_room(request, room_id: str):
 
-    room = get_object_or_404(Room, id=room_id)
+    room = request.room
     room.is_deleted = True
     room.deleted_time = datetime.datetime.now()
-    room.save()
+    # UserRoom 은 room.signals 가 같은 트랜잭션에서 삭제한다
+    with transaction.atomic():
+        room.save(update_fields=['is_deleted', 'deleted_time'])
+    invalidate_rooms(room.id)
 
     return {'success': True}
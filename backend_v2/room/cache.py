@@ -0,0 +1,42 @@
+"""
+스터디룸 cache namespace
+
+room:<id>          스터디룸 정보, 방장, 멤버 (list_room 의 스터디룸 요약, get_room)
+room_coupons:<id>  스터디룸의 쿠폰 (get_room 의 멤버별 쿠폰 수)
+user_rooms:<id>    회원이 속한 스터디룸 목록 (list_room)
+"""
+from room.membership import member_room_ids
+from utils.cache import versioned_cache
+
+
+def room_namespace(room_id):
+    return f'room:{room_id}'
+
+
+def coupon_namespace(room_id):
+    return f'room_coupons:{room_id}'
+
+
+def user_namespace(user_id):
+    return f'user_rooms:{user_id}'
+
+
+def invalidate_rooms(*room_ids):
+    versioned_cache.invalidate(*(room_namespace(room_id) for room_id in room_ids))
+
+
+def invalidate_room_coupons(*room_ids):
+    versioned_cache.invalidate(*(coupon_namespace(room_id) for room_id in room_ids))
+
+
+def invalidate_user_rooms(*user_ids):
+    versioned_cache.invalidate(*(user_namespace(user_id) for user_id in user_ids))
+
+
+def invalidate_member_rooms(member_id):
+    """
+    회원 정보(이름, 이미지)나 회원 탈퇴는 회원이 속한 모든 스터디룸의 cache 를 바꾼다
+    """
+    room_ids = list(member_room_ids(member_id))
+    invalidate_rooms(*room_ids)
+    invalidate_room_coupons(*room_ids)
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from room.cache import invalidate_user_rooms
+from room.membership import sync_user_rooms
+from room.models import Room
+
+
+class Command(BaseCommand):
+    help = '스터디룸 멤버, 방장으로 UserRoom 을 채운다 (이미 맞는 행은 그대로 둔다)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, nargs='*', help='채울 스터디룸 id (기본: 전체)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0, help='batch 사이에 쉬는 시간(초)')
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.order_by('id')
+        if options['room']:
+            rooms = rooms.filter(id__in=options['room'])
+        room_ids = list(rooms.values_list('id', flat=True))
+
+        created = deleted = updated = 0
+        for offset in range(0, len(room_ids), options['batch_size']):
+            batch = room_ids[offset:offset + options['batch_size']]
+            missing, extra, changed = sync_user_rooms(batch)
+            created, deleted, updated = created + len(missing), deleted + len(extra), updated + len(changed)
+            invalidate_user_rooms(*{user_id for rows in (missing, extra, changed) for user_id, _ in rows})
+            self.stdout.write(f'{offset + len(batch)}/{len(room_ids)} rooms')
+            time.sleep(options['pause'])
+
+        self.stdout.write(f'{len(room_ids)} rooms: created {created}, deleted {deleted}, role updated {updated}')
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from room.cache import invalidate_user_rooms
+from room.membership import diff_user_rooms, sync_user_rooms
+from room.models import Room
+
+
+class Command(BaseCommand):
+    help = 'UserRoom 이 스터디룸 멤버, 방장과 일치하는지 검사한다 (--fix 로 맞춘다)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, nargs='*', help='검사할 스터디룸 id (기본: 전체)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--fix', action='store_true', help='일치하지 않는 UserRoom 을 맞춘다')
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.order_by('id')
+        if options['room']:
+            rooms = rooms.filter(id__in=options['room'])
+        room_ids = list(rooms.values_list('id', flat=True))
+
+        counts = [0, 0, 0]
+        for offset in range(0, len(room_ids), options['batch_size']):
+            batch = room_ids[offset:offset + options['batch_size']]
+            missing, extra, changed = sync_user_rooms(batch) if options['fix'] else diff_user_rooms(batch)
+            for (user_id, room_id), role in missing.items():
+                self.stdout.write(f'room {room_id} user {user_id}: missing {role}')
+            for user_id, room_id in extra:
+                self.stdout.write(f'room {room_id} user {user_id}: extra')
+            for (user_id, room_id), (_, role) in changed.items():
+                self.stdout.write(f'room {room_id} user {user_id}: role should be {role}')
+            for i, rows in enumerate((missing, extra, changed)):
+                counts[i] += len(rows)
+            if options['fix']:
+                invalidate_user_rooms(*{user_id for rows in (missing, extra, changed) for user_id, _ in rows})
+
+        summary = f'{len(room_ids)} rooms: missing {counts[0]}, extra {counts[1]}, wrong role {counts[2]}'
+        if any(counts) and not options['fix']:
+            raise CommandError(f'{summary} (run with --fix)')
+        self.stdout.write(summary)
@@ -0,0 +1,40 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from room.purge import purge_rooms
+from utils import metrics
+
+logger = logging.getLogger('room')
+
+
+class Command(BaseCommand):
+    help = '보관 기간이 지난 삭제된 스터디룸을 batch 단위로 삭제한다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='한 번 정리하고 종료한다')
+        parser.add_argument('--retention-days', type=int, default=settings.ROOM_PURGE_RETENTION_DAYS)
+        parser.add_argument('--batch-size', type=int, default=settings.ROOM_PURGE_BATCH_SIZE)
+        parser.add_argument('--limit', type=int, help='한 번에 정리할 최대 스터디룸 수')
+        parser.add_argument('--pause', type=float, default=settings.ROOM_PURGE_BATCH_PAUSE,
+                            help='batch 사이에 쉬는 시간(초)')
+        parser.add_argument('--interval', type=float, default=settings.ROOM_PURGE_INTERVAL,
+                            help='정리할 스터디룸을 다시 조회할 때까지 기다리는 시간(초)')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                purged = purge_rooms(retention_days=options['retention_days'], batch_size=options['batch_size'],
+                                     limit=options['limit'], pause=options['pause'], on_progress=metrics.flush)
+            except Exception as e:
+                # DB 에 연결할 수 없는 경우 다음 주기에 다시 정리한다
+                logger.error(f'room purge worker failed: {e}')
+                purged = 0
+            self.stdout.write(f'purged {purged} room(s)')
+            # 진행 상황을 /metrics 에서 볼 수 있도록 METRICS_DIR 에 기록한다
+            metrics.flush(force=True)
+            if options['once']:
+                return
+            time.sleep(options['interval'])
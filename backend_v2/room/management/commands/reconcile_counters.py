@@ -0,0 +1,55 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from coupon.counters import rebuild
+from coupon.models import RoomCouponCounter
+from room.cache import invalidate_rooms, invalidate_room_coupons
+from room.models import Room
+
+
+class Command(BaseCommand):
+    help = 'Room.member_count 와 RoomCouponCounter 를 다시 집계한다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, nargs='*', help='다시 집계할 스터디룸 id (기본: 전체)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.order_by('id')
+        if options['room']:
+            rooms = rooms.filter(id__in=options['room'])
+        room_ids = list(rooms.values_list('id', flat=True))
+        today = datetime.date.today()
+
+        member_fixed = coupon_fixed = 0
+        for offset in range(0, len(room_ids), options['batch_size']):
+            batch = room_ids[offset:offset + options['batch_size']]
+            member_fixed += self.reconcile_member_count(batch)
+            coupon_fixed += self.reconcile_coupon_counters(batch, today)
+            invalidate_rooms(*batch)
+            invalidate_room_coupons(*batch)
+
+        self.stdout.write(f'{len(room_ids)} rooms: fixed member_count of {member_fixed}, '
+                          f'coupon counters of {coupon_fixed}')
+
+    def reconcile_member_count(self, room_ids):
+        counts = dict(Room.members.through.objects.filter(room_id__in=room_ids).values('room_id')
+                      .annotate(count=Count('id')).order_by().values_list('room_id', 'count'))
+        rooms = [room for room in Room.objects.filter(id__in=room_ids).only('id', 'member_count')
+                 if room.member_count != counts.get(room.id, 0)]
+        for room in rooms:
+            room.member_count = counts.get(room.id, 0)
+        Room.objects.bulk_update(rooms, ['member_count'])
+        return len(rooms)
+
+    def reconcile_coupon_counters(self, room_ids, today):
+        # 기간이 끝난 카운터를 지우는 것은 고친 것으로 세지 않는다
+        before = {room_id: {} for room_id in room_ids}
+        for room_id, receiver_id, start_date, end_date, count in RoomCouponCounter.objects \
+                .filter(room_id__in=room_ids, end_date__gte=today, count__gt=0) \
+                .values_list('room_id', 'receiver_id', 'start_date', 'end_date', 'count'):
+            before[room_id][receiver_id, start_date, end_date] = count
+        after = rebuild(room_ids, today)
+        return sum(1 for room_id in room_ids if before[room_id] != after[room_id])
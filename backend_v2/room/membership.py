@@ -0,0 +1,151 @@
+"""
+스터디룸 멤버 추가/삭제 (Room.members through 테이블을 직접 사용)
+
+room.members.add/remove 는 Member 를 모두 불러오고 m2m_changed 를 보내므로
+여러 멤버를 한 번에 바꿀 때는 회원 수와 관계없이 일정한 쿼리로 처리하는 이 함수들을 사용한다.
+member_count 는 through 테이블에서 다시 세어 동시에 변경되어도 정확하게 유지한다.
+
+UserRoom 은 같은 트랜잭션에서 함께 바꾼다. ORM 으로 members, RoomConfig 를 바꾸거나 스터디룸을 삭제하면
+room.signals 가 sync_user_rooms 로 반영하고, 두 경우 모두 check_user_rooms 명령으로 검사할 수 있다.
+"""
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from account.models import Member
+from coupon.counters import remove_receivers
+from coupon.models import Coupon
+from room.models import Room, RoomConfig, UserRoom
+
+RoomMember = Room.members.through
+
+
+def member_room_ids(member_id):
+    """
+    회원이 멤버이거나 방장인 스터디룸 id (삭제된 스터디룸 포함)
+
+    members 와 roomconfig 를 OR 로 join 한 뒤 DISTINCT 하면 인덱스를 쓰기 어려우므로
+    (member_id, room_id), (master_id, room_id) 인덱스만 읽는 두 조회를 UNION 한다.
+    """
+    member_rooms = RoomMember.objects.filter(member_id=member_id).values_list('room_id', flat=True)
+    master_rooms = RoomConfig.objects.filter(master_id=member_id).values_list('room_id', flat=True)
+    return member_rooms.union(master_rooms)
+
+
+def expected_user_rooms(room_ids, user_ids=None):
+    """
+    members, RoomConfig 에서 계산한 UserRoom {(user_id, room_id): role}
+    """
+    members = RoomMember.objects.filter(room_id__in=room_ids, room__is_deleted=False)
+    masters = RoomConfig.objects.filter(room_id__in=room_ids, room__is_deleted=False, master__isnull=False)
+    if user_ids is not None:
+        members = members.filter(member_id__in=user_ids)
+        masters = masters.filter(master_id__in=user_ids)
+    expected = {key: UserRoom.MEMBER for key in members.values_list('member_id', 'room_id')}
+    expected.update({key: UserRoom.MASTER for key in masters.values_list('master_id', 'room_id')})
+    return expected
+
+
+def diff_user_rooms(room_ids, user_ids=None):
+    """
+    UserRoom 과 members, RoomConfig 를 비교한다 (key 는 (user_id, room_id))
+    :return: 없는 행 {key: role}, 남은 행 {key: id}, role 이 다른 행 {key: (id, role)}
+    """
+    expected = expected_user_rooms(room_ids, user_ids)
+    rows = UserRoom.objects.filter(room_id__in=room_ids)
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    missing = dict(expected)
+    extra, changed = {}, {}
+    for row_id, user_id, room_id, role in rows.values_list('id', 'user_id', 'room_id', 'role'):
+        key = (user_id, room_id)
+        expected_role = missing.pop(key, None)
+        if expected_role is None:
+            extra[key] = row_id
+        elif expected_role != role:
+            changed[key] = (row_id, expected_role)
+    return missing, extra, changed
+
+
+def sync_user_rooms(room_ids, user_ids=None):
+    """
+    스터디룸들의 (user_ids 가 있으면 그 회원들의) UserRoom 을 members, RoomConfig 에 맞춘다.
+    이미 있는 행은 joined_at 을 유지한다.
+    :return: diff_user_rooms 결과 (맞추기 전)
+    """
+    with transaction.atomic():
+        missing, extra, changed = diff_user_rooms(room_ids, user_ids)
+        if extra:
+            UserRoom.objects.filter(id__in=extra.values()).delete()
+        for role in (UserRoom.MASTER, UserRoom.MEMBER):
+            row_ids = [row_id for row_id, expected_role in changed.values() if expected_role == role]
+            if row_ids:
+                UserRoom.objects.filter(id__in=row_ids).update(role=role)
+        if missing:
+            UserRoom.objects.bulk_create([UserRoom(user_id=user_id, room_id=room_id, role=role)
+                                          for (user_id, room_id), role in missing.items()], ignore_conflicts=True)
+    return missing, extra, changed
+
+
+def refresh_member_count(room_id):
+    count = (RoomMember.objects.filter(room_id=OuterRef('pk')).order_by()
+             .values('room_id').annotate(count=Count('id')).values('count'))
+    Room.objects.filter(id=room_id).update(member_count=Coalesce(Subquery(count), 0))
+
+
+def add_members(room_id, member_ids):
+    """
+    member_ids 중 존재하는 회원을 멤버로 추가한다
+    :return: 새로 추가된 회원 id 목록
+    """
+    member_ids = set(member_ids)
+    if not member_ids:
+        return []
+    with transaction.atomic():
+        is_member = RoomMember.objects.filter(room_id=room_id, member_id=OuterRef('pk'))
+        new_ids = list(Member.objects.filter(id__in=member_ids).filter(~Exists(is_member))
+                       .values_list('id', flat=True))
+        if new_ids:
+            # 동시에 추가된 멤버는 unique 제약으로 건너뛴다
+            RoomMember.objects.bulk_create([RoomMember(room_id=room_id, member_id=member_id) for member_id in new_ids],
+                                           ignore_conflicts=True)
+            # 방장이 멤버로 추가되어도 방장 행을 유지한다
+            UserRoom.objects.bulk_create([UserRoom(user_id=member_id, room_id=room_id, role=UserRoom.MEMBER)
+                                          for member_id in new_ids], ignore_conflicts=True)
+            refresh_member_count(room_id)
+    return new_ids
+
+
+def remove_members(room_id, member_ids):
+    """
+    멤버를 삭제하고 삭제된 멤버가 스터디룸에서 받은 쿠폰도 삭제한다
+    """
+    member_ids = set(member_ids)
+    if not member_ids:
+        return
+    with transaction.atomic():
+        members = RoomMember.objects.filter(room_id=room_id, member_id__in=member_ids)
+        remove_receivers(room_id, member_ids)
+        Coupon.objects.filter(room_id=room_id, receiver_id__in=members.values('member_id')).delete()
+        members.delete()
+        UserRoom.objects.filter(room_id=room_id, user_id__in=member_ids, role=UserRoom.MEMBER).delete()
+        refresh_member_count(room_id)
+
+
+def transfer_master(room, member_id):
+    """
+    멤버에게 방장을 넘기고 이전 방장은 멤버가 된다 (room 은 roomconfig 를 함께 조회한 스터디룸)
+    :return: member_id 가 멤버가 아니면 False
+    """
+    master_id = room.roomconfig.master_id
+    with transaction.atomic():
+        if not RoomMember.objects.filter(room_id=room.id, member_id=member_id).delete()[0]:
+            return False
+        if master_id is not None:
+            RoomMember.objects.bulk_create([RoomMember(room_id=room.id, member_id=master_id)], ignore_conflicts=True)
+        RoomConfig.objects.filter(room_id=room.id).update(master_id=member_id)
+        UserRoom.objects.filter(room_id=room.id, user_id=member_id).update(role=UserRoom.MASTER)
+        UserRoom.objects.filter(room_id=room.id, user_id=master_id).update(role=UserRoom.MEMBER)
+        refresh_member_count(room.id)
+    room.roomconfig.master_id = member_id
+    return True
@@ -0,0 +1,28 @@
+# Generated by Django 4.0.7 on 2026-10-18 19:36
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_member_count(apps, schema_editor):
+    Room = apps.get_model('room', 'Room')
+    members = (Room.members.through.objects.filter(room_id=OuterRef('pk')).order_by()
+               .values('room_id').annotate(count=Count('id')).values('count'))
+    Room.objects.update(member_count=Coalesce(Subquery(members), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0002_alter_roomconfig_room'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_member_count, migrations.RunPython.noop),
+    ]
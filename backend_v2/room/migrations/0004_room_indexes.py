@@ -0,0 +1,27 @@
+# Generated by Django 4.0.7 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('room', '0003_room_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_time'], name='room_deleted_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roomconfig',
+            index=models.Index(fields=['master', 'room'], name='roomconfig_master_room_idx'),
+        ),
+        # 회원이 멤버인 스터디룸 id 를 테이블 조회 없이 찾는다 (내 스터디룸 목록)
+        # 자동 생성된 members through 테이블에는 Meta.indexes 를 둘 수 없다
+        migrations.RunSQL(
+            'CREATE INDEX room_members_member_room_idx ON room_room_members (member_id, room_id)',
+            'DROP INDEX room_members_member_room_idx',
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.0.7 on 2026-10-18 19:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('room', '0004_room_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRoom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('master', '방장'), ('member', '멤버')], max_length=10)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='room.room')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='userroom',
+            constraint=models.UniqueConstraint(fields=('user', 'room'), name='userroom_user_room_uniq'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+import itertools
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def fill_user_rooms(apps, schema_editor):
+    Room = apps.get_model('room', 'Room')
+    RoomConfig = apps.get_model('room', 'RoomConfig')
+    UserRoom = apps.get_model('room', 'UserRoom')
+    masters = RoomConfig.objects.filter(room__is_deleted=False, master__isnull=False) \
+        .values_list('master_id', 'room_id').iterator()
+    members = Room.members.through.objects.filter(room__is_deleted=False) \
+        .values_list('member_id', 'room_id').iterator()
+    # 방장을 먼저 넣고, 방장이면서 멤버인 행은 unique 제약으로 건너뛴다
+    for role, rows in (('master', masters), ('member', members)):
+        while True:
+            batch = list(itertools.islice(rows, BATCH_SIZE))
+            if not batch:
+                break
+            UserRoom.objects.bulk_create([UserRoom(user_id=user_id, room_id=room_id, role=role)
+                                          for user_id, room_id in batch], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    # batch 마다 commit 해서 큰 테이블을 한 트랜잭션으로 채우지 않는다
+    # 중간에 실패하면 backfill_user_rooms 로 나머지를 채운다 (이미 있는 행은 건너뛴다)
+    atomic = False
+
+    dependencies = [
+        ('room', '0005_userroom'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_user_rooms, migrations.RunPython.noop, atomic=False),
+    ]
@@ -20,8 +20,44 @@ class Room(models.Model):
     banner = models.ImageField(upload_to=path_and_rename, blank=True, null=True)
     is_deleted = models.BooleanField(default=False)
     deleted_time = models.DateTimeField(null=True)
+    # 방장을 제외한 멤버 수 (room.signals 가 members 변경 시 F() 로 갱신한다)
+    # 다른 요청의 갱신을 덮어쓰지 않도록 Room 을 저장할 때는 update_fields 를 사용한다
+    member_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # 보관 기간이 지난 삭제된 스터디룸 (purge_rooms)
+            models.Index(fields=['deleted_time'], name='room_deleted_time_idx', condition=models.Q(is_deleted=True)),
+        ]
 
 
 class RoomConfig(models.Model):
     room = models.OneToOneField(Room, on_delete=models.CASCADE)
     master = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True)
+
+    class Meta:
+        indexes = [
+            # 방장인 스터디룸 id 를 테이블 조회 없이 찾는다 (내 스터디룸 목록)
+            models.Index(fields=['master', 'room'], name='roomconfig_master_room_idx'),
+        ]
+
+
+class UserRoom(models.Model):
+    """
+    회원이 볼 수 있는 스터디룸 (members, RoomConfig 에서 만드는 projection, room.membership 참고)
+    삭제된 스터디룸은 포함하지 않으며 방장이면서 멤버여도 role 은 master 하나만 둔다.
+    """
+    MASTER = 'master'
+    MEMBER = 'member'
+    ROLE_CHOICES = ((MASTER, '방장'), (MEMBER, '멤버'))
+
+    user = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='+')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='+')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # 회원의 스터디룸 id 를 테이블 조회 없이 찾는다 (내 스터디룸 목록)
+            models.UniqueConstraint(fields=['user', 'room'], name='userroom_user_room_uniq'),
+        ]
@@ -0,0 +1,170 @@
+"""
+삭제한 스터디룸 정리 (room purge_rooms 명령)
+
+delete_room 은 is_deleted, deleted_time 만 기록하므로 ROOM_PURGE_RETENTION_DAYS 가 지난 스터디룸을
+쿠폰, 멤버, 설정, 이미지 파일까지 실제로 삭제한다. 서비스 요청을 오래 막지 않도록 쿠폰과 멤버는
+batch_size 씩 짧은 트랜잭션으로 나누어 지우고, 마지막에 남은 행과 스터디룸을 지운다.
+파일은 DB 에서 삭제된 뒤에 지운다.
+"""
+import datetime
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from coupon.models import Coupon
+from room.cache import invalidate_rooms, invalidate_room_coupons, invalidate_user_rooms
+from room.models import Room, RoomConfig
+from utils.metrics import register_stats
+
+logger = logging.getLogger('room')
+
+RoomMember = Room.members.through
+
+_lock = threading.Lock()
+_stats = {'rooms': 0, 'coupons': 0, 'members': 0, 'files': 0, 'errors': 0, 'pending': 0, 'last_run_time': 0}
+# _stats key: (설명, type)
+PURGE_METRICS = {
+    'rooms': ('정리(purge)한 삭제된 스터디룸 수', 'counter'),
+    'coupons': ('정리하면서 삭제한 쿠폰 수', 'counter'),
+    'members': ('정리하면서 삭제한 멤버 수', 'counter'),
+    'files': ('정리하면서 삭제한 이미지 파일 수', 'counter'),
+    'errors': ('정리하지 못한 스터디룸, 파일 수', 'counter'),
+    'pending': ('이번 정리에서 남은 스터디룸 수', 'gauge'),
+    'last_run_time': ('마지막으로 정리를 마친 시간 (unix time)', 'gauge'),
+}
+
+
+def purge_stats():
+    with _lock:
+        return dict(_stats)
+
+
+def _count(**values):
+    with _lock:
+        for key, value in values.items():
+            _stats[key] += value
+
+
+register_stats('purge', purge_stats, 'ctudy_room_purge', PURGE_METRICS)
+
+
+def expired_rooms(retention_days=None, now=None):
+    retention_days = settings.ROOM_PURGE_RETENTION_DAYS if retention_days is None else retention_days
+    now = now or datetime.datetime.now()
+    return Room.objects.filter(is_deleted=True, deleted_time__lte=now - datetime.timedelta(days=retention_days))
+
+
+def delete_files(names):
+    deleted = 0
+    for name in names:
+        try:
+            default_storage.delete(name)
+            deleted += 1
+        except Exception as e:
+            logger.error(f'room purge: failed to delete {name}: {e}')
+            _count(errors=1)
+    return deleted
+
+
+def delete_coupon_dir(room_id):
+    """
+    public/coupon/<room_id>/ 에 남은 파일을 지우고, 로컬 저장소면 디렉토리도 지운다
+    """
+    path = f'public/coupon/{room_id}'
+    try:
+        if not default_storage.exists(path):
+            return 0
+        _, files = default_storage.listdir(path)
+    except (NotImplementedError, OSError):
+        return 0
+    deleted = delete_files(os.path.join(path, name) for name in files)
+    try:
+        os.rmdir(default_storage.path(path))
+    except (NotImplementedError, OSError):
+        pass
+    return deleted
+
+
+def purge_room(room_id, batch_size=None, pause=None):
+    """
+    스터디룸 하나를 batch 단위로 삭제한다
+    :return: 삭제한 쿠폰, 멤버, 파일 수
+    """
+    batch_size = batch_size or settings.ROOM_PURGE_BATCH_SIZE
+    pause = settings.ROOM_PURGE_BATCH_PAUSE if pause is None else pause
+    room = Room.objects.filter(id=room_id, is_deleted=True).only('id', 'banner').first()
+    if room is None:
+        return 0, 0, 0
+
+    coupons = members = files = 0
+    while True:
+        batch = list(Coupon.objects.filter(room_id=room_id).order_by('id').values_list('id', 'image')[:batch_size])
+        if not batch:
+            break
+        Coupon.objects.filter(id__in=[coupon_id for coupon_id, _ in batch]).delete()
+        coupons += len(batch)
+        files += delete_files(image for _, image in batch if image)
+        _count(coupons=len(batch))
+        time.sleep(pause)
+
+    member_ids = []
+    while True:
+        batch = list(RoomMember.objects.filter(room_id=room_id).order_by('id').values_list('id', 'member_id')
+                     [:batch_size])
+        if not batch:
+            break
+        RoomMember.objects.filter(id__in=[row_id for row_id, _ in batch]).delete()
+        member_ids += [member_id for _, member_id in batch]
+        members += len(batch)
+        _count(members=len(batch))
+        time.sleep(pause)
+
+    master_ids = list(RoomConfig.objects.filter(room_id=room_id).values_list('master_id', flat=True))
+    # 설정, 쿠폰 카운터와 정리하는 동안 추가된 쿠폰, 멤버는 cascade 로 함께 삭제된다
+    Room.objects.filter(id=room_id).delete()
+
+    if room.banner:
+        files += delete_files([room.banner.name])
+    files += delete_coupon_dir(room_id)
+    _count(rooms=1, files=files)
+
+    invalidate_rooms(room_id)
+    invalidate_room_coupons(room_id)
+    invalidate_user_rooms(*member_ids, *filter(None, master_ids))
+    return coupons, members, files
+
+
+def purge_rooms(retention_days=None, batch_size=None, limit=None, pause=None, on_progress=None):
+    """
+    보관 기간이 지난 삭제된 스터디룸을 오래된 순서로 삭제한다 (스터디룸마다 on_progress() 를 호출한다)
+    :return: 삭제한 스터디룸 수
+    """
+    queryset = expired_rooms(retention_days).order_by('deleted_time', 'id')
+    room_ids = queryset.values_list('id', flat=True)
+    room_ids = list(room_ids[:limit] if limit else room_ids)
+    with _lock:
+        _stats['pending'] = len(room_ids)
+
+    purged = 0
+    for room_id in room_ids:
+        try:
+            coupons, members, files = purge_room(room_id, batch_size, pause)
+        except Exception as e:
+            # 다음 실행에서 남은 행부터 다시 삭제한다
+            logger.error(f'room purge: room {room_id} failed: {e}')
+            _count(errors=1)
+            continue
+        purged += 1
+        with _lock:
+            _stats['pending'] -= 1
+        logger.info(f'room purge: room {room_id} purged ({coupons} coupons, {members} members, {files} files)')
+        if on_progress:
+            on_progress()
+
+    with _lock:
+        _stats['last_run_time'] = int(time.time())
+    return purged
@@ -0,0 +1,94 @@
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from account.models import Member
+from coupon.counters import remove_sent_coupons
+from room.membership import sync_user_rooms
+from room.models import Room, RoomConfig, UserRoom
+
+RoomMember = Room.members.through
+
+
+@receiver(m2m_changed, sender=RoomMember)
+def update_member_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    room.members / member.room_set 변경을 Room.member_count 에 반영한다.
+    remove 는 실제로 있던 멤버만 빼도록 pre_remove, pre_clear 에서 지울 행을 먼저 센다.
+    """
+    if action in ('pre_remove', 'pre_clear'):
+        rows = RoomMember.objects.filter(member_id=instance.id) if reverse else \
+            RoomMember.objects.filter(room_id=instance.id)
+        if pk_set is not None:
+            rows = rows.filter(**{'room_id__in' if reverse else 'member_id__in': pk_set})
+        instance._removed_room_members = list(rows.values_list('room_id', 'member_id'))
+
+    elif action == 'post_add' and pk_set:
+        if reverse:
+            Room.objects.filter(id__in=pk_set).update(member_count=F('member_count') + 1)
+        else:
+            Room.objects.filter(id=instance.id).update(member_count=F('member_count') + len(pk_set))
+
+    elif action in ('post_remove', 'post_clear'):
+        removed = instance.__dict__.pop('_removed_room_members', [])
+        if not removed:
+            return
+        if reverse:
+            Room.objects.filter(id__in=[room_id for room_id, _ in removed]) \
+                .update(member_count=F('member_count') - 1)
+        else:
+            Room.objects.filter(id=instance.id).update(member_count=F('member_count') - len(removed))
+
+
+@receiver(pre_delete, sender=Member)
+def leave_rooms(sender, instance, **kwargs):
+    """
+    회원 탈퇴로 cascade 삭제되는 멤버와 보낸 쿠폰은 signal 이 없으므로 미리 반영한다
+    """
+    Room.objects.filter(members=instance).update(member_count=F('member_count') - 1)
+    # 다른 멤버가 받은 쿠폰이 삭제되므로 쿠폰 카운터에서 뺀다
+    remove_sent_coupons(instance.id)
+
+
+@receiver(m2m_changed, sender=RoomMember)
+def update_user_rooms(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    room.members / member.room_set 변경을 UserRoom 에 반영한다 (room.membership 함수는 직접 반영한다)
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear') or pk_set == set():
+        return
+    if not reverse:
+        sync_user_rooms([instance.id], pk_set)
+        return
+    room_ids = pk_set
+    if room_ids is None:
+        room_ids = UserRoom.objects.filter(user_id=instance.id).values_list('room_id', flat=True)
+    sync_user_rooms(list(room_ids), [instance.id])
+
+
+@receiver(post_save, sender=RoomConfig)
+def update_master_user_room(sender, instance, created, **kwargs):
+    """
+    방장이 바뀌면 이전 방장과 새 방장의 UserRoom 을 다시 맞춘다
+    """
+    if created:
+        # 새 스터디룸의 방장 (이미 멤버인 행은 role 만 바꾼다)
+        if instance.master_id is not None and not instance.room.is_deleted:
+            rows = UserRoom.objects.filter(room_id=instance.room_id, user_id=instance.master_id)
+            if not rows.update(role=UserRoom.MASTER):
+                UserRoom.objects.create(room_id=instance.room_id, user_id=instance.master_id, role=UserRoom.MASTER)
+        return
+    user_ids = set(UserRoom.objects.filter(room_id=instance.room_id, role=UserRoom.MASTER)
+                   .values_list('user_id', flat=True))
+    if instance.master_id is not None:
+        user_ids.add(instance.master_id)
+    sync_user_rooms([instance.room_id], user_ids)
+
+
+@receiver(post_save, sender=Room)
+def remove_deleted_user_rooms(sender, instance, created, update_fields, **kwargs):
+    """
+    삭제한 스터디룸은 UserRoom 에서 뺀다
+    """
+    if instance.is_deleted and not created and (update_fields is None or 'is_deleted' in update_fields):
+        UserRoom.objects.filter(room_id=instance.id).delete()
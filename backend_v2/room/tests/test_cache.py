@@ -0,0 +1,133 @@
+import datetime
+import json
+
+from django.db import connection
+from django.test import override_settings
+from django.test.client import MULTIPART_CONTENT
+from django.test.utils import CaptureQueriesContext
+from test_plus.test import TestCase
+
+from account.models import Member
+from coupon.models import Coupon
+from room.models import Room, RoomConfig, UserRoom
+from utils.cache import versioned_cache
+from utils.testing import QueryBudgetMixin, auth_headers
+
+
+# noinspection SpellCheckingInspection
+class RoomCacheTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        versioned_cache.clear()
+        self.방장 = Member.objects.create_user(username='master@ctudy.com', email='master@test', password='test',
+                                             name='방장')
+        self.멤버 = Member.objects.create_user(username='member@ctudy.com', email='member@test', password='test',
+                                             name='멤버')
+        self.room = Room.objects.create(name='스터디')
+        RoomConfig.objects.create(room=self.room, master=self.방장)
+        self.room.members.add(self.멤버)
+        self.headers = {member.id: auth_headers(member) for member in (self.방장, self.멤버)}
+
+    def request(self, method, path, member, content_type='application/json', **kwargs):
+        res = getattr(self.client, method)(path=path, content_type=content_type, **kwargs, **self.headers[member.id])
+        self.assertEqual(res.status_code, 200, res.content)
+        return res.json()['response']
+
+    def list_room(self, member):
+        return self.request('get', '/api/v2/study/room/', member)
+
+    def get_room(self, member):
+        return self.request('get', f'/api/v2/study/room/{self.room.id}', member)
+
+    def test_변경이_없으면_DB_를_조회하지_않는다(self):
+        self.list_room(self.멤버)
+        self.get_room(self.멤버)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.list_room(self.멤버)), 1)
+        # 상세는 접근 권한만 UserRoom 에서 확인한다
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_room(self.멤버)['name'], '스터디')
+        # 스터디룸 요약은 멤버끼리 공유한다 (인증, 스터디룸 id 목록)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.list_room(self.방장)[0]['member_count'], 2)
+
+    def test_멤버가_바뀌면_목록과_상세가_갱신된다(self):
+        새멤버 = Member.objects.create_user(username='new@ctudy.com', email='new@test', password='test')
+        self.headers[새멤버.id] = auth_headers(새멤버)
+        self.assertEqual(self.list_room(새멤버), [])
+        self.assertEqual(self.list_room(self.멤버)[0]['member_count'], 2)
+        self.get_room(self.멤버)
+
+        self.request('post', f'/api/v2/study/room/member/{self.room.id}', self.방장, data={'member_list': [새멤버.id]})
+        self.assertEqual(len(self.list_room(새멤버)), 1)
+        self.assertEqual(self.list_room(self.멤버)[0]['member_count'], 3)
+        self.assertEqual(len(self.get_room(self.멤버)['members']), 2)
+
+        self.request('delete', f'/api/v2/study/room/member/{self.room.id}', self.방장, data={'member_list': [새멤버.id]})
+        self.assertEqual(self.list_room(새멤버), [])
+        res = self.client.get(path=f'/api/v2/study/room/{self.room.id}', **self.headers[새멤버.id])
+        self.assertEqual(res.status_code, 404)
+
+    def test_상세_접근_권한은_cache_된_목록이_아니라_UserRoom_으로_확인한다(self):
+        self.assertEqual(len(self.list_room(self.멤버)), 1)
+        self.get_room(self.멤버)
+
+        # cache 를 무효화하지 않고 UserRoom 만 지워도 상세를 볼 수 없다
+        UserRoom.objects.filter(room=self.room, user=self.멤버).delete()
+        self.assertEqual(len(self.list_room(self.멤버)), 1)
+        res = self.client.get(path=f'/api/v2/study/room/{self.room.id}', **self.headers[self.멤버.id])
+        self.assertEqual(res.status_code, 404)
+
+    def test_방장이_바뀌면_목록과_상세가_갱신된다(self):
+        self.assertEqual(self.list_room(self.멤버)[0]['master_name'], '방장')
+        self.assertEqual(self.get_room(self.멤버)['master']['id'], self.방장.id)
+
+        self.request('put', f'/api/v2/study/room/{self.room.id}', self.방장, data={'master': self.멤버.id})
+        self.assertEqual(self.list_room(self.멤버)[0]['master_name'], '멤버')
+        self.assertEqual(self.get_room(self.방장)['master']['id'], self.멤버.id)
+
+        self.request('put', '/api/v2/account/profile/', self.멤버, data={'name': '새방장'})
+        self.assertEqual(self.list_room(self.방장)[0]['master_name'], '새방장')
+
+    def test_쿠폰이_바뀌면_상세의_쿠폰_수만_갱신된다(self):
+        self.list_room(self.멤버)
+        self.assertEqual(self.get_room(self.멤버)['members'][0]['coupon'], 0)
+
+        today = datetime.date.today().isoformat()
+        payload = {'name': '쿠폰', 'room_id': self.room.id, 'receiver_id': self.멤버.id,
+                   'start_date': today, 'end_date': today}
+        self.request('post', '/api/v2/coupon/', self.방장, content_type=MULTIPART_CONTENT,
+                     data={'payload': json.dumps(payload)})
+        self.assertEqual(self.get_room(self.멤버)['members'][0]['coupon'], 1)
+        with self.assertNumQueries(0):
+            self.list_room(self.멤버)
+
+        self.request('delete', f'/api/v2/coupon/{Coupon.objects.get().id}', self.멤버)
+        self.assertEqual(self.get_room(self.멤버)['members'][0]['coupon'], 0)
+
+    def test_삭제된_스터디룸은_목록에서_빠진다(self):
+        self.assertEqual(len(self.list_room(self.멤버)), 1)
+        self.request('delete', f'/api/v2/study/room/{self.room.id}', self.방장)
+        self.assertEqual(self.list_room(self.멤버), [])
+
+    def test_commit_후에_버전을_한번_더_올린다(self):
+        namespace = f'room:{self.room.id}'
+        version = versioned_cache.versions([namespace])[namespace]
+        with self.captureOnCommitCallbacks(execute=True):
+            versioned_cache.invalidate(namespace)
+            self.assertEqual(versioned_cache.versions([namespace])[namespace], version + 1)
+        self.assertEqual(versioned_cache.versions([namespace])[namespace], version + 2)
+
+    @override_settings(VERSIONED_CACHE_ALLOW_LOCAL=False)
+    def test_worker_마다_따로인_cache_면_매번_DB_에서_조회한다(self):
+        self.assertFalse(versioned_cache.info()['enabled'])
+        with CaptureQueriesContext(connection) as first:
+            self.list_room(self.멤버)
+        with CaptureQueriesContext(connection) as second:
+            self.list_room(self.멤버)
+        # 인증만 token cache 에서 찾는다
+        self.assertEqual(len(second), len(first) - 1)
+
+        self.request('put', f'/api/v2/study/room/{self.room.id}', self.방장, data={'name': '새이름'})
+        self.assertEqual(self.list_room(self.멤버)[0]['name'], '새이름')
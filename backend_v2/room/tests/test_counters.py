@@ -0,0 +1,118 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from test_plus.test import TestCase
+
+from account.models import Member
+from coupon.counters import add_coupons, room_coupon_counts
+from coupon.models import Coupon, RoomCouponCounter
+from room.models import Room, RoomConfig
+from utils.cache import versioned_cache
+from utils.testing import QueryBudgetMixin, auth_headers
+
+
+# noinspection SpellCheckingInspection
+class RoomCounterTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        versioned_cache.clear()
+        self.방장 = Member.objects.create_user(username='master@ctudy.com', email='master@test', password='test')
+        self.멤버들 = [Member.objects.create_user(username=f'member{i}@ctudy.com', email=f'member{i}@test',
+                                                 password='test') for i in range(3)]
+        self.room = Room.objects.create(name='스터디')
+        RoomConfig.objects.create(room=self.room, master=self.방장)
+        self.today = datetime.date.today()
+
+    def member_count(self):
+        return Room.objects.get(id=self.room.id).member_count
+
+    def counters(self):
+        return room_coupon_counts(self.room, self.today)
+
+    def create_coupons(self, receiver, count=1, **kwargs):
+        data = {'name': '쿠폰', 'room': self.room, 'sender': self.방장, 'receiver': receiver,
+                'start_date': self.today, 'end_date': self.today, **kwargs}
+        coupons = Coupon.objects.bulk_create([Coupon(**data) for _ in range(count)])
+        add_coupons(coupons)
+        return coupons
+
+    def test_멤버를_추가하고_빼면_member_count_가_바뀐다(self):
+        멤버1, 멤버2, 멤버3 = self.멤버들
+        self.room.members.add(멤버1, 멤버2)
+        self.room.members.add(멤버1)
+        self.assertEqual(self.member_count(), 2)
+
+        # 멤버가 아닌 회원을 빼도 줄지 않는다
+        self.room.members.remove(멤버2, 멤버3)
+        self.assertEqual(self.member_count(), 1)
+
+        다른방 = Room.objects.create(name='다른 스터디')
+        멤버3.room_set.add(self.room, 다른방)
+        self.assertEqual(self.member_count(), 2)
+        self.assertEqual(Room.objects.get(id=다른방.id).member_count, 1)
+
+        멤버3.delete()
+        self.assertEqual(self.member_count(), 1)
+        self.assertEqual(Room.objects.get(id=다른방.id).member_count, 0)
+
+        self.room.members.clear()
+        self.assertEqual(self.member_count(), 0)
+
+    def test_오늘_사용_가능한_쿠폰만_센다(self):
+        멤버1, 멤버2, _ = self.멤버들
+        self.room.members.add(멤버1, 멤버2)
+        self.assertEqual(room_coupon_counts(Room.objects.get(id=self.room.id)), {})
+
+        self.create_coupons(멤버1, 2)
+        self.create_coupons(멤버1, is_use=True)
+        self.create_coupons(멤버2, end_date=self.today - datetime.timedelta(days=1))
+        self.create_coupons(멤버2, start_date=self.today + datetime.timedelta(days=1),
+                            end_date=self.today + datetime.timedelta(days=1))
+        self.assertEqual(self.counters(), {멤버1.id: 2})
+
+        # 날짜가 바뀌어도 다시 집계하지 않고 카운터만 읽는다
+        tomorrow = self.today + datetime.timedelta(days=1)
+        with self.assertNumQueries(1):
+            self.assertEqual(room_coupon_counts(self.room, tomorrow), {멤버2.id: 1})
+
+    def test_탈퇴한_회원이_보낸_쿠폰은_카운터에서_빠진다(self):
+        멤버1, 멤버2, _ = self.멤버들
+        self.room.members.add(멤버1, 멤버2)
+        self.create_coupons(멤버1, 2)
+        self.create_coupons(멤버1, sender=멤버2)
+
+        멤버2.delete()
+        self.assertEqual(self.counters(), {멤버1.id: 2})
+
+    def test_쿠폰을_사용하거나_탈퇴하면_카운터가_줄어든다(self):
+        멤버1, 멤버2, _ = self.멤버들
+        self.room.members.add(멤버1, 멤버2)
+        coupon, _ = self.create_coupons(멤버1, 2)
+        self.create_coupons(멤버2)
+        headers = {member.id: auth_headers(member) for member in (멤버1, 멤버2)}
+
+        res = self.client.delete(path=f'/api/v2/coupon/{coupon.id}', **headers[멤버1.id])
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.counters(), {멤버1.id: 1, 멤버2.id: 1})
+
+        res = self.client.delete(path=f'/api/v2/study/room/{self.room.id}/member/{멤버2.id}', **headers[멤버2.id])
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.counters(), {멤버1.id: 1})
+        self.assertEqual(self.member_count(), 1)
+
+    def test_reconcile_counters_가_카운터를_다시_집계한다(self):
+        멤버1, 멤버2, _ = self.멤버들
+        self.room.members.add(멤버1, 멤버2)
+        self.create_coupons(멤버1, 2)
+        expired = self.today - datetime.timedelta(days=1)
+        RoomCouponCounter.objects.create(room=self.room, receiver=멤버2, start_date=expired, end_date=expired, count=1)
+        Room.objects.filter(id=self.room.id).update(member_count=10)
+        RoomCouponCounter.objects.filter(room=self.room, receiver=멤버1).update(count=5)
+
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('fixed member_count of 1, coupon counters of 1', out.getvalue())
+        self.assertEqual(self.member_count(), 2)
+        self.assertEqual(self.counters(), {멤버1.id: 2})
+        self.assertFalse(RoomCouponCounter.objects.filter(room=self.room, end_date=expired).exists())
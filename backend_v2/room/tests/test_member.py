@@ -0,0 +1,82 @@
+import datetime
+import math
+from unittest import mock
+
+from django.db import connection
+from test_plus.test import TestCase
+
+from account.models import Member
+from coupon.models import Coupon
+from room.apis.member_api import join_member
+from room.models import Room, RoomConfig, UserRoom
+from utils.testing import QueryBudgetMixin, auth_headers
+
+
+# noinspection SpellCheckingInspection
+class MemberApiTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.방장 = Member.objects.create_user(username='master@ctudy.com', email='master@test', password='test', name='방장')
+        self.headers = auth_headers(self.방장)
+        self.room = Room.objects.create(name='스터디')
+        RoomConfig.objects.create(room=self.room, master=self.방장)
+
+    def list_member(self, **params):
+        res = self.client.get(path='/api/v2/study/room/member/', data=params, **self.headers)
+        self.assertEqual(res.status_code, 200)
+        return [member['username'] for member in res.json()['response']['items']]
+
+    def test_스터디룸_멤버를_제외하고_검색한다(self):
+        멤버 = Member.objects.create_user(username='member@ctudy.com', email='a@test', password='test')
+        Member.objects.create_user(username='guest@ctudy.com', email='b@test', password='test')
+        self.room.members.add(멤버)
+
+        self.assertCountEqual(self.list_member(search='ctudy'), ['member@ctudy.com', 'guest@ctudy.com'])
+        self.assertEqual(self.list_member(search='ctudy', room_id=self.room.id), ['guest@ctudy.com'])
+
+    def test_스터디룸_멤버_수와_무관하게_쿼리_수가_일정하다(self):
+        self.room.members.add(*Member.objects.bulk_create([
+            Member(username=f'member{i}@ctudy.com', email=f'member{i}@test') for i in range(200)
+        ]))
+        Member.objects.create_user(username='guest@ctudy.com', email='guest@test', password='test')
+        self.list_member(search='ctudy', room_id=self.room.id)
+
+        # COUNT + 페이지 조회
+        with self.assertNumQueries(2):
+            self.assertEqual(self.list_member(search='ctudy', room_id=self.room.id), ['guest@ctudy.com'])
+
+    def test_멤버_수와_무관하게_한번에_추가하고_삭제한다(self):
+        self.list_member(search='ctudy')
+        for count in (10, 1000):
+            members = Member.objects.bulk_create([
+                Member(username=f'member{count}-{i}@ctudy.com', email=f'member{count}-{i}@test') for i in range(count)
+            ])
+            member_ids = [member.id for member in members]
+            coupons = Coupon.objects.bulk_create([
+                Coupon(name='쿠폰', room=self.room, sender=self.방장, receiver=member,
+                       start_date=datetime.date.today(), end_date=datetime.date.today()) for member in members
+            ])
+
+            # 스터디룸 권한, SAVEPOINT, 새 멤버 조회, 멤버와 UserRoom INSERT, member_count, RELEASE
+            # (SQLite 는 변수 수 제한으로 INSERT 를 나눠 실행한다)
+            user_room_fields = [field for field in UserRoom._meta.concrete_fields if not field.primary_key]
+            inserts = (math.ceil(count / connection.ops.bulk_batch_size(['room_id', 'member_id'], member_ids)) +
+                       math.ceil(count / connection.ops.bulk_batch_size(user_room_fields, member_ids)))
+            with self.assertNumQueries(5 + inserts), mock.patch.object(join_member, 'query_budget', 5 + inserts):
+                res = self.client.post(path=f'/api/v2/study/room/member/{self.room.id}',
+                                       data={'member_list': member_ids + [self.방장.id]},
+                                       content_type='application/json', **self.headers)
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(Room.objects.get(id=self.room.id).member_count, count)
+            self.assertEqual(UserRoom.objects.filter(room=self.room, role=UserRoom.MEMBER).count(), count)
+
+            # 스터디룸 권한, SAVEPOINT, 스터디룸 잠금, 쿠폰 카운터 DELETE, 쿠폰 DELETE, 멤버 DELETE, UserRoom DELETE,
+            # member_count, RELEASE
+            with self.assertNumQueries(9):
+                res = self.client.delete(path=f'/api/v2/study/room/member/{self.room.id}',
+                                         data={'member_list': member_ids},
+                                         content_type='application/json', **self.headers)
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(Room.objects.get(id=self.room.id).member_count, 0)
+            self.assertFalse(UserRoom.objects.filter(room=self.room, role=UserRoom.MEMBER).exists())
+            self.assertFalse(Coupon.objects.filter(id__in=[coupon.id for coupon in coupons]).exists())
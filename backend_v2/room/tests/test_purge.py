@@ -0,0 +1,97 @@
+import datetime
+import os
+import tempfile
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import override_settings
+from test_plus.test import TestCase
+
+from account.models import Member
+from coupon.counters import add_coupons
+from coupon.models import Coupon, RoomCouponCounter
+from room.apis.room_api import get_room_list
+from room.models import Room, RoomConfig
+from room.purge import purge_stats
+from utils import metrics
+from utils.cache import versioned_cache
+
+
+# noinspection SpellCheckingInspection
+class RoomPurgeTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        versioned_cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.media_root = media_root.name
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.방장 = Member.objects.create_user(username='master@ctudy.com', email='master@test', password='test')
+        self.멤버들 = [Member.objects.create_user(username=f'member{i}@ctudy.com', email=f'member{i}@test',
+                                                 password='test') for i in range(3)]
+        self.now = datetime.datetime.now()
+
+    def create_room(self, deleted_days=None, coupons=0):
+        room = Room.objects.create(name='스터디', is_deleted=deleted_days is not None,
+                                   deleted_time=self.now - datetime.timedelta(days=deleted_days or 0))
+        room.banner.save('banner.png', ContentFile(b'banner'), save=True)
+        RoomConfig.objects.create(room=room, master=self.방장)
+        room.members.add(*self.멤버들)
+        created = []
+        for i in range(coupons):
+            coupon = Coupon(name='쿠폰', room=room, sender=self.방장, receiver=self.멤버들[i % 3],
+                            start_date=self.now.date(), end_date=self.now.date())
+            coupon.image.save('coupon.png', ContentFile(b'coupon'), save=True)
+            created.append(coupon)
+        add_coupons(created)
+        return room
+
+    def media_exists(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+    def test_보관_기간이_지난_스터디룸만_batch_단위로_삭제한다(self):
+        오래된방 = self.create_room(deleted_days=40, coupons=5)
+        최근삭제한방 = self.create_room(deleted_days=1, coupons=1)
+        방 = self.create_room(coupons=1)
+        images = list(Coupon.objects.filter(room=오래된방).values_list('image', flat=True))
+        before = purge_stats()
+
+        out = StringIO()
+        call_command('purge_rooms', '--once', '--batch-size', '2', '--pause', '0', stdout=out)
+        self.assertIn('purged 1 room(s)', out.getvalue())
+
+        self.assertFalse(Room.objects.filter(id=오래된방.id).exists())
+        self.assertFalse(Coupon.objects.filter(room_id=오래된방.id).exists())
+        self.assertFalse(RoomConfig.objects.filter(room_id=오래된방.id).exists())
+        self.assertFalse(RoomCouponCounter.objects.filter(room_id=오래된방.id).exists())
+        self.assertFalse(Room.members.through.objects.filter(room_id=오래된방.id).exists())
+        self.assertFalse(self.media_exists(오래된방.banner.name))
+        self.assertFalse(any(self.media_exists(image) for image in images))
+        self.assertFalse(self.media_exists(f'public/coupon/{오래된방.id}'))
+
+        for room in (최근삭제한방, 방):
+            self.assertTrue(Room.objects.filter(id=room.id).exists())
+            self.assertEqual(Coupon.objects.filter(room=room).count(), 1)
+            self.assertTrue(self.media_exists(room.banner.name))
+        self.assertEqual(Member.objects.count(), 4)
+
+        stats = purge_stats()
+        self.assertEqual(stats['rooms'] - before['rooms'], 1)
+        self.assertEqual(stats['coupons'] - before['coupons'], 5)
+        self.assertEqual(stats['members'] - before['members'], 3)
+        self.assertEqual(stats['files'] - before['files'], 6)
+        self.assertEqual(stats['pending'], 0)
+        self.assertIn('ctudy_room_purge_rooms_total', metrics.render())
+
+    def test_정리된_스터디룸은_cache_된_목록에서도_빠진다(self):
+        방 = self.create_room(coupons=1)
+        self.assertEqual([room['id'] for room in get_room_list(self.방장.id)], [방.id])
+
+        # 정리하면서 멤버, 방장의 스터디룸 목록 cache 도 무효화한다
+        Room.objects.filter(id=방.id).update(is_deleted=True, deleted_time=self.now - datetime.timedelta(days=40))
+        call_command('purge_rooms', '--once', '--pause', '0', stdout=StringIO())
+        self.assertEqual(get_room_list(self.방장.id), [])
@@ -0,0 +1,189 @@
+import datetime
+import json
+
+from django.db import connection
+from django.test.client import MULTIPART_CONTENT
+from django.test.utils import CaptureQueriesContext
+from test_plus.test import TestCase
+
+from account.models import Member
+from coupon.counters import add_coupons
+from coupon.models import Coupon
+from room.membership import sync_user_rooms
+from room.models import Room, RoomConfig, UserRoom
+from utils.cache import versioned_cache
+from utils.testing import QueryBudgetMixin, auth_headers
+
+
+# noinspection SpellCheckingInspection
+class RoomApiTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        versioned_cache.clear()
+        self.방장 = Member.objects.create_user(username='방장', email='master@test', password='test', name='방장')
+        self.일반사용자 = Member.objects.create_user(username='일반사용자', email='test@test', password='test')
+        self.headers = auth_headers(self.일반사용자)
+
+    def create_rooms(self, count):
+        rooms = Room.objects.bulk_create([Room(name=f'스터디 {i}', member_count=1) for i in range(count)])
+        RoomConfig.objects.bulk_create([RoomConfig(room=room, master=self.방장) for room in rooms])
+        Room.members.through.objects.bulk_create([
+            Room.members.through(room_id=room.id, member_id=self.일반사용자.id) for room in rooms
+        ])
+        sync_user_rooms([room.id for room in rooms])
+
+    def list_room(self):
+        res = self.client.get(path='/api/v2/study/room/', **self.headers)
+        self.assertEqual(res.status_code, 200)
+        return res.json()['response']
+
+    def test_스터디룸_목록을_조회한다(self):
+        self.create_rooms(1)
+        room = Room.objects.get()
+        room.members.add(self.방장, Member.objects.create_user(username='멤버', email='member@test', password='test'))
+
+        result = self.list_room()
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]['id'], room.id)
+        self.assertEqual(result[0]['member_count'], 4)
+        self.assertEqual(result[0]['master_name'], '방장')
+        self.assertEqual(result[0]['master_username'], '방장')
+
+    def test_멤버와_방장인_스터디룸을_UserRoom_에서_조회한다(self):
+        self.create_rooms(2)
+        멤버인방, 삭제된방 = Room.objects.order_by('id')
+        삭제된방.is_deleted = True
+        삭제된방.save(update_fields=['is_deleted'])
+        방장인방 = Room.objects.create(name='내 스터디')
+        RoomConfig.objects.create(room=방장인방, master=self.일반사용자)
+        # 방장이면서 멤버여도 한 번만 조회된다
+        방장인방.members.add(self.일반사용자)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self.list_room()
+        self.assertEqual([room['id'] for room in result], [멤버인방.id, 방장인방.id])
+        sql = next(query['sql'] for query in queries if 'room_userroom' in query['sql'])
+        self.assertNotIn('room_room_members', sql)
+        self.assertNotIn('room_roomconfig', sql)
+        self.assertEqual(UserRoom.objects.get(user=self.일반사용자, room=방장인방).role, UserRoom.MASTER)
+        self.assertFalse(UserRoom.objects.filter(room=삭제된방).exists())
+
+    def test_스터디룸을_만들면_멤버를_한번에_추가한다(self):
+        멤버 = Member.objects.create_user(username='멤버', email='member@test', password='test')
+        payload = {'name': '새 스터디', 'member_list': [멤버.id, self.방장.id, self.일반사용자.id, 멤버.id + 100]}
+        res = self.client.post(path='/api/v2/study/room/', data={'payload': json.dumps(payload)},
+                               content_type=MULTIPART_CONTENT, **self.headers)
+        self.assertEqual(res.status_code, 200)
+
+        room = Room.objects.get(id=res.json()['response']['id'])
+        self.assertEqual(room.roomconfig.master, self.일반사용자)
+        self.assertCountEqual(room.members.values_list('id', flat=True), [멤버.id, self.방장.id])
+        self.assertEqual(room.member_count, 2)
+        self.assertEqual(self.list_room()[0]['member_count'], 3)
+
+    def test_스터디룸_개수와_무관하게_쿼리_수가_일정하다(self):
+        self.create_rooms(5)
+        self.list_room()
+
+        # cache 가 비어 있으면 스터디룸 id 목록과 스터디룸 요약을 한 번씩 조회한다
+        versioned_cache.clear()
+        with self.assertNumQueries(2):
+            self.assertEqual(len(self.list_room()), 5)
+
+        self.create_rooms(495)
+        versioned_cache.clear()
+        with self.assertNumQueries(2):
+            self.assertEqual(len(self.list_room()), 500)
+
+    def test_스터디룸_멤버별_쿠폰_수를_조회한다(self):
+        self.create_rooms(1)
+        room = Room.objects.get()
+        멤버 = Member.objects.create_user(username='멤버', email='member@test', password='test')
+        room.members.add(멤버)
+
+        today = datetime.date.today()
+        created = Coupon.objects.bulk_create([
+            Coupon(name='쿠폰', room=room, sender=self.방장, receiver=멤버,
+                   start_date=today, end_date=today),
+            Coupon(name='쿠폰', room=room, sender=self.방장, receiver=멤버,
+                   start_date=today, end_date=today),
+            Coupon(name='사용한 쿠폰', room=room, sender=self.방장, receiver=멤버,
+                   start_date=today, end_date=today, is_use=True),
+            Coupon(name='만료된 쿠폰', room=room, sender=self.방장, receiver=self.일반사용자,
+                   start_date=today - datetime.timedelta(days=2), end_date=today - datetime.timedelta(days=1)),
+            Coupon(name='쿠폰', room=room, sender=멤버, receiver=self.방장,
+                   start_date=today, end_date=today),
+        ])
+        # 쿠폰 API 처럼 카운터에 반영한다
+        add_coupons(created)
+
+        res = self.client.get(path=f'/api/v2/study/room/{room.id}', **self.headers)
+        self.assertEqual(res.status_code, 200)
+        result = res.json()['response']
+        coupons = {member['username']: member['coupon'] for member in result['members']}
+        self.assertEqual(coupons, {'멤버': 2, '일반사용자': 0})
+        self.assertEqual(result['master']['coupon'], 1)
+
+    def test_스터디룸_멤버_수와_무관하게_쿼리_수가_일정하다(self):
+        self.create_rooms(1)
+        room = Room.objects.get()
+        path = f'/api/v2/study/room/{room.id}'
+        self.client.get(path=path, **self.headers)
+
+        versioned_cache.clear()
+        with self.assertNumQueries(4):
+            res = self.client.get(path=path, **self.headers)
+        self.assertEqual(len(res.json()['response']['members']), 1)
+
+        room.members.add(*Member.objects.bulk_create([
+            Member(username=f'멤버{i}', email=f'member{i}@test') for i in range(20)
+        ]))
+        versioned_cache.clear()
+        with self.assertNumQueries(4):
+            res = self.client.get(path=path, **self.headers)
+        self.assertEqual(len(res.json()['response']['members']), 21)
+
+
+# noinspection SpellCheckingInspection
+class RoomAccessTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        versioned_cache.clear()
+        self.방장 = Member.objects.create_user(username='방장', email='master@test', password='test')
+        self.멤버 = Member.objects.create_user(username='멤버', email='member@test', password='test')
+        self.외부인 = Member.objects.create_user(username='외부인', email='guest@test', password='test')
+        self.room = Room.objects.create(name='스터디')
+        RoomConfig.objects.create(room=self.room, master=self.방장)
+        self.room.members.add(self.멤버)
+        self.headers = {member.id: auth_headers(member) for member in (self.방장, self.멤버, self.외부인)}
+
+    def update_room(self, member, room_id=None):
+        return self.client.put(path=f'/api/v2/study/room/{room_id or self.room.id}', data={'name': '새이름'},
+                               content_type='application/json', **self.headers[member.id])
+
+    def out_room(self, member):
+        return self.client.delete(path=f'/api/v2/study/room/{self.room.id}/member/{member.id}',
+                                  **self.headers[member.id])
+
+    def test_방장_권한은_스터디룸을_한번에_조회한다(self):
+        self.update_room(self.방장)
+
+        # 스터디룸 + RoomConfig + 멤버 여부, UPDATE
+        with self.assertNumQueries(2):
+            res = self.update_room(self.방장)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(Room.objects.get(id=self.room.id).name, '새이름')
+
+    def test_방장이_아니면_변경할_수_없다(self):
+        self.assertEqual(self.update_room(self.멤버).status_code, 401)
+        self.assertEqual(self.update_room(self.방장, room_id='abc').status_code, 404)
+
+        self.room.is_deleted = True
+        self.room.save(update_fields=['is_deleted'])
+        self.assertEqual(self.update_room(self.방장).status_code, 404)
+
+    def test_멤버가_아니면_나갈_수_없다(self):
+        self.assertEqual(self.out_room(self.외부인).status_code, 404)
+        self.assertEqual(self.out_room(self.방장).status_code, 400)
+        self.assertEqual(self.out_room(self.멤버).status_code, 200)
+        self.assertFalse(self.room.members.filter(id=self.멤버.id).exists())
@@ -0,0 +1,90 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from test_plus.test import TestCase
+
+from account.models import Member
+from room.models import Room, RoomConfig, UserRoom
+from utils.cache import versioned_cache
+from utils.testing import QueryBudgetMixin, auth_headers
+
+
+# noinspection SpellCheckingInspection
+class UserRoomTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        versioned_cache.clear()
+        self.방장 = Member.objects.create_user(username='master@ctudy.com', email='master@test', password='test')
+        self.멤버들 = [Member.objects.create_user(username=f'member{i}@ctudy.com', email=f'member{i}@test',
+                                                 password='test') for i in range(3)]
+        self.room = Room.objects.create(name='스터디')
+        RoomConfig.objects.create(room=self.room, master=self.방장)
+
+    def user_rooms(self, room=None):
+        return dict(UserRoom.objects.filter(room=room or self.room).values_list('user_id', 'role'))
+
+    def test_멤버와_방장이_바뀌면_UserRoom_이_바뀐다(self):
+        멤버1, 멤버2, 멤버3 = self.멤버들
+        self.room.members.add(멤버1, 멤버2)
+        멤버3.room_set.add(self.room)
+        self.assertEqual(self.user_rooms(), {self.방장.id: 'master', 멤버1.id: 'member', 멤버2.id: 'member',
+                                             멤버3.id: 'member'})
+
+        self.room.members.remove(멤버2)
+        멤버3.room_set.clear()
+        self.assertEqual(self.user_rooms(), {self.방장.id: 'master', 멤버1.id: 'member'})
+
+        # 방장이 바뀌면 이전 방장은 멤버가 아니므로 빠진다
+        self.room.roomconfig.master = 멤버1
+        self.room.roomconfig.save()
+        self.assertEqual(self.user_rooms(), {멤버1.id: 'master'})
+
+        self.room.members.clear()
+        self.assertEqual(self.user_rooms(), {멤버1.id: 'master'})
+
+        self.room.is_deleted = True
+        self.room.save(update_fields=['is_deleted'])
+        self.assertEqual(self.user_rooms(), {})
+
+    def test_방장을_넘기면_role_만_바뀐다(self):
+        멤버 = self.멤버들[0]
+        self.room.members.add(멤버)
+        joined_at = UserRoom.objects.get(room=self.room, user=멤버).joined_at
+
+        res = self.client.put(path=f'/api/v2/study/room/{self.room.id}', data={'master': 멤버.id},
+                              content_type='application/json', **auth_headers(self.방장))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.user_rooms(), {self.방장.id: 'member', 멤버.id: 'master'})
+        self.assertEqual(UserRoom.objects.get(room=self.room, user=멤버).joined_at, joined_at)
+        self.assertEqual(RoomConfig.objects.get(room=self.room).master, 멤버)
+        self.assertEqual(list(Room.objects.get(id=self.room.id).members.all()), [self.방장])
+
+    def test_check_user_rooms_가_불일치를_찾고_고친다(self):
+        멤버1, 멤버2, 멤버3 = self.멤버들
+        self.room.members.add(멤버1, 멤버2)
+        UserRoom.objects.filter(user=멤버1).delete()
+        UserRoom.objects.filter(user=멤버2).update(role=UserRoom.MASTER)
+        UserRoom.objects.create(room=self.room, user=멤버3, role=UserRoom.MEMBER)
+
+        with self.assertRaisesMessage(CommandError, '1 rooms: missing 1, extra 1, wrong role 1'):
+            call_command('check_user_rooms', stdout=StringIO())
+
+        out = StringIO()
+        call_command('check_user_rooms', '--fix', stdout=out)
+        self.assertIn(f'room {self.room.id} user {멤버1.id}: missing member', out.getvalue())
+        self.assertEqual(self.user_rooms(), {self.방장.id: 'master', 멤버1.id: 'member', 멤버2.id: 'member'})
+        call_command('check_user_rooms', stdout=StringIO())
+
+    def test_backfill_user_rooms_가_UserRoom_을_채운다(self):
+        self.room.members.add(*self.멤버들)
+        삭제된방 = Room.objects.create(name='삭제된 스터디')
+        RoomConfig.objects.create(room=삭제된방, master=self.방장)
+        Room.objects.filter(id=삭제된방.id).update(is_deleted=True)
+        UserRoom.objects.filter(room=self.room).delete()
+
+        out = StringIO()
+        call_command('backfill_user_rooms', '--batch-size', '1', stdout=out)
+        self.assertIn('2 rooms: created 4, deleted 1, role updated 0', out.getvalue())
+        self.assertEqual(self.user_rooms(), {self.방장.id: 'master', **{멤버.id: 'member' for 멤버 in self.멤버들}})
+        self.assertEqual(self.user_rooms(삭제된방), {})
@@ -1,4 +1,18 @@
 #!/bin/bash
+# worker 별 metrics 파일은 서버를 시작할 때 비운다
+export METRICS_DIR=${METRICS_DIR:-/tmp/ctudy_metrics}
+rm -rf "$METRICS_DIR" && mkdir -p "$METRICS_DIR"
+# cache 는 worker 와 pod 가 공유해야 하므로 운영에서는 REDIS_URL 이 필요하다 (settings 의 Cache 참고)
+if [ "${MODE:-DEV}" != "DEV" ] && [ -z "$REDIS_URL" ]; then
+  echo "REDIS_URL is required in $MODE mode" >&2
+  exit 1
+fi
+# 비밀번호 찾기 메일 발송 worker (종료되면 다시 시작한다)
+while true; do python manage.py send_outbox; sleep 5; done &
+# 삭제한 스터디룸 정리 worker (ROOM_PURGE_INTERVAL 마다 정리한다)
+while true; do python manage.py purge_rooms; sleep 60; done &
+# 하루에 한 번 카운터를 다시 맞추고 기간이 끝난 쿠폰 카운터를 정리한다
+while true; do python manage.py reconcile_counters; sleep 86400; done &
 gunicorn --bind 0.0.0.0:8888 settings.asgi:application -k uvicorn.workers.UvicornWorker -w 8 &
 nginx
 
@@ -1,3 +1,4 @@
+from django.db import connection, DatabaseError
 from ninja import NinjaAPI
 
 from room.apis.room_api import router as room_router
@@ -6,6 +7,9 @@ from account.apis.account_api import router as account_router
 from coupon.apis.coupon_api import router as coupon_router
 from utils.base import ORJSONRenderer
 from utils.error import CtudyException
+from utils.metrics import has_metrics_token
+from utils.postgresql_pool.pool import pool_stats
+from utils.query_budget import query_budget
 
 api = NinjaAPI(version='2.0.0', title="CTUDY API", description="Ctudy Backend RESTful API", renderer=ORJSONRenderer())
 
@@ -15,6 +19,23 @@ def ctudy_exception(request, exc):
     return api.create_response(request, exc.message, status=exc.code)
 
 
+@api.get('/health/', include_in_schema=False)
+@query_budget(1)
+def health(request):
+    """
+    DB 연결 상태 (connection pool 상태는 METRICS_TOKEN 을 보낸 요청에만 worker 프로세스 단위로 반환한다)
+    """
+    try:
+        connection.ensure_connection()
+        database = connection.is_usable()
+    except DatabaseError:
+        database = False
+    data = {'database': database}
+    if has_metrics_token(request):
+        data['pool'] = pool_stats()
+    return api.create_response(request, data, status=200 if database else 500)
+
+
 # User
 api.add_router('/account/', account_router)
 
@@ -1,24 +1,100 @@
+import copy
+import datetime
+import threading
+import time
 from functools import wraps
 
-from django.http import Http404
-from django.shortcuts import get_object_or_404
+from cachetools import TLRUCache
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
 from ninja.security import HttpBearer
 from oauth2_provider.models import AccessToken
 
-from room.models import Room
+from room.models import Room, UserRoom
 from utils.error import auth_error_return, not_found_error_return, CtudyException
 
 
+class TokenCache:
+    """
+    워커 프로세스 단위 access token 캐시
+    항목의 수명은 AUTH_TOKEN_CACHE_TTL 과 토큰 만료 시각 중 먼저 오는 쪽을 따른다.
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._cache = TLRUCache(maxsize=maxsize, ttu=self._ttu, timer=time.time)
+
+    def _ttu(self, token, value, now):
+        return min(now + self.ttl, value[1])
+
+    def get(self, token):
+        with self._lock:
+            value = self._cache.get(token)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # 요청마다 수정될 수 있으므로 캐시된 인스턴스를 그대로 넘기지 않는다
+        return copy.copy(value[0])
+
+    def set(self, token, user, expires):
+        with self._lock:
+            self._cache[token] = (copy.copy(user), expires.timestamp())
+
+    def evict(self, token):
+        with self._lock:
+            self._cache.pop(token, None)
+
+    def evict_user(self, user_id):
+        with self._lock:
+            tokens = [token for token, value in list(self._cache.items()) if value[0].id == user_id]
+            for token in tokens:
+                self._cache.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._cache),
+                'maxsize': self.maxsize
+            }
+
+
+token_cache = TokenCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_TOKEN_CACHE_TTL)
+
+
+def fetch_user(token):
+    """
+    DB 에서 access token 의 사용자를 찾아 캐시에 저장한다. 만료된 토큰이면 None 을 반환한다.
+    """
+    try:
+        access_token = AccessToken.objects.select_related('user').get(token=token)
+    except AccessToken.DoesNotExist:
+        raise CtudyException(401, auth_error_return)
+    if datetime.datetime.now() >= access_token.expires:
+        return None
+    token_cache.set(token, access_token.user, access_token.expires)
+    return access_token.user
+
+
 class AuthBearer(HttpBearer):
     def authenticate(self, request, token):
-        try:
-            access_token = get_object_or_404(AccessToken, token=token)
-            import datetime
-            if token == access_token.token and datetime.datetime.now() < access_token.expires:
-                request.user = access_token.user
-                return token
-        except Http404:
-            raise CtudyException(401, auth_error_return)
+        user = token_cache.get(token) or fetch_user(token)
+        if user is None:
+            return None
+
+        request.user = user
+        return token
 
 
 def auth_check(ori_func):
@@ -30,14 +106,43 @@ def auth_check(ori_func):
     return inner
 
 
-def master_check(ori_func):
-    @wraps(ori_func)
-    def inner(request, **kwargs):
-        room = Room.objects.filter(id=kwargs['room_id'])
-        if not room.exists():
-            raise CtudyException(404, not_found_error_return)
-        room = room[0]
-        if request.user != room.roomconfig.master:
-            raise CtudyException(401, auth_error_return)
-        return ori_func(request, **kwargs)
-    return inner
+ROOM_ACCESS_MODES = ('member', 'master')
+
+
+def load_room(room_id, user_id):
+    """
+    스터디룸, RoomConfig, 회원의 UserRoom role (없으면 None)을 한 번의 쿼리로 조회한다
+    """
+    role = UserRoom.objects.filter(room_id=OuterRef('pk'), user_id=user_id).values('role')[:1]
+    try:
+        return (Room.objects.select_related('roomconfig')
+                .annotate(role=Subquery(role))
+                .filter(id=room_id, is_deleted=False)
+                .first())
+    except ValueError:
+        return None
+
+
+def room_access(mode):
+    """
+    room_id 스터디룸에 접근할 수 있는지 확인하고 조회한 스터디룸을 request.room 에 담는다 (auth_check 아래에 둔다)
+    member: 방장 또는 멤버, master: 방장
+    """
+    if mode not in ROOM_ACCESS_MODES:
+        raise ValueError(f'room_access mode must be one of {ROOM_ACCESS_MODES}')
+
+    def decorator(ori_func):
+        @wraps(ori_func)
+        def inner(request, **kwargs):
+            room = load_room(kwargs['room_id'], request.user.id)
+            if room is None:
+                raise CtudyException(404, not_found_error_return)
+            room.is_master = room.role == UserRoom.MASTER
+            if mode == 'master' and not room.is_master:
+                raise CtudyException(401, auth_error_return)
+            if mode == 'member' and room.role is None:
+                raise CtudyException(404, not_found_error_return)
+            request.room = room
+            return ori_func(request, **kwargs)
+        return inner
+    return decorator
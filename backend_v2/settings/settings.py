@@ -11,8 +11,11 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 import json
 import os
+import sys
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 ENV = os.environ.get('MODE', 'DEV')
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -52,6 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'utils.metrics.metrics_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,7 +63,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'corsheaders.middleware.CorsMiddleware'
+    'corsheaders.middleware.CorsMiddleware',
+    'utils.db_router.replica_sticky_middleware'
 ]
 
 NINJA_EXTRA = {
@@ -118,37 +123,103 @@ if ENV == 'DEV':
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+        },
+        # 로컬에서 replica 를 대신하는 SQLite 파일 (DB_REPLICAS=replica 일 때 사용)
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db_replica.sqlite3',
         }
-
     }
+    DATABASE_REPLICAS = [alias for alias in os.environ.get('DB_REPLICAS', '').split(',') if alias]
 
 elif ENV == 'BARE_METAL':
     with open('./settings/secret.json', 'r', encoding='utf-8') as f:
         secret = json.load(f)
 
+    # 연결은 요청이 끝나면 utils.postgresql_pool 의 pool 로 돌아간다 (CONN_MAX_AGE = 0)
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
+            'ENGINE': 'utils.postgresql_pool',
             'NAME': secret['DB']['NAME'],
             'HOST': secret['DB']['HOST'],
             'PORT': secret['DB']['PORT'],
             'USER': secret['DB']['USER'],
             'PASSWORD': secret['DB']['PASSWORD'],
+            'CONN_MAX_AGE': 0,
+            'POOL': secret['DB'].get('POOL', {}),
         }
     }
+    # replica 는 HOST, PORT 만 다르고 나머지 설정은 default 와 같다
+    for index, replica in enumerate(secret['DB'].get('REPLICAS', [])):
+        DATABASES[f'replica_{index}'] = {**DATABASES['default'], 'HOST': replica['HOST'], 'PORT': replica['PORT'],
+                                         'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
 
 elif ENV == 'K8S':
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
+            'ENGINE': 'utils.postgresql_pool',
             'NAME': os.environ['DB_NAME'],
             'HOST': os.environ['DB_HOST'],
             'PORT': os.environ['DB_PORT'],
             'USER': os.environ['DB_USER'],
             'PASSWORD': os.environ['DB_PASSWORD'],
+            'CONN_MAX_AGE': 0,
+            'POOL': {
+                'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                'MAX_LIFETIME': int(os.environ.get('DB_POOL_MAX_LIFETIME', 60 * 30)),
+                'HEALTH_CHECK_INTERVAL': int(os.environ.get('DB_POOL_HEALTH_CHECK_INTERVAL', 30)),
+            },
+        }
+    }
+    # DB_REPLICA_HOSTS=host1:5432,host2:5432
+    for index, replica in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+        host, _, port = replica.partition(':')
+        DATABASES[f'replica_{index}'] = {**DATABASES['default'], 'HOST': host, 'PORT': port or DATABASES['default']['PORT'],
+                                         'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['utils.db_router.ReplicaRouter']
+# 데이터를 변경한 사용자가 default 에서 조회하는 시간(초)
+REPLICA_STICKY_SECONDS = 5
+
+# Cache
+# L2 cache 와 replica sticky 표시는 worker 가 공유해야 하므로 운영(DEV 가 아닌 MODE)은 REDIS_URL 이 필요하다
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+elif ENV != 'DEV':
+    raise ImproperlyConfigured(f'REDIS_URL is required in {ENV} mode')
+elif os.environ.get('CACHE_DIR'):
+    # 개발용: 로컬에서 여러 worker 를 띄울 때 공유하는 파일 cache
+    # (쓸 때마다 디렉터리 전체를 훑어 정리하고 incr 이 atomic 하지 않으므로 운영에서 사용하지 않는다)
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
         }
     }
 
+# utils.cache.versioned_cache (L1 은 worker 메모리, L2 는 VERSIONED_CACHE_ALIAS)
+VERSIONED_CACHE_ALIAS = 'default'
+VERSIONED_CACHE_L1_SIZE = 10000
+VERSIONED_CACHE_L1_TTL = 10
+VERSIONED_CACHE_TIMEOUT = 60 * 10
+# L2 가 worker 마다 따로인 cache(locmem)여도 versioned_cache 를 사용할지 (아니면 매번 DB 에서 조회한다)
+VERSIONED_CACHE_ALLOW_LOCAL = DEBUG or sys.argv[1:2] == ['test']
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -201,20 +272,18 @@ LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
 
-    'formatters': {
-        'format1': {
-            'format': '[%(asctime)s] %(levelname)s [%(name)s:%(lineno)s] %(message)s',
-            'datefmt': '%d/%b/%Y %H:%M:%S'
-        }
-    },
     'handlers': {
+        # 요청 스레드는 queue 에 넣기만 하고 worker 마다 listener 스레드가 JSON 한 줄씩 기록한다
+        # 여러 worker 가 같은 파일에 쓰므로 rotation 은 lock 파일을 잡은 worker 하나가 한다
         'file': {
             'level': 'DEBUG',
-            'class': 'logging.handlers.RotatingFileHandler',
-            'maxBytes': 1024 * 1024 * 10,
-            'backupCount': 10,
+            '()': 'utils.log.QueueLogHandler',
             'filename': os.path.join(BASE_DIR, 'logs/backend_api.log'),
-            'formatter': 'format1',
+            'max_bytes': 1024 * 1024 * 10,
+            'backup_count': 10,
+            'queue_size': 10000,
+            'sample_window': 60,
+            'sample_burst': 10,
         }
     },
     'loggers': {
@@ -240,6 +309,32 @@ LOGGING = {
 TOKEN_URL = 'http://127.0.0.1:8000/api/v2/o/token/'
 APP_NAME = 'ctudy'
 
+# Access Token Cache (worker 프로세스 단위)
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60
+
+# Email Outbox (account send_outbox 명령)
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 60 * 30
+EMAIL_OUTBOX_LEASE = 60 * 5
+EMAIL_OUTBOX_POLL_INTERVAL = 1
+
+# 삭제한 스터디룸 정리 (room purge_rooms 명령)
+ROOM_PURGE_RETENTION_DAYS = 30
+ROOM_PURGE_BATCH_SIZE = 500
+# batch 사이에 쉬는 시간(초), 정리할 스터디룸을 다시 조회하는 간격(초)
+ROOM_PURGE_BATCH_PAUSE = 0.05
+ROOM_PURGE_INTERVAL = 60 * 60
+
+# API Metrics (/metrics)
+# gunicorn worker 의 히스토그램을 합치기 위한 디렉토리 (없으면 요청을 처리한 worker 의 값만 응답한다)
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_FLUSH_SECONDS = 5
+# /metrics 는 Authorization: Bearer <METRICS_TOKEN> 요청에만 응답한다 (없으면 DEBUG 에서만 응답한다)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
 if ENV == 'DEV':
     with open('./settings/secret.json', 'r', encoding='utf-8') as f:
         secret = json.load(f)
@@ -22,6 +22,7 @@ from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
 from settings.api import api
+from utils.metrics import metrics_view
 
 
 schema_view = get_schema_view(
@@ -50,6 +51,8 @@ urlpatterns = [
     path('api/v2/o/', include('oauth2_provider.urls', namespace='oauth2_provider')),
 
     path('api/v2/', api.urls),
+
+    path('metrics', metrics_view, name='metrics'),
 ]
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -7,12 +7,16 @@ from ninja.renderers import BaseRenderer
 from utils.error import CtudyException, not_found_error_return, server_error_return, auth_error_return
 
 
-def base_api(logger):
+def base_api(logger, envelope=True):
+    """
+    envelope=False 는 응답을 감싸지 않는다 (paginate 응답은 ORJSONRenderer 가 감싼다)
+    """
     def decorator(ori_func):
         @wraps(ori_func)
         def inner(request, **kwargs):
             try:
-                return {'result': True, 'response': ori_func(request, **kwargs)}
+                response = ori_func(request, **kwargs)
+                return {'result': True, 'response': response} if envelope else response
             except Http404 as e:
                 logger.error(e.__str__())
                 raise CtudyException(404, not_found_error_return)
@@ -0,0 +1,177 @@
+"""
+2단계 cache (L1: 프로세스 메모리, L2: CACHES 의 공유 cache)
+
+값은 namespace 버전을 붙인 key 로 저장하고, 데이터가 바뀌면 namespace 버전을 올려 이전 key 를 버린다.
+버전은 항상 L2 에서 읽으므로 L2 가 worker 들이 공유하는 cache(redis, 파일)이면 다른 worker 가 올린 버전도
+바로 반영되고, L1 은 같은 버전의 값을 L2 에서 다시 가져오지 않기 위해서만 사용한다.
+L2 가 worker 마다 따로인 cache(locmem)이면 다른 worker 의 변경을 알 수 없으므로 VERSIONED_CACHE_ALLOW_LOCAL
+(개발, 테스트)이 아니면 cache 를 사용하지 않고 매번 DB 에서 조회한다.
+"""
+import threading
+import time
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+from utils.db_router import is_shared_cache, use_default
+
+
+def initial_version():
+    # L2 에서 버전이 사라져도 이전 버전과 겹치지 않도록 시간으로 시작한다
+    return time.time_ns() // 1000
+
+
+class VersionedCache:
+    def __init__(self, alias='default', l1_size=10000, l1_ttl=10, timeout=600, prefix='vc'):
+        self.alias = alias
+        self.timeout = timeout
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._l1 = TTLCache(maxsize=l1_size, ttl=l1_ttl)
+
+    @property
+    def l2(self):
+        return caches[self.alias]
+
+    @property
+    def enabled(self):
+        return is_shared_cache(self.l2) or settings.VERSIONED_CACHE_ALLOW_LOCAL
+
+    def version_key(self, namespace):
+        return f'{self.prefix}:ns:{namespace}'
+
+    def versions(self, namespaces):
+        """
+        namespace 별 현재 버전 (L2 에 없으면 새로 만든다)
+        """
+        keys = {self.version_key(namespace): namespace for namespace in namespaces}
+        found = self.l2.get_many(list(keys))
+        result = {}
+        for key, namespace in keys.items():
+            version = found.get(key)
+            if version is None:
+                self.l2.add(key, initial_version(), None)
+                version = self.l2.get(key)
+            result[namespace] = version
+        return result
+
+    def bump(self, *namespaces):
+        for namespace in namespaces:
+            key = self.version_key(namespace)
+            try:
+                self.l2.incr(key)
+            except ValueError:
+                self.l2.set(key, initial_version(), None)
+
+    def invalidate(self, *namespaces):
+        """
+        namespace 버전을 올린다. transaction 안이면 commit 후에 한 번 더 올려
+        commit 전에 다른 요청이 이전 데이터로 채운 값을 버린다.
+        """
+        namespaces = [namespace for namespace in namespaces if namespace is not None]
+        if not namespaces or not self.enabled:
+            return
+        self.bump(*namespaces)
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: self.bump(*namespaces))
+
+    def make_key(self, name, versions):
+        return ':'.join([self.prefix, name, *(f'{namespace}@{versions[namespace]}' for namespace in sorted(versions))])
+
+    def get(self, key):
+        with self._lock:
+            value = self._l1.get(key)
+        if value is None:
+            value = self.l2.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._l1[key] = value
+        return value
+
+    def get_many(self, keys):
+        with self._lock:
+            result = {key: self._l1[key] for key in keys if key in self._l1}
+        missing = [key for key in keys if key not in result]
+        if missing:
+            result.update(self.l2.get_many(missing))
+        with self._lock:
+            self.hits += len(result)
+            self.misses += len(keys) - len(result)
+            self._l1.update(result)
+        return result
+
+    def set(self, key, value):
+        self.l2.set(key, value, self.timeout)
+        with self._lock:
+            self._l1[key] = value
+
+    def set_many(self, data):
+        self.l2.set_many(data, self.timeout)
+        with self._lock:
+            self._l1.update(data)
+
+    def get_or_load(self, name, namespaces, loader):
+        """
+        namespaces 버전이 같은 동안 loader 결과를 재사용한다.
+        replica 지연으로 이전 데이터를 새 버전에 저장하지 않도록 loader 는 default DB 에서 조회한다.
+        """
+        if not self.enabled:
+            with use_default():
+                return loader()
+        key = self.make_key(name, self.versions(namespaces))
+        value = self.get(key)
+        if value is None:
+            with use_default():
+                value = loader()
+            self.set(key, value)
+        return value
+
+    def get_many_or_load(self, name, ids, namespace, loader):
+        """
+        id 마다 namespace(id) 버전이 같은 동안 값을 재사용하고, 없는 id 들은 loader(ids) 로 한 번에 조회한다.
+        loader 는 {id: 값} 을 반환한다.
+        """
+        if not self.enabled:
+            with use_default():
+                return loader(list(ids))
+        versions = self.versions([namespace(pk) for pk in ids])
+        keys = {pk: self.make_key(f'{name}:{pk}', {namespace(pk): versions[namespace(pk)]}) for pk in ids}
+        values = self.get_many(list(keys.values()))
+        result = {pk: values[key] for pk, key in keys.items() if key in values}
+        missing = [pk for pk in ids if pk not in result]
+        if missing:
+            with use_default():
+                loaded = loader(missing)
+            self.set_many({keys[pk]: value for pk, value in loaded.items()})
+            result.update(loaded)
+        return result
+
+    def clear(self):
+        self.l2.clear()
+        with self._lock:
+            self._l1.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'misses': self.misses,
+                'l1_size': len(self._l1),
+                'l1_maxsize': self._l1.maxsize,
+            }
+
+
+versioned_cache = VersionedCache(alias=settings.VERSIONED_CACHE_ALIAS,
+                                 l1_size=settings.VERSIONED_CACHE_L1_SIZE,
+                                 l1_ttl=settings.VERSIONED_CACHE_L1_TTL,
+                                 timeout=settings.VERSIONED_CACHE_TIMEOUT)
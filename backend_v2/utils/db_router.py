@@ -0,0 +1,125 @@
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.decorators import sync_and_async_middleware
+
+# read_only 로 표시한 API 를 실행하는 동안 True
+_read_only = ContextVar('read_only_db', default=False)
+
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+# worker 프로세스마다 따로 저장하는 cache backend
+LOCAL_CACHE_BACKENDS = (LocMemCache, DummyCache)
+
+
+def sticky_key(user_id):
+    return f'db_router:sticky:{user_id}'
+
+
+def is_shared_cache(backend):
+    """
+    worker 들이 같은 값을 보는 cache 인지 (locmem, dummy 는 worker 마다 따로 저장한다)
+    """
+    return not isinstance(backend, LOCAL_CACHE_BACKENDS)
+
+
+def replica_enabled():
+    """
+    sticky 표시를 다른 worker 가 보지 못하면 데이터를 변경한 직후의 조회가 replica 로 가므로
+    replica 를 사용할 때는 공유 cache 를 요구한다.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return False
+    backend = caches['default']
+    if not is_shared_cache(backend):
+        raise ImproperlyConfigured('DATABASE_REPLICAS requires a shared default cache (set REDIS_URL or CACHE_DIR), '
+                                   f'got {type(backend).__name__}')
+    return True
+
+
+class ReplicaRouter:
+    """
+    read_only API 의 조회는 DATABASE_REPLICAS 중 하나로 보내고, 나머지는 Django 기본 동작(default)을 따른다.
+    """
+    def db_for_read(self, model, **hints):
+        if _read_only.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # replica 에서 읽은 인스턴스도 default 에 저장한다
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in settings.DATABASE_REPLICAS:
+            return 'default'
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def read_only(ori_func):
+    """
+    조회만 하는 API 를 replica 로 보낸다.
+    같은 사용자가 REPLICA_STICKY_SECONDS 안에 데이터를 변경했다면 replication 지연으로
+    변경 내용이 보이지 않을 수 있으므로 default 에서 조회한다. (auth 데코레이터 아래에 둔다)
+    """
+    @wraps(ori_func)
+    def inner(request, **kwargs):
+        user_id = getattr(request.user, 'id', None)
+        sticky = replica_enabled() and user_id is not None and cache.get(sticky_key(user_id))
+        token = _read_only.set(replica_enabled() and not sticky)
+        try:
+            return ori_func(request, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return inner
+
+
+@contextmanager
+def use_default():
+    """
+    read_only API 안에서도 default 에서 조회한다
+    """
+    token = _read_only.set(False)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+def is_write(request, response):
+    return (request.method not in SAFE_METHODS and response.status_code < 400
+            and getattr(request.user, 'id', None) is not None)
+
+
+@sync_and_async_middleware
+def replica_sticky_middleware(get_response):
+    """
+    데이터를 변경한 사용자는 REPLICA_STICKY_SECONDS 동안 default 에서 조회한다 (read-your-writes)
+    worker 사이에 공유되도록 CACHES 는 프로세스 밖의 cache 를 사용해야 한다. (아니면 시작할 때 ImproperlyConfigured)
+    """
+    replica_enabled()
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = await get_response(request)
+            if replica_enabled() and is_write(request, response):
+                await cache.aset(sticky_key(request.user.id), True, settings.REPLICA_STICKY_SECONDS)
+            return response
+    else:
+        def middleware(request):
+            response = get_response(request)
+            if replica_enabled() and is_write(request, response):
+                cache.set(sticky_key(request.user.id), True, settings.REPLICA_STICKY_SECONDS)
+            return response
+    return middleware
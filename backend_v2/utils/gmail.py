@@ -1,14 +1,19 @@
 from django.core.mail import EmailMultiAlternatives
-from django.template import Context
-from django.template.loader import render_to_string, get_template
+from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
 
+PASSWORD_RESET_TEMPLATE = 'account/email/password_reset_key_message.html'
 
-def send_message(to, subject, code):
-    html_content = render_to_string('account/email/password_reset_key_message.html', {'certificate_code': code})
+
+def build_message(to, subject, template, context, connection=None):
+    html_content = render_to_string(template, context)
     text_content = strip_tags(html_content)
 
-    msg = EmailMultiAlternatives(subject, text_content, settings.EMAIL_HOST_USER, [to])
+    msg = EmailMultiAlternatives(subject, text_content, settings.EMAIL_HOST_USER, [to], connection=connection)
     msg.attach_alternative(html_content, "text/html")
-    msg.send()
+    return msg
+
+
+def send_message(to, subject, code):
+    build_message(to, subject, PASSWORD_RESET_TEMPLATE, {'certificate_code': code}).send()
@@ -0,0 +1,238 @@
+"""
+비동기 로그 handler
+
+요청 스레드는 로그 레코드를 queue 에 넣기만 하고, 프로세스마다 하나인 listener 스레드가
+JSON 한 줄로 파일에 기록한다. 여러 worker 가 같은 파일에 쓰므로 rotation 은 lock 파일을 잡은
+프로세스 하나만 하고, 다른 프로세스는 옮겨진 파일을 보고 다시 연다. (SharedRotatingFileHandler)
+"""
+import atexit
+import datetime
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+import orjson
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경은 프로세스 하나로 실행한다
+    fcntl = None
+
+from utils.metrics import register_stats
+
+_handlers = weakref.WeakSet()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    로그 레코드를 JSON 한 줄로 만든다
+    """
+    def format(self, record):
+        data = {
+            'time': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'pid': record.process,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            data['suppressed'] = suppressed
+        return orjson.dumps(data, default=str).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    같은 logger, level, 메시지의 레코드는 window 초 동안 burst 개까지만 통과시킨다.
+    window 가 지난 뒤 처음 통과하는 레코드에 그동안 버린 개수를 suppressed 로 남긴다.
+    """
+    max_keys = 10000
+
+    def __init__(self, window=60, burst=10, clock=time.monotonic):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.clock = clock
+        self.sampled = 0
+        self._lock = threading.Lock()
+        # key -> [window 시작 시간, 통과한 개수, 버린 개수]
+        self._counts = {}
+
+    def filter(self, record):
+        if not self.window:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = self.clock()
+        with self._lock:
+            count = self._counts.get(key)
+            if count is None or now - count[0] >= self.window:
+                if count is None and len(self._counts) >= self.max_keys:
+                    self._counts.clear()
+                record.suppressed = count[2] if count else 0
+                self._counts[key] = [now, 1, 0]
+                return True
+            if count[1] < self.burst:
+                count[1] += 1
+                record.suppressed = 0
+                return True
+            count[2] += 1
+            self.sampled += 1
+            return False
+
+
+class SharedRotatingFileHandler(WatchedFileHandler):
+    """
+    여러 프로세스가 함께 쓰는 파일을 크기 기준으로 rotation 한다 (RotatingFileHandler 와 같은 이름 규칙)
+    파일이 max_bytes 를 넘으면 <filename>.lock 을 잡은 프로세스가 실제 크기를 다시 확인한 뒤 옮기고,
+    다른 프로세스는 WatchedFileHandler 처럼 inode 가 바뀐 것을 보고 새 파일을 연다.
+    """
+    def __init__(self, filename, max_bytes=0, backup_count=0, encoding=None):
+        super().__init__(filename, encoding=encoding)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.lock_filename = self.baseFilename + '.lock'
+        self.rollovers = 0
+
+    def emit(self, record):
+        try:
+            if self.max_bytes and self.stream is not None and self.stream.tell() >= self.max_bytes:
+                self.rollover()
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+    def rollover(self):
+        with open(self.lock_filename, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # 다른 프로세스가 먼저 옮겼으면 새 파일을 다시 열기만 한다
+                try:
+                    size = os.stat(self.baseFilename).st_size
+                except FileNotFoundError:
+                    size = 0
+                if size >= self.max_bytes:
+                    for index in range(self.backup_count - 1, 0, -1):
+                        source = f'{self.baseFilename}.{index}'
+                        if os.path.exists(source):
+                            os.replace(source, f'{self.baseFilename}.{index + 1}')
+                    if self.backup_count:
+                        os.replace(self.baseFilename, f'{self.baseFilename}.1')
+                    else:
+                        os.remove(self.baseFilename)
+                    self.rollovers += 1
+                self.reopenIfNeeded()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class QueueLogHandler(QueueHandler):
+    """
+    queue 가 가득 차면 요청 스레드를 막지 않고 레코드를 버린다.
+
+    :param filename: listener 가 기록할 파일
+    :param max_bytes: 파일이 이 크기를 넘으면 rotation 한다, 0 이면 rotation 하지 않는다
+    :param backup_count: 남길 이전 파일 수 (<filename>.1 ~ <filename>.<backup_count>)
+    :param queue_size: queue 최대 크기
+    :param sample_window: 반복되는 레코드를 셀 시간(초), 0 이면 샘플링하지 않는다
+    :param sample_burst: sample_window 동안 통과시킬 같은 레코드 수
+    """
+    def __init__(self, filename, max_bytes=0, backup_count=0, queue_size=10000, sample_window=60, sample_burst=10):
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.enqueued = 0
+        self.dropped = 0
+        self.sampling = SamplingFilter(sample_window, sample_burst)
+        self.addFilter(self.sampling)
+
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        self.target = SharedRotatingFileHandler(filename, max_bytes, backup_count, encoding='utf-8')
+        self.target.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+        _handlers.add(self)
+        atexit.register(self.stop)
+
+    def prepare(self, record):
+        # 포맷은 listener 스레드에서 하고, 요청 스레드에서는 메시지와 traceback 만 문자열로 만든다
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+        self.target.close()
+
+    def restart(self):
+        """
+        fork 된 자식 프로세스는 listener 스레드가 없으므로 새 queue 로 다시 시작한다
+        """
+        self.queue = self.listener.queue = queue.Queue(self.queue_size)
+        self.listener._thread = None
+        self.enqueued = self.dropped = self.sampling.sampled = self.target.rollovers = 0
+        self.sampling._lock = threading.Lock()
+        self.listener.start()
+
+    def stats(self):
+        return {
+            'queue_depth': self.queue.qsize(),
+            'queue_size': self.queue_size,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'sampled': self.sampling.sampled,
+            'rollovers': self.target.rollovers,
+        }
+
+
+def log_stats():
+    """
+    프로세스의 QueueLogHandler 상태 합계
+    """
+    total = {}
+    for handler in list(_handlers):
+        for key, value in handler.stats().items():
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+# log_stats key: (설명, type)
+LOG_METRICS = {
+    'queue_depth': ('로그 queue 에 쌓인 레코드 수', 'gauge'),
+    'queue_size': ('로그 queue 최대 크기', 'gauge'),
+    'enqueued': ('로그 queue 에 넣은 레코드 수', 'counter'),
+    'dropped': ('로그 queue 가 가득 차서 버린 레코드 수', 'counter'),
+    'sampled': ('반복되어 샘플링으로 버린 레코드 수', 'counter'),
+    'rollovers': ('로그 파일을 rotation 한 횟수', 'counter'),
+}
+register_stats('logging', log_stats, 'ctudy_log', LOG_METRICS)
+
+
+def _restart_handlers():
+    for handler in list(_handlers):
+        handler.restart()
+
+
+os.register_at_fork(after_in_child=_restart_handlers)
@@ -0,0 +1,276 @@
+"""
+ninja API 요청별 응답 시간, DB 쿼리 수, DB 시간 히스토그램
+
+gunicorn worker 는 각자 메모리에 히스토그램을 모으고, METRICS_DIR 이 설정되어 있으면
+METRICS_FLUSH_SECONDS 마다 <pid>.json 으로 기록한다. /metrics 는 모든 worker 의 파일을 합쳐
+Prometheus text 형식으로 응답한다. (METRICS_DIR 은 서버 시작 시 비워야 한다)
+/metrics 는 METRICS_TOKEN 을 보낸 내부 모니터링 요청에만 응답한다.
+connection pool, 로그 queue, 스터디룸 정리 같은 프로세스 상태는 각 모듈이 register_stats 로 등록한다.
+"""
+import asyncio
+import hmac
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+import orjson
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.decorators import sync_and_async_middleware
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name: (설명, label 이름, bucket)
+HISTOGRAMS = {
+    'ctudy_http_request_duration_seconds': ('API 응답 시간', ('method', 'route', 'status'), DURATION_BUCKETS),
+    'ctudy_http_db_queries': ('API 요청당 DB 쿼리 수', ('method', 'route'), QUERY_BUCKETS),
+    'ctudy_http_db_duration_seconds': ('API 요청당 DB 쿼리 시간', ('method', 'route'), DURATION_BUCKETS),
+}
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 요청을 처리하는 동안 [쿼리 수, 쿼리 시간] (sync_to_async 로 실행된 ORM 쿼리도 같은 list 에 기록된다)
+_query_stats = ContextVar('query_stats', default=None)
+
+_lock = threading.Lock()
+# name -> {label 값 tuple: [bucket 별 count..., sum, count]}
+_samples = {name: {} for name in HISTOGRAMS}
+_last_flush = 0.0
+# name -> (stats 함수, metric 이름 prefix, {key: (설명, type)}, label 이름)
+_stats_sources = {}
+
+
+def register_stats(name, func, prefix, metrics, label=None):
+    """
+    func() 가 반환하는 {key: 값} 을 snapshot 에 name 으로 기록하고 /metrics 에 <prefix>_<key> 로 출력한다.
+    label 을 주면 func() 는 {label 값: {key: 값}} 을 반환한다.
+    metrics 는 {key: (설명, 'counter' | 'gauge')} 이며 counter 는 종료된 프로세스의 값까지,
+    gauge 는 살아있는 프로세스의 값만 합친다.
+    """
+    _stats_sources[name] = (func, prefix, metrics, label)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+
+
+def install(connection):
+    # execute_wrapper() 는 마지막 wrapper 를 pop 하므로 앞에 넣는다
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def _install_on_connect(sender, connection, **kwargs):
+    install(connection)
+
+
+connection_created.connect(_install_on_connect)
+
+
+def observe(name, labels, value):
+    buckets = HISTOGRAMS[name][2]
+    with _lock:
+        sample = _samples[name].get(labels)
+        if sample is None:
+            sample = _samples[name][labels] = [0] * (len(buckets) + 2)
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                sample[i] += 1
+                break
+        sample[-2] += value
+        sample[-1] += 1
+
+
+def record(request, response, duration, stats):
+    match = request.resolver_match
+    if match is None or 'ninja' not in match.app_names:
+        return
+    labels = (request.method, match.route)
+    observe('ctudy_http_request_duration_seconds', labels + (str(response.status_code),), duration)
+    observe('ctudy_http_db_queries', labels, stats[0])
+    observe('ctudy_http_db_duration_seconds', labels, stats[1])
+
+
+def reset():
+    with _lock:
+        for samples in _samples.values():
+            samples.clear()
+
+
+def snapshot():
+    with _lock:
+        histograms = {name: [[list(labels), list(sample)] for labels, sample in samples.items()]
+                      for name, samples in _samples.items()}
+    stats = {name: func() for name, (func, _, _, _) in list(_stats_sources.items())}
+    return {'histograms': histograms, 'stats': stats}
+
+
+def flush(force=False):
+    """
+    worker 의 히스토그램을 METRICS_DIR/<pid>.json 에 기록한다
+    """
+    global _last_flush
+    metrics_dir = settings.METRICS_DIR
+    now = time.monotonic()
+    if not metrics_dir or (not force and now - _last_flush < settings.METRICS_FLUSH_SECONDS):
+        return
+    _last_flush = now
+    os.makedirs(metrics_dir, exist_ok=True)
+    path = os.path.join(metrics_dir, f'{os.getpid()}.json')
+    with open(f'{path}.tmp', 'wb') as f:
+        f.write(orjson.dumps(snapshot()))
+    os.replace(f'{path}.tmp', path)
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """
+    모든 worker (와 purge_rooms 프로세스) 의 히스토그램과 register_stats 로 등록한 상태를 합친다.
+    종료된 worker 의 히스토그램과 counter 는 누적값이므로 남기고, gauge 는 살아있는 worker 만 합친다.
+    """
+    snapshots = [(os.getpid(), snapshot())]
+    metrics_dir = settings.METRICS_DIR
+    if metrics_dir and os.path.isdir(metrics_dir):
+        for filename in os.listdir(metrics_dir):
+            pid, ext = os.path.splitext(filename)
+            if ext != '.json' or not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                with open(os.path.join(metrics_dir, filename), 'rb') as f:
+                    snapshots.append((int(pid), orjson.loads(f.read())))
+            except (OSError, orjson.JSONDecodeError):
+                continue
+
+    histograms = {name: {} for name in HISTOGRAMS}
+    # name -> {label 값: {key: 합계}} (label 이 없으면 label 값은 None)
+    stats = {name: {} for name in _stats_sources}
+    for pid, data in snapshots:
+        for name, samples in data['histograms'].items():
+            if name not in histograms:
+                continue
+            for labels, sample in samples:
+                total = histograms[name].setdefault(tuple(labels), [0] * len(sample))
+                for i, value in enumerate(sample):
+                    total[i] += value
+        alive = pid == os.getpid() or pid_alive(pid)
+        for name, values in data.get('stats', {}).items():
+            if name not in _stats_sources:
+                continue
+            _, _, definitions, label = _stats_sources[name]
+            for label_value, group in (values.items() if label else [(None, values)]):
+                total = stats[name].setdefault(label_value, {})
+                for key, value in group.items():
+                    if key in definitions and (alive or definitions[key][1] == 'counter'):
+                        total[key] = total.get(key, 0) + value
+    return histograms, stats
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values):
+    return ','.join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+
+
+def render():
+    histograms, stats = collect()
+    lines = []
+    for name, (documentation, label_names, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, sample in sorted(histograms[name].items()):
+            label_str = format_labels(label_names, labels)
+            cumulative = 0
+            for bound, count in zip(buckets, sample):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label_str},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{label_str},le="+Inf"}} {sample[-1]}')
+            lines.append(f'{name}_sum{{{label_str}}} {sample[-2]}')
+            lines.append(f'{name}_count{{{label_str}}} {sample[-1]}')
+
+    for source, (_, prefix, definitions, label) in list(_stats_sources.items()):
+        groups = sorted(stats.get(source, {}).items(), key=lambda item: str(item[0]))
+        for key, (documentation, metric_type) in definitions.items():
+            rows = [(label_value, total[key]) for label_value, total in groups if key in total]
+            if not rows:
+                continue
+            name = f'{prefix}_{key}_total' if metric_type == 'counter' else f'{prefix}_{key}'
+            scope = '모든 프로세스 합계' if metric_type == 'counter' else '살아있는 프로세스 합계'
+            lines.append(f'# HELP {name} {documentation} ({scope})')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for label_value, value in rows:
+                label_str = f'{{{format_labels((label,), (label_value,))}}}' if label else ''
+                lines.append(f'{name}{label_str} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def has_metrics_token(request):
+    """
+    Authorization: Bearer <METRICS_TOKEN> 을 보낸 요청인지 (METRICS_TOKEN 이 없으면 DEBUG 에서만 허용한다)
+    """
+    if not settings.METRICS_TOKEN:
+        return settings.DEBUG
+    return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}')
+
+
+def metrics_view(request):
+    if not has_metrics_token(request):
+        return HttpResponseForbidden()
+    flush(force=True)
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """
+    ninja API 의 응답 시간, DB 쿼리 수, DB 시간을 route 템플릿 단위로 기록한다
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            stats = [0, 0.0]
+            token = _query_stats.set(stats)
+            start = time.perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                _query_stats.reset(token)
+            record(request, response, time.perf_counter() - start, stats)
+            flush()
+            return response
+    else:
+        def middleware(request):
+            # 요청 전에 연결된 connection 에도 wrapper 를 설치한다
+            for connection in connections.all():
+                install(connection)
+            stats = [0, 0.0]
+            token = _query_stats.set(stats)
+            start = time.perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                _query_stats.reset(token)
+            record(request, response, time.perf_counter() - start, stats)
+            flush()
+            return response
+    return middleware
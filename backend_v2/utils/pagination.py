@@ -1,9 +1,13 @@
+import base64
+import json
 import re
 from collections import OrderedDict
-from typing import Any, Optional, Type, Union
+from typing import Any, Optional, Sequence, Type, Union
 
 from django.core.paginator import InvalidPage, Page, Paginator
-from django.db.models import QuerySet
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q, QuerySet
 from django.http import HttpRequest
 from ninja import Schema
 from ninja.pagination import PaginationBase
@@ -17,7 +21,7 @@ from ninja_extra.urls import remove_query_param, replace_query_param
 from rest_framework.response import Response
 from rest_framework import pagination
 
-from utils.error import CtudyException, not_found_error_return
+from utils.error import CtudyException, not_found_error_return, param_error_return
 
 
 def _positive_int(
@@ -43,6 +47,15 @@ class PageNumberPaginationExtra(PaginationBase):
         count: int
         next: str = None
 
+    class CursorInput(Schema):
+        cursor: str = None
+        max_page: int = Field(100, lt=200)
+        count: str = Field(None, regex='^(exact|estimated)$')
+
+    class CursorOutput(Schema):
+        count: int = None
+        next: str = None
+
     page_query_param = "page"
     page_size_query_param = "max_page"
 
@@ -54,13 +67,29 @@ class PageNumberPaginationExtra(PaginationBase):
         max_page: int = settings.PAGINATION_PER_PAGE,
         max_page_size: Optional[int] = None,
         pass_parameter: Optional[str] = None,
+        cursor: bool = False,
+        ordering: Optional[Sequence[str]] = None,
     ) -> None:
+        """
+        :param cursor: True 이면 page 번호 대신 마지막으로 본 정렬 키를 담은 cursor 로 다음 페이지를 조회한다.
+        :param ordering: cursor 모드의 정렬 필드. 없으면 queryset 의 order_by 를 사용하며 id 를 마지막 기준으로 덧붙인다.
+        """
         super().__init__(pass_parameter=pass_parameter)
         self.max_page = max_page
         self.max_page_size = max_page_size or 200
+        self.cursor = cursor
+        self.ordering = ordering
         self.Input = self.create_input()  # type:ignore
+        if cursor:
+            self.Output = self.CursorOutput  # type:ignore
 
     def create_input(self) -> Type[Input]:
+        if self.cursor:
+            class DynamicCursorInput(PageNumberPaginationExtra.CursorInput):
+                max_page: int = Field(self.max_page, lt=self.max_page_size)
+
+            return DynamicCursorInput
+
         class DynamicInput(PageNumberPaginationExtra.Input):
             page: int = Field(1, gt=0)
             max_page: int = Field(self.max_page, lt=self.max_page_size)
@@ -77,6 +106,9 @@ class PageNumberPaginationExtra(PaginationBase):
         if isinstance(queryset, tuple) and re.match(r'20\d', str(queryset[0])):
             queryset = queryset[1]
 
+        if self.cursor:
+            return self.paginate_cursor(queryset, pagination)
+
         max_page = self.get_page_size(pagination.max_page)
         current_page_number = pagination.page
         paginator = self.paginator_class(queryset, max_page)
@@ -95,6 +127,99 @@ class PageNumberPaginationExtra(PaginationBase):
             ]
         )
 
+    def paginate_cursor(self, queryset: QuerySet, pagination: CursorInput) -> DictStrAny:
+        """
+        keyset 페이지네이션: OFFSET 대신 마지막 정렬 키 이후의 행을 WHERE 조건으로 찾는다.
+        정렬 필드는 NULL 이 없어야 하며, 인덱스가 정렬 순서와 맞아야 효과가 있다.
+        """
+        max_page = self.get_page_size(pagination.max_page)
+        ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*ordering)
+
+        count = None
+        if pagination.count == 'exact':
+            count = queryset.count()
+        elif pagination.count == 'estimated':
+            count = self.estimate_count(queryset)
+
+        if pagination.cursor:
+            queryset = queryset.filter(self.get_seek_q(ordering, self.decode_cursor(pagination.cursor, ordering)))
+
+        items = list(queryset[:max_page + 1])
+        next_cursor = None
+        if len(items) > max_page:
+            items = items[:max_page]
+            next_cursor = self.encode_cursor([self.get_sort_value(items[-1], field) for field in ordering])
+
+        return OrderedDict(
+            [
+                ("count", count),
+                ("next", next_cursor),
+                ("items", items),
+            ]
+        )
+
+    def get_ordering(self, queryset: QuerySet) -> list:
+        ordering = list(self.ordering or queryset.query.order_by)
+        if any(not isinstance(field, str) for field in ordering):
+            raise ValueError('cursor pagination only supports field name ordering')
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('-id' if ordering and ordering[-1].startswith('-') else 'id')
+        return ordering
+
+    @staticmethod
+    def get_seek_q(ordering: list, values: list) -> Q:
+        """
+        (a, b) > (x, y) 를 a > x OR (a = x AND b > y) 로 풀어쓴다.
+        """
+        seek_q = Q()
+        for index, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition = Q(**{f'{field.lstrip("-")}__{lookup}': values[index]})
+            for prev_field, prev_value in zip(ordering[:index], values[:index]):
+                condition &= Q(**{prev_field.lstrip('-'): prev_value})
+            seek_q |= condition
+        return seek_q
+
+    @staticmethod
+    def get_sort_value(item: Any, field: str) -> Any:
+        name = field.lstrip('-')
+        if isinstance(item, dict):
+            return item[name]
+        return getattr(item, name)
+
+    @staticmethod
+    def encode_cursor(values: list) -> str:
+        data = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str, ordering: list) -> list:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise CtudyException(code=400, message=param_error_return)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise CtudyException(code=400, message=param_error_return)
+        return values
+
+    @staticmethod
+    def estimate_count(queryset: QuerySet) -> int:
+        """
+        PostgreSQL 은 실행 계획의 예상 행 수를 사용하고, 그 외 DB 는 COUNT(*) 를 실행한다.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return queryset.count()
+
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
     @classmethod
     def get_response_schema(
         cls, response_schema: Union[Schema, Type[Schema], Any]
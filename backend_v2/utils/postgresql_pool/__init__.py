@@ -0,0 +1,8 @@
+"""
+connection pool 을 사용하는 PostgreSQL backend
+
+    DATABASES = {'default': {'ENGINE': 'utils.postgresql_pool', ..., 'POOL': {'MAX_SIZE': 10}}}
+
+Django 가 연결을 닫을 때(요청 종료, CONN_MAX_AGE = 0) 연결을 끊지 않고 pool 에 돌려준다.
+pool 은 프로세스 단위이므로 worker 수 x MAX_SIZE 가 DB 의 max_connections 를 넘지 않도록 설정한다.
+"""
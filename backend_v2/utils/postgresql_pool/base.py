@@ -0,0 +1,86 @@
+from django.db.backends.postgresql import base
+from django.db.utils import OperationalError
+
+from utils.metrics import register_stats
+from utils.postgresql_pool.pool import ConnectionPool, PoolTimeout, close_pools, get_pool, pool_stats
+
+POOL_DEFAULTS = {
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10,
+    'MAX_LIFETIME': 60 * 30,
+    'HEALTH_CHECK_INTERVAL': 30,
+}
+# ConnectionPool.stats() key: (설명, type)
+POOL_METRICS = {
+    'max_size': ('DB connection pool 최대 연결 수', 'gauge'),
+    'size': ('DB connection pool 연결 수', 'gauge'),
+    'idle': ('DB connection pool 대기 중인 연결 수', 'gauge'),
+    'in_use': ('DB connection pool 사용 중인 연결 수', 'gauge'),
+    'waiting': ('DB connection pool 연결을 기다리는 요청 수', 'gauge'),
+    'created': ('DB connection pool 에서 만든 연결 수', 'gauge'),
+    'acquired': ('DB connection pool 에서 꺼낸 연결 수', 'gauge'),
+    'discarded': ('DB connection pool 에서 버린 연결 수', 'gauge'),
+    'timeouts': ('DB connection pool 연결 대기 시간 초과 수', 'gauge'),
+    'health_check_failures': ('DB connection pool health check 실패 수', 'gauge'),
+}
+register_stats('pool', pool_stats, 'ctudy_db_pool', POOL_METRICS, label='alias')
+
+
+class DatabaseCreation(base.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # pool 에 남은 연결이 있으면 테스트 DB 를 삭제할 수 없다
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    연결을 끊는 대신 pool 에 돌려주는 PostgreSQL backend
+
+    Django 는 요청이 끝날 때 CONN_MAX_AGE 가 지난 연결을 닫으므로 CONN_MAX_AGE = 0 으로 사용한다.
+    ASGI 에서는 요청마다 ORM 을 실행하는 thread 가 달라 연결을 thread 에 묶어두는 CONN_MAX_AGE 가
+    연결을 쌓이게 할 수 있지만, pool 은 요청이 끝나면 연결을 돌려받아 다른 thread 에서 다시 사용한다.
+    """
+    creation_class = DatabaseCreation
+
+    def get_pool(self):
+        # 테스트 DB 생성처럼 같은 alias 의 NAME 이 바뀌면 pool 을 따로 만든다
+        def create_pool():
+            options = {**POOL_DEFAULTS, **self.settings_dict.get('POOL', {})}
+            return ConnectionPool(
+                connect=lambda: super(DatabaseWrapper, self).get_new_connection(self.get_connection_params()),
+                is_usable=self._is_connection_usable,
+                reset=self._reset_connection,
+                close=lambda connection: connection.close(),
+                max_size=options['MAX_SIZE'],
+                timeout=options['TIMEOUT'],
+                max_lifetime=options['MAX_LIFETIME'],
+                health_check_interval=options['HEALTH_CHECK_INTERVAL'],
+            )
+
+        return get_pool((self.alias, self.settings_dict['NAME']), create_pool)
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection = self.get_pool().acquire()
+        except PoolTimeout as e:
+            raise OperationalError(str(e)) from e
+        # 재사용한 연결은 base.DatabaseWrapper.get_new_connection 을 거치지 않으므로 isolation level 을 다시 읽는다
+        self.isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.get_pool().release(self.connection, discard=self.connection.closed != 0)
+
+    @staticmethod
+    def _is_connection_usable(connection):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+
+    @staticmethod
+    def _reset_connection(connection):
+        # 열려 있는 트랜잭션을 정리하고 autocommit 설정은 다음 connect() 에서 다시 맞춘다
+        connection.rollback()
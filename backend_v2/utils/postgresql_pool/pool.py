@@ -0,0 +1,189 @@
+import collections
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_time = time.monotonic()
+        self.released_time = self.created_time
+
+
+class ConnectionPool:
+    """
+    thread-safe DB connection pool
+
+    :param connect: 새 연결을 만드는 함수
+    :param is_usable: 연결 상태를 확인하는 함수 (health check)
+    :param reset: pool 에 돌려주기 전에 연결 상태를 초기화하는 함수
+    :param close: 연결을 끊는 함수
+    :param max_size: 최대 연결 수 (사용 중 + 대기)
+    :param timeout: 연결을 기다리는 최대 시간(초)
+    :param max_lifetime: 연결을 다시 만드는 주기(초)
+    :param health_check_interval: 이 시간(초) 이상 쉬었던 연결은 꺼낼 때 health check 를 한다
+    """
+    def __init__(self, connect, is_usable, reset, close, max_size=10, timeout=10,
+                 max_lifetime=None, health_check_interval=30):
+        self._connect = connect
+        self._is_usable = is_usable
+        self._reset = reset
+        self._close = close
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle = collections.deque()
+        self._in_use = {}
+        self._waiting = 0
+        self._counters = collections.Counter()
+
+    def acquire(self):
+        with self._lock:
+            self._waiting += 1
+        try:
+            if not self._slots.acquire(timeout=self.timeout):
+                self._count('timeouts')
+                raise PoolTimeout(f'connection pool exhausted (max_size={self.max_size}, timeout={self.timeout}s)')
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        try:
+            pooled = self._get_idle() or self._create()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use[id(pooled.connection)] = pooled
+            self._counters['acquired'] += 1
+        return pooled.connection
+
+    def release(self, connection, discard=False):
+        with self._lock:
+            pooled = self._in_use.pop(id(connection), None)
+        if pooled is None:
+            return
+
+        try:
+            if not discard:
+                try:
+                    self._reset(connection)
+                except Exception:
+                    discard = True
+            if discard or self._expired(pooled):
+                self._discard(pooled)
+            else:
+                pooled.released_time = time.monotonic()
+                with self._lock:
+                    self._idle.append(pooled)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """
+        대기 중인 연결을 모두 끊는다. 사용 중인 연결은 반환될 때 pool 에 남는다.
+        """
+        with self._lock:
+            idle, self._idle = list(self._idle), collections.deque()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'size': len(self._idle) + len(self._in_use),
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'waiting': self._waiting,
+                'created': self._counters['created'],
+                'acquired': self._counters['acquired'],
+                'discarded': self._counters['discarded'],
+                'timeouts': self._counters['timeouts'],
+                'health_check_failures': self._counters['health_check_failures'],
+            }
+
+    def _get_idle(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                # 최근에 반환된 연결부터 사용해 health check 가 필요한 연결을 줄인다
+                pooled = self._idle.pop()
+            if self._expired(pooled):
+                self._discard(pooled)
+                continue
+            if time.monotonic() - pooled.released_time >= self.health_check_interval:
+                if not self._check(pooled.connection):
+                    self._count('health_check_failures')
+                    self._discard(pooled)
+                    continue
+            return pooled
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _check(self, connection):
+        try:
+            return self._is_usable(connection)
+        except Exception:
+            return False
+
+    def _create(self):
+        pooled = PooledConnection(self._connect())
+        self._count('created')
+        return pooled
+
+    def _expired(self, pooled):
+        return self.max_lifetime is not None and time.monotonic() - pooled.created_time >= self.max_lifetime
+
+    def _discard(self, pooled):
+        self._count('discarded')
+        try:
+            self._close(pooled.connection)
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, create):
+    """
+    (alias, DB 이름) 별 프로세스 단위 pool
+    """
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = create()
+        return pool
+
+
+def pool_stats():
+    """
+    alias 별 connection pool 상태
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for (alias, name), pool in pools.items()}
+
+
+def close_pools(name=None):
+    """
+    대기 중인 연결을 끊는다. name 을 지정하면 해당 DB 의 pool 만 정리한다.
+    """
+    with _pools_lock:
+        pools = [pool for (alias, pool_name), pool in _pools.items() if name is None or pool_name == name]
+    for pool in pools:
+        pool.close()
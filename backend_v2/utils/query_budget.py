@@ -0,0 +1,86 @@
+"""
+API 요청별 쿼리 수 예산과 N+1 검사
+
+v2 route 는 query_budget 으로 요청 하나에 허용하는 최대 쿼리 수를 선언한다.
+테스트에서는 utils.testing.QueryBudgetMixin 이 self.client 로 호출한 모든 API 의 쿼리를 수집해
+예산을 넘거나 같은 형태의 SELECT 가 반복되면(N+1) 실패시킨다.
+"""
+import re
+
+from ninja.operation import PathView
+
+# 같은 형태의 SELECT 가 이 횟수 이상 실행되면 N+1 로 본다
+N_PLUS_ONE_THRESHOLD = 2
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \((?:\?, )*\?\)')
+_SPACES = re.compile(r'\s+')
+
+
+def query_budget(max_queries, n_plus_one=N_PLUS_ONE_THRESHOLD):
+    """
+    route 가 요청 하나에 실행할 수 있는 최대 쿼리 수 (토큰 캐시가 비어 있을 때의 인증 쿼리 포함)
+    router 데코레이터 바로 아래에 둔다.
+    """
+    def decorator(ori_func):
+        ori_func.query_budget = max_queries
+        ori_func.n_plus_one_threshold = n_plus_one
+        return ori_func
+    return decorator
+
+
+def query_shape(sql):
+    """
+    값만 다른 쿼리를 같은 형태로 묶는다
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def repeated_queries(queries, threshold=N_PLUS_ONE_THRESHOLD):
+    """
+    threshold 번 이상 반복된 SELECT 형태와 횟수
+    """
+    counts = {}
+    for query in queries:
+        shape = query_shape(query['sql'])
+        if shape.upper().startswith('SELECT'):
+            counts[shape] = counts.get(shape, 0) + 1
+    return [(shape, count) for shape, count in counts.items() if count >= threshold]
+
+
+def get_operation(response):
+    """
+    테스트 client 응답을 처리한 ninja operation
+    """
+    view = getattr(response.resolver_match.func, '__self__', None)
+    if not isinstance(view, PathView):
+        return None
+    method = response.request['REQUEST_METHOD']
+    for operation in view.operations:
+        if method in operation.methods:
+            return operation
+    return None
+
+
+def check_queries(response, queries):
+    operation = get_operation(response)
+    if operation is None:
+        return
+    view_func = operation.view_func
+    name = f"{response.request['REQUEST_METHOD']} {response.request['PATH_INFO']} ({view_func.__name__})"
+
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is not None and len(queries) > budget:
+        raise AssertionError('{}: {} queries executed, budget is {}\n{}'.format(
+            name, len(queries), budget, '\n'.join(f"{i}. {query['sql']}" for i, query in enumerate(queries, 1))
+        ))
+
+    repeated = repeated_queries(queries, getattr(view_func, 'n_plus_one_threshold', N_PLUS_ONE_THRESHOLD))
+    if repeated:
+        raise AssertionError('{}: N+1 queries detected\n{}'.format(
+            name, '\n'.join(f'{count}x {shape}' for shape, count in repeated)
+        ))
@@ -0,0 +1,54 @@
+"""
+테스트 공용 도구
+"""
+import datetime
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from oauth2_provider.models import AccessToken
+
+from settings.auth import token_cache
+from utils.query_budget import check_queries
+
+
+def auth_headers(member):
+    """
+    member 의 access token 을 만들고 인증 header 를 반환한다
+    (이전 테스트에서 같은 token 으로 cache 된 사용자는 버린다)
+    """
+    access_token = AccessToken.objects.create(
+        user=member,
+        token=f'test-access-token-{member.id}',
+        expires=datetime.datetime.now() + datetime.timedelta(hours=1),
+        scope='read write'
+    )
+    token_cache.evict(access_token.token)
+    return {'HTTP_AUTHORIZATION': f'Bearer {access_token.token}'}
+
+
+class QueryBudgetClient(Client):
+    """
+    요청마다 databases 의 쿼리를 수집해 check_queries 로 검사하는 테스트 client
+    """
+    def __init__(self, databases=('default',), **defaults):
+        super().__init__(**defaults)
+        self.databases = databases
+
+    def request(self, **request):
+        with ExitStack() as stack:
+            contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in self.databases]
+            response = super().request(**request)
+        response.captured_queries = [query for context in contexts for query in context.captured_queries]
+        check_queries(response, response.captured_queries)
+        return response
+
+
+class QueryBudgetMixin:
+    """
+    TestCase 의 self.client 를 QueryBudgetClient 로 바꾼다
+    """
+    def _pre_setup(self):
+        super()._pre_setup()
+        self.client = QueryBudgetClient(databases=sorted(self._databases_names(include_mirrors=False)))
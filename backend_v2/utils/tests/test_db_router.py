@@ -0,0 +1,89 @@
+import datetime
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from test_plus.test import TestCase
+
+from account.models import Member
+from coupon.models import Coupon
+from room.models import Room, RoomConfig
+from utils.cache import versioned_cache
+from utils.db_router import replica_enabled
+from utils.testing import auth_headers
+
+
+# noinspection SpellCheckingInspection
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTestCase(TestCase):
+    """
+    default, replica 두 개의 SQLite DB 로 조회 API 의 DB 선택을 확인한다.
+    replica 에는 데이터를 복제하지 않으므로 replica 에서 조회하면 결과가 비어 있다.
+    (list_room, get_room 은 cache 가 비어 있을 때 default 에서 조회하므로 쿠폰 목록으로 확인한다)
+    replica 는 공유 cache 가 있어야 사용할 수 있으므로 파일 cache 를 사용한다.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': cache_dir.name,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        versioned_cache.clear()
+        self.일반사용자 = Member.objects.create_user(username='일반사용자', email='test@test', password='test')
+        self.headers = auth_headers(self.일반사용자)
+        self.다른사용자 = Member.objects.create_user(username='다른사용자', email='other@test', password='test')
+        self.other_headers = auth_headers(self.다른사용자)
+        self.room = Room.objects.create(name='스터디')
+        RoomConfig.objects.create(room=self.room, master=self.일반사용자)
+        self.room.members.add(self.다른사용자)
+        today = datetime.date.today()
+        Coupon.objects.create(name='쿠폰', room=self.room, sender=self.일반사용자, receiver=self.일반사용자,
+                              start_date=today, end_date=today)
+
+    def list_coupon(self, headers=None):
+        res = self.client.get(path='/api/v2/coupon/', data={'room_id': self.room.id}, **(headers or self.headers))
+        self.assertEqual(res.status_code, 200)
+        return res.json()['response']['items']
+
+    def test_조회_API_는_replica_에서_조회한다(self):
+        with self.assertNumQueries(1, using='replica'):
+            self.assertEqual(self.list_coupon(), [])
+
+    def test_데이터를_변경한_사용자는_default_에서_조회한다(self):
+        res = self.client.put(path='/api/v2/account/profile/', data={'name': '새이름'},
+                              content_type='application/json', **self.headers)
+        self.assertEqual(res.status_code, 200)
+
+        with self.assertNumQueries(0, using='replica'):
+            self.assertEqual(len(self.list_coupon()), 1)
+
+        # 다른 사용자는 계속 replica 에서 조회한다
+        with self.assertNumQueries(1, using='replica'):
+            self.assertEqual(self.list_coupon(self.other_headers), [])
+
+    def test_cache_가_비어_있으면_default_에서_조회해_저장한다(self):
+        with self.assertNumQueries(0, using='replica'):
+            res = self.client.get(path='/api/v2/study/room/', **self.headers)
+        self.assertEqual(len(res.json()['response']), 1)
+
+    def test_스터디룸_상세_접근_권한은_default_에서_확인한다(self):
+        with self.assertNumQueries(0, using='replica'):
+            res = self.client.get(path=f'/api/v2/study/room/{self.room.id}', **self.other_headers)
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_replica_가_없으면_default_에서_조회한다(self):
+        with self.assertNumQueries(0, using='replica'):
+            self.assertEqual(len(self.list_coupon()), 1)
+
+    def test_worker_마다_따로인_cache_로는_replica_를_사용하지_않는다(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'shared default cache'):
+                replica_enabled()
+        self.assertTrue(replica_enabled())
@@ -0,0 +1,117 @@
+import logging
+import os
+import sys
+import tempfile
+
+import orjson
+from django.test import SimpleTestCase
+
+from utils import metrics
+from utils.log import JsonFormatter, QueueLogHandler, SamplingFilter, SharedRotatingFileHandler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_record(msg, *args, level=logging.ERROR, exc_info=None):
+    return logging.LogRecord('coupon', level, __file__, 1, msg, args, exc_info)
+
+
+# noinspection SpellCheckingInspection
+class LogTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, 'logs', 'test.log')
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def make_handler(self, **kwargs):
+        handler = QueueLogHandler(self.filename, **kwargs)
+        self.addCleanup(handler.stop)
+        return handler
+
+    def read_lines(self):
+        with open(self.filename, 'rb') as f:
+            return [orjson.loads(line) for line in f.read().splitlines()]
+
+    def test_JSON_한_줄로_기록한다(self):
+        try:
+            raise ValueError('잘못된 값')
+        except ValueError:
+            record = make_record('쿠폰 %s 오류', 3, exc_info=sys.exc_info())
+        data = orjson.loads(JsonFormatter().format(record))
+
+        self.assertEqual(data['message'], '쿠폰 3 오류')
+        self.assertEqual(data['level'], 'ERROR')
+        self.assertEqual(data['logger'], 'coupon')
+        self.assertIn('ValueError: 잘못된 값', data['exception'])
+        self.assertNotIn('suppressed', data)
+
+    def test_반복되는_레코드는_burst_이후_버리고_개수를_남긴다(self):
+        clock = FakeClock()
+        sampling = SamplingFilter(window=60, burst=2, clock=clock)
+
+        passed = [sampling.filter(make_record('DB 오류 %s', i)) for i in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertTrue(sampling.filter(make_record('다른 오류')))
+        self.assertEqual(sampling.sampled, 3)
+
+        clock.now = 60
+        record = make_record('DB 오류 %s', 5)
+        self.assertTrue(sampling.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+    def test_listener_스레드가_파일에_기록한다(self):
+        handler = self.make_handler()
+        logger = logging.getLogger('test.log.file')
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        logger.error('쿠폰 %s 저장 실패', 1)
+        try:
+            {}['key']
+        except KeyError:
+            logger.exception('예외')
+        handler.stop()
+
+        lines = self.read_lines()
+        self.assertEqual([line['message'] for line in lines], ['쿠폰 1 저장 실패', '예외'])
+        self.assertIn('KeyError', lines[1]['exception'])
+
+    def test_queue_가_가득_차면_버리고_metrics_에_남긴다(self):
+        handler = self.make_handler(queue_size=2)
+        handler.listener.stop()
+
+        for i in range(5):
+            handler.handle(make_record('레코드 %s', i, level=logging.INFO))
+        self.assertEqual(handler.stats(), {
+            'queue_depth': 2, 'queue_size': 2, 'enqueued': 2, 'dropped': 3, 'sampled': 0, 'rollovers': 0,
+        })
+        self.assertIn('ctudy_log_dropped_total 3', metrics.render())
+
+    def test_크기를_넘으면_한_프로세스만_rotation_하고_다른_프로세스는_새_파일을_연다(self):
+        os.makedirs(os.path.dirname(self.filename))
+        # 같은 파일에 쓰는 두 worker
+        handlers = [SharedRotatingFileHandler(self.filename, max_bytes=200, backup_count=2) for _ in range(2)]
+        for handler in handlers:
+            handler.setFormatter(JsonFormatter())
+            self.addCleanup(handler.close)
+
+        for i in range(20):
+            handlers[i % 2].handle(make_record('레코드 %s', i))
+
+        self.assertEqual(sorted(os.listdir(os.path.dirname(self.filename))),
+                         ['test.log', 'test.log.1', 'test.log.2', 'test.log.lock'])
+        self.assertLess(os.path.getsize(self.filename), 200 * 2)
+        # 다른 worker 가 옮긴 파일에 계속 쓰지 않고 새 파일에 쓴다
+        messages = [line['message'] for line in self.read_lines()]
+        self.assertEqual(messages[-1], '레코드 19')
+        self.assertIn('레코드 18', messages)
@@ -0,0 +1,87 @@
+import os
+import tempfile
+
+import orjson
+from django.test import override_settings
+from test_plus.test import TestCase
+
+from account.models import Member
+from room.models import Room, RoomConfig
+from utils import metrics
+from utils.cache import versioned_cache
+from utils.testing import auth_headers
+
+
+# noinspection SpellCheckingInspection
+@override_settings(METRICS_TOKEN='test-metrics-token')
+class MetricsTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        versioned_cache.clear()
+        metrics.reset()
+        self.일반사용자 = Member.objects.create_user(username='일반사용자', email='test@test', password='test')
+        self.headers = auth_headers(self.일반사용자)
+        self.room = Room.objects.create(name='스터디')
+        RoomConfig.objects.create(room=self.room, master=self.일반사용자)
+
+    def sample(self, name, labels):
+        return metrics._samples[name][labels]
+
+    def test_route_템플릿_단위로_응답시간과_쿼리수를_기록한다(self):
+        for room_id in (self.room.id, self.room.id + 100):
+            self.client.get(path=f'/api/v2/study/room/{room_id}', **self.headers)
+
+        route = ('GET', 'api/v2/study/room/<room_id>')
+        self.assertEqual(self.sample('ctudy_http_request_duration_seconds', route + ('200',))[-1], 1)
+        self.assertEqual(self.sample('ctudy_http_request_duration_seconds', route + ('404',))[-1], 1)
+        self.assertEqual(self.sample('ctudy_http_db_queries', route)[-1], 2)
+
+    def test_ninja_api_가_아닌_요청은_기록하지_않는다(self):
+        self.client.get(path='/metrics')
+        self.client.get(path='/not-found/')
+        self.assertEqual(metrics.snapshot()['histograms']['ctudy_http_request_duration_seconds'], [])
+
+    def test_METRICS_TOKEN_이_없는_요청은_거부한다(self):
+        self.assertEqual(self.client.get(path='/metrics').status_code, 403)
+        res = self.client.get(path='/metrics', HTTP_AUTHORIZATION='Bearer wrong-token')
+        self.assertEqual(res.status_code, 403)
+
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get(path='/metrics').status_code, 403)
+            with override_settings(DEBUG=True):
+                self.assertEqual(self.client.get(path='/metrics').status_code, 200)
+
+    def test_worker_별_파일을_합쳐_prometheus_형식으로_응답한다(self):
+        with tempfile.TemporaryDirectory() as metrics_dir, override_settings(METRICS_DIR=metrics_dir):
+            self.client.get(path='/api/v2/account/profile/', **self.headers)
+            # 종료된 worker 의 기록도 합친다
+            other = metrics.snapshot()
+            with open(os.path.join(metrics_dir, '999999999.json'), 'wb') as f:
+                f.write(orjson.dumps(other))
+
+            res = self.client.get(path='/metrics', HTTP_AUTHORIZATION='Bearer test-metrics-token')
+            self.assertTrue(os.path.exists(os.path.join(metrics_dir, f'{os.getpid()}.json')))
+
+        self.assertEqual(res['Content-Type'], metrics.CONTENT_TYPE)
+        body = res.content.decode()
+        self.assertIn('# TYPE ctudy_http_request_duration_seconds histogram', body)
+        self.assertIn('ctudy_http_request_duration_seconds_count'
+                      '{method="GET",route="api/v2/account/profile/",status="200"} 2', body)
+        self.assertIn('ctudy_http_db_queries_bucket{method="GET",route="api/v2/account/profile/",le="+Inf"} 2', body)
+
+    def test_등록한_상태는_counter_는_누적하고_gauge_는_살아있는_worker_만_합친다(self):
+        definitions = {'active': ('사용 중', 'gauge'), 'served': ('처리한 수', 'counter')}
+        metrics.register_stats('test', lambda: {'a': {'active': 1, 'served': 2}}, 'ctudy_test', definitions,
+                               label='alias')
+        self.addCleanup(metrics._stats_sources.pop, 'test')
+
+        with tempfile.TemporaryDirectory() as metrics_dir, override_settings(METRICS_DIR=metrics_dir):
+            # 종료된 worker
+            with open(os.path.join(metrics_dir, '999999999.json'), 'wb') as f:
+                f.write(orjson.dumps(metrics.snapshot()))
+            body = metrics.render()
+
+        self.assertIn('# TYPE ctudy_test_active gauge', body)
+        self.assertIn('ctudy_test_active{alias="a"} 1', body)
+        self.assertIn('# TYPE ctudy_test_served_total counter', body)
+        self.assertIn('ctudy_test_served_total{alias="a"} 4', body)
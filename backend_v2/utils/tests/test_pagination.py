@@ -0,0 +1,61 @@
+from test_plus.test import TestCase
+
+from account.models import Member
+from account.search import get_member_search
+from utils.error import CtudyException
+from utils.pagination import PageNumberPaginationExtra
+
+
+# noinspection SpellCheckingInspection
+class CursorPaginationTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        # name 이 겹치는 회원을 만들어 id 로 순서가 정해지는지 확인한다
+        for i in range(25):
+            Member.objects.create(username=f'member{i:02d}@ctudy.com', email=f'{i}@test', name=f'회원{i // 3:02d}')
+
+    def paginate_all(self, paginator, queryset, **params):
+        items, cursor = [], None
+        while True:
+            pagination = paginator.Input(cursor=cursor, max_page=10, **params)
+            result = paginator.paginate_queryset(queryset, pagination)
+            items.extend(result['items'])
+            cursor = result['next']
+            if cursor is None:
+                return items, result
+
+    def test_cursor_로_모든_페이지를_중복없이_조회한다(self):
+        paginator = PageNumberPaginationExtra(cursor=True, ordering=('-name',))
+        items, result = self.paginate_all(paginator, Member.objects.all())
+
+        expected = list(Member.objects.order_by('-name', '-id'))
+        self.assertEqual(items, expected)
+        self.assertIsNone(result['count'])
+
+    def test_count_를_요청하면_전체_개수를_반환한다(self):
+        paginator = PageNumberPaginationExtra(cursor=True)
+        result = paginator.paginate_queryset(Member.objects.all(), paginator.Input(max_page=10, count='exact'))
+        self.assertEqual(result['count'], 25)
+        self.assertEqual(len(result['items']), 10)
+
+        result = paginator.paginate_queryset(Member.objects.all(), paginator.Input(max_page=10, count='estimated'))
+        self.assertEqual(result['count'], 25)
+
+    def test_검색_순위로_cursor_페이지네이션한다(self):
+        paginator = PageNumberPaginationExtra(cursor=True)
+        queryset = get_member_search().search('ctudy')
+        items, _ = self.paginate_all(paginator, queryset)
+        self.assertEqual(items, list(queryset))
+
+    def test_잘못된_cursor_는_400_을_반환한다(self):
+        paginator = PageNumberPaginationExtra(cursor=True)
+        with self.assertRaises(CtudyException) as context:
+            paginator.paginate_queryset(Member.objects.all(), paginator.Input(cursor='invalid'))
+        self.assertEqual(context.exception.code, 400)
+
+    def test_기본값은_page_번호_페이지네이션이다(self):
+        paginator = PageNumberPaginationExtra()
+        result = paginator.paginate_queryset(Member.objects.order_by('id'), paginator.Input(page=3, max_page=10))
+        self.assertEqual(result['count'], 25)
+        self.assertIsNone(result['next'])
+        self.assertEqual(len(result['items']), 5)
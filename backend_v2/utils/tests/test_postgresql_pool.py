@@ -0,0 +1,95 @@
+import threading
+
+from django.test import SimpleTestCase, override_settings
+from test_plus.test import TestCase
+
+from utils.postgresql_pool.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.usable = True
+        self.closed = False
+        self.rollbacks = 0
+
+
+# noinspection SpellCheckingInspection
+class ConnectionPoolTestCase(SimpleTestCase):
+    def create_pool(self, **kwargs):
+        self.created = []
+
+        def connect():
+            connection = FakeConnection(len(self.created))
+            self.created.append(connection)
+            return connection
+
+        def reset(connection):
+            connection.rollbacks += 1
+
+        def close(connection):
+            connection.closed = True
+
+        return ConnectionPool(connect=connect, is_usable=lambda connection: connection.usable, reset=reset,
+                              close=close, **kwargs)
+
+    def test_반환한_연결을_다시_사용한다(self):
+        pool = self.create_pool(max_size=2)
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(connection.rollbacks, 1)
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(pool.stats()['in_use'], 1)
+
+    def test_최대_연결_수를_넘으면_기다린다(self):
+        pool = self.create_pool(max_size=1, timeout=0.05)
+        connection = pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+        # 다른 thread 가 반환하면 대기 중인 요청이 연결을 받는다
+        pool.timeout = 5
+        threading.Timer(0.05, pool.release, args=(connection,)).start()
+        self.assertIs(pool.acquire(), connection)
+
+    def test_health_check_에_실패한_연결은_버린다(self):
+        pool = self.create_pool(max_size=2, health_check_interval=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.usable = False
+
+        new_connection = pool.acquire()
+        self.assertIsNot(new_connection, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['health_check_failures'], 1)
+
+    def test_수명이_지난_연결과_오류가_난_연결은_버린다(self):
+        pool = self.create_pool(max_size=2, max_lifetime=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertTrue(connection.closed)
+
+        pool.max_lifetime = None
+        connection = pool.acquire()
+        pool.release(connection, discard=True)
+        self.assertTrue(connection.closed)
+        stats = pool.stats()
+        self.assertEqual((stats['size'], stats['created'], stats['discarded']), (0, 2, 2))
+
+
+# noinspection SpellCheckingInspection
+class HealthApiTestCase(TestCase):
+    def test_DB_연결_상태를_반환한다(self):
+        res = self.client.get(path='/api/v2/health/')
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.json()['response']['database'])
+
+    @override_settings(METRICS_TOKEN='test-metrics-token')
+    def test_pool_상태는_METRICS_TOKEN_을_보낸_요청에만_반환한다(self):
+        res = self.client.get(path='/api/v2/health/')
+        self.assertNotIn('pool', res.json()['response'])
+
+        res = self.client.get(path='/api/v2/health/', HTTP_AUTHORIZATION='Bearer test-metrics-token')
+        self.assertIn('pool', res.json()['response'])
@@ -0,0 +1,51 @@
+from unittest import mock
+
+from test_plus.test import TestCase
+
+from account.models import Member
+from coupon.apis.coupon_api import list_coupon
+from settings.api import api
+from utils.query_budget import query_shape, repeated_queries
+from utils.testing import QueryBudgetMixin, auth_headers
+
+
+# noinspection SpellCheckingInspection
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.일반사용자 = Member.objects.create_user(username='일반사용자', email='test@test', password='test')
+        self.headers = auth_headers(self.일반사용자)
+
+    def test_모든_v2_API_는_쿼리_예산을_선언한다(self):
+        missing = [
+            f'{prefix}{path} {operation.view_func.__name__}'
+            for prefix, router in api._routers
+            for path, path_view in router.path_operations.items()
+            for operation in path_view.operations
+            if getattr(operation.view_func, 'query_budget', None) is None
+        ]
+        self.assertEqual(missing, [])
+
+    def test_값만_다른_쿼리는_같은_형태다(self):
+        self.assertEqual(
+            query_shape('SELECT "a"."id" FROM "a" WHERE ("a"."id" = 1 AND "a"."name" = \'it\'\'s\')'),
+            query_shape('SELECT "a"."id"  FROM "a" WHERE ("a"."id" = 25 AND "a"."name" = \'x\')')
+        )
+        self.assertEqual(query_shape('SELECT * FROM "a" U0 WHERE U0."id" IN (1, 2, 3)'),
+                         'SELECT * FROM "a" U0 WHERE U0."id" IN (...)')
+
+    def test_반복된_SELECT_를_N_plus_1_로_찾는다(self):
+        queries = [{'sql': f'SELECT "room"."id" FROM "room" WHERE "room"."id" = {i}'} for i in range(3)]
+        queries += [{'sql': f'UPDATE "room" SET "name" = \'{i}\''} for i in range(3)]
+        self.assertEqual(repeated_queries(queries), [('SELECT "room"."id" FROM "room" WHERE "room"."id" = ?', 3)])
+        self.assertEqual(repeated_queries(queries, threshold=4), [])
+
+    def test_쿼리_예산을_넘으면_실패한다(self):
+        with mock.patch.object(list_coupon, 'query_budget', 1):
+            with self.assertRaisesMessage(AssertionError, '2 queries executed, budget is 1'):
+                self.client.get(path='/api/v2/coupon/', data={'room_id': 1}, **self.headers)
+
+        # 토큰이 캐시되면 인증 쿼리 없이 예산 안에 든다
+        with mock.patch.object(list_coupon, 'query_budget', 1):
+            res = self.client.get(path='/api/v2/coupon/', data={'room_id': 1}, **self.headers)
+        self.assertEqual(len(res.captured_queries), 1)